@@ -1,13 +1,27 @@
-from flask import Flask
+from dotenv import load_dotenv
+
+# Some settings (cache sizes, TTLs) are read when their modules are
+# imported, so .env has to be loaded before the blueprints below.
+load_dotenv()
+
+from flask import Flask, jsonify
 from flask_cors import CORS
 
 from blueprints.auth_blueprint import authentication_blueprint
 from blueprints.resources_blueprints import resources_blueprint
 from blueprints.verifications_blueprint import verifications_blueprint
 from blueprints.users_blueprint import users_blueprint
+from middleware.metrics_middleware import init_metrics
+from utils.db_helpers import db_pool_stats
+from utils.json_helpers import JSONProvider
+from utils.rate_limit import rate_limiter
+from utils.resource_events import event_hub
+from utils.response_cache import response_cache
 
 app = Flask(__name__)
-CORS(app)
+app.json = JSONProvider(app)
+CORS(app, expose_headers=["X-Next-Cursor", "Link", "ETag", "Last-Modified", "Retry-After"])
+init_metrics(app)
 app.register_blueprint(authentication_blueprint)
 app.register_blueprint(users_blueprint)
 app.register_blueprint(resources_blueprint)
@@ -18,6 +32,17 @@ app.register_blueprint(verifications_blueprint)
 def index():
     return "Hello world"
 
+
+@app.route('/health')
+def health():
+    return jsonify({
+        "status": "ok",
+        "db_pool": db_pool_stats(),
+        "response_cache": response_cache.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "resource_stream": event_hub.stats(),
+    }), 200
+
 if __name__ == '__main__':
     app.run()
 
@@ -0,0 +1,162 @@
+"""
+ASGI entry point. Serves the Flask app (app.py) through asgiref's WSGI
+adapter on a pool of WSGI_THREADS threads, so a request waiting on
+Postgres or Mapbox holds one thread instead of a whole worker process.
+GET /resources/stream runs on the event loop instead, where an open
+stream costs a queue rather than a thread.
+
+    uvicorn asgi:app --workers 4 --env-file .env
+
+`gunicorn app:app` serves the same routes, but its default sync workers
+answer GET /resources/stream with a 503 (see the Flask route).
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from werkzeug.datastructures import MultiDict
+
+from app import app as flask_app
+from utils import metrics
+from utils.resource_events import (
+    event_hub, parse_stream_filter, StreamFull, STREAM_HEADERS, STREAM_QUEUE_SIZE, STREAM_HEARTBEAT_SECONDS,
+    STREAM_START, KEEPALIVE, RESET,
+)
+
+STREAM_PATH = "/resources/stream"
+# What flask_cors adds to the Flask responses (see app.py).
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Expose-Headers": "X-Next-Cursor, Link, ETag, Last-Modified, Retry-After",
+}
+
+# Flask requests mostly wait on a pooled psycopg2 connection, so by default
+# there is one thread per connection.
+WSGI_THREADS = int(os.getenv("WSGI_THREADS", os.getenv("DB_POOL_MAX_SIZE", "10")))
+wsgi_executor = ThreadPoolExecutor(WSGI_THREADS, thread_name_prefix="wsgi")
+
+
+class ThreadPoolWsgiToAsgiInstance(WsgiToAsgiInstance):
+    # asgiref runs WSGI apps thread_sensitive, i.e. one request at a time per process.
+    run_wsgi_app = sync_to_async(
+        WsgiToAsgiInstance.run_wsgi_app.__wrapped__, thread_sensitive=False, executor=wsgi_executor
+    )
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await ThreadPoolWsgiToAsgiInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+
+wsgi_app = ThreadPoolWsgiToAsgi(flask_app)
+
+
+async def start_response(send, status, headers):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in {**CORS_HEADERS, **headers}.items()
+        ],
+    })
+
+
+async def send_json(send, data, status):
+    body = flask_app.json.dumps(data).encode("utf-8")
+    await start_response(send, status, {"Content-Type": "application/json", "Content-Length": str(len(body))})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_chunk(send, chunk):
+    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+
+async def until_disconnected(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def stream_events(scope, receive, send):
+    """
+    GET /resources/stream: one asyncio queue per client, fed from the
+    EventHub listener thread. Returns the response status.
+    """
+    args = MultiDict(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True))
+    try:
+        event_filter = parse_stream_filter(args)
+    except ValueError as error:
+        await send_json(send, {"error": str(error)}, 400)
+        return 400
+
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue(STREAM_QUEUE_SIZE)
+    overflowed = asyncio.Event()
+
+    def offer(chunk):
+        try:
+            events.put_nowait(chunk)
+        except asyncio.QueueFull:
+            overflowed.set()
+
+    try:
+        # The hub calls deliver on its listener thread.
+        subscription = event_hub.subscribe(event_filter, lambda chunk: loop.call_soon_threadsafe(offer, chunk))
+    except StreamFull as error:
+        await send_json(send, {"error": str(error)}, 503)
+        return 503
+
+    # Keepalives alone would only notice a gone client on a failed send.
+    disconnected = asyncio.ensure_future(until_disconnected(receive))
+    try:
+        await start_response(send, 200, STREAM_HEADERS)
+        await send_chunk(send, STREAM_START)
+        while not overflowed.is_set():
+            next_event = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait({next_event, disconnected}, timeout=STREAM_HEARTBEAT_SECONDS,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if next_event in done:
+                await send_chunk(send, next_event.result())
+                continue
+            next_event.cancel()
+            if disconnected in done:
+                return 200
+            await send_chunk(send, KEEPALIVE)
+        await send_chunk(send, RESET)
+        await send({"type": "http.response.body", "body": b""})
+        return 200
+    finally:
+        disconnected.cancel()
+        subscription.close()
+
+
+async def resource_stream(scope, receive, send):
+    # Counted under the Flask route's labels, as if Flask had served it.
+    stats, stats_token = metrics.start_request()
+    status = 500
+    try:
+        status = await stream_events(scope, receive, send)
+    finally:
+        metrics.finish_request(stats_token, stats, "GET", "resources_blueprint", STREAM_PATH, status, scope["path"])
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            wsgi_executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] == "http" and scope["method"] == "GET" and scope["path"] == STREAM_PATH:
+        return await resource_stream(scope, receive, send)
+    return await wsgi_app(scope, receive, send)
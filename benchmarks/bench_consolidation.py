@@ -0,0 +1,144 @@
+"""
+Micro-benchmark for the GET /resources consolidation step.
+
+Builds synthetic rows shaped like the resources_index query (one row per
+resource/verification pair, ordered by resource) and times the previous
+quadratic implementation against the current single-pass ones.
+
+    python -m benchmarks.bench_consolidation
+    python -m benchmarks.bench_consolidation --sizes 1000 10000 100000 --legacy-max 10000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from utils.db_helpers import consolidate_verifications_in_resources, iter_consolidated_resources
+
+
+def legacy_consolidate(resources_with_verifications):
+    # The implementation before the single-pass rewrite, kept for comparison.
+    consolidated_resources = []
+
+    for row in resources_with_verifications:
+        resource_exists = False
+
+        for consolidated in consolidated_resources:
+            if row["id"] == consolidated["id"]:
+                resource_exists = True
+
+                if row["verification_id"] is not None:
+                    consolidated["verifications"].append({
+                        "verification_id": row["verification_id"],
+                        "status": row["verification_status"],
+                        "note": row["verification_note"],
+                        "createdAt": row.get("verificationCreatedAt"),
+                        "verification_author_username": row["verification_author_username"],
+                        "verification_author_id": row["verification_author_id"],
+                    })
+                break
+
+        if not resource_exists:
+            row["verifications"] = []
+            if row["verification_id"] is not None:
+                row["verifications"].append({
+                    "verification_id": row["verification_id"],
+                    "status": row["verification_status"],
+                    "note": row["verification_note"],
+                    "createdAt": row.get("verificationCreatedAt"),
+                    "verification_author_username": row["verification_author_username"],
+                    "verification_author_id": row["verification_author_id"],
+                })
+
+            row.pop("verification_id", None)
+            row.pop("verification_status", None)
+            row.pop("verification_note", None)
+            row.pop("verification_author_username", None)
+            row.pop("verification_author_id", None)
+            row.pop("verificationCreatedAt", None)
+
+            consolidated_resources.append(row)
+
+    return consolidated_resources
+
+
+def make_rows(row_count, seed=42):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    rows = []
+    resource_id = row_count
+    while len(rows) < row_count:
+        created_at = now - timedelta(minutes=resource_id)
+        base = {
+            "id": resource_id,
+            "resource_author_id": rng.randint(1, 500),
+            "title": f"Resource {resource_id}",
+            "description": "Synthetic resource",
+            "category": rng.choice(["Food", "Housing", "Health", "Education"]),
+            "address": f"{resource_id} Main St",
+            "city": "Springfield",
+            "lat": 40.0,
+            "lng": -74.0,
+            "requirements": None,
+            "hidden_reason": None,
+            "hidden_at": None,
+            "createdAt": created_at,
+            "updatedAt": created_at,
+            "author_username": "author",
+        }
+        verification_count = rng.choice([0, 1, 1, 2, 3])
+        for index in range(max(verification_count, 1)):
+            row = dict(base)
+            has_verification = index < verification_count
+            row.update({
+                "verification_id": resource_id * 10 + index if has_verification else None,
+                "verification_status": "Active" if has_verification else None,
+                "verification_note": "Still open" if has_verification else None,
+                "verificationCreatedAt": created_at if has_verification else None,
+                "verification_author_username": "verifier" if has_verification else None,
+                "verification_author_id": 7 if has_verification else None,
+            })
+            rows.append(row)
+        resource_id -= 1
+    return rows[:row_count]
+
+
+def time_it(function, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        # Consolidation mutates rows, so every run gets fresh copies.
+        fresh = [dict(row) for row in rows]
+        started = time.perf_counter()
+        result = function(fresh)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--legacy-max", type=int, default=10000,
+                        help="skip the quadratic implementation above this many rows")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    implementations = [
+        ("legacy (quadratic)", legacy_consolidate),
+        ("consolidate (dict)", consolidate_verifications_in_resources),
+        ("iter (streaming)", lambda rows: list(iter_consolidated_resources(rows))),
+    ]
+
+    print(f"{'rows':>8}  {'implementation':<20} {'best ms':>10} {'us/row':>8} {'resources':>10}")
+    for size in args.sizes:
+        rows = make_rows(size)
+        for name, function in implementations:
+            if function is legacy_consolidate and size > args.legacy_max:
+                print(f"{size:>8}  {name:<20} {'skipped':>10}")
+                continue
+            elapsed, resources = time_it(function, rows, args.repeat)
+            print(f"{size:>8}  {name:<20} {elapsed * 1000:>10.2f} {elapsed / size * 1e6:>8.3f} {resources:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark for the /resources/nearby lookup against a local Postgres.
+
+Loads N synthetic points (default 1M) into a temporary table shaped like
+resources(lat, lng), builds the same (lat, lng) B-tree index and runs the
+bounding box + haversine query used by the endpoint, once with the index
+and once with index scans disabled. Lookup time with the index should stay
+roughly flat as N grows, while the sequential scan grows linearly.
+
+    python -m benchmarks.bench_nearby --sizes 100000 1000000 --radius 2 5 20
+"""
+import argparse
+import random
+import time
+
+from dotenv import load_dotenv
+
+from utils.db_helpers import get_db_connection, release_db_connection
+from utils.geo_helpers import bounding_box, haversine_sql
+
+# Roughly the continental US, so densities look like a real city feed.
+LAT_RANGE = (25.0, 49.0)
+LNG_RANGE = (-124.0, -67.0)
+
+
+def load_points(cursor, size):
+    cursor.execute("DROP TABLE IF EXISTS bench_points")
+    cursor.execute(
+        """
+        CREATE TEMPORARY TABLE bench_points (
+          id  SERIAL PRIMARY KEY,
+          lat NUMERIC(9,6) NOT NULL,
+          lng NUMERIC(9,6) NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO bench_points (lat, lng)
+        SELECT round((%s + random() * %s)::numeric, 6),
+               round((%s + random() * %s)::numeric, 6)
+        FROM generate_series(1, %s)
+        """,
+        (LAT_RANGE[0], LAT_RANGE[1] - LAT_RANGE[0], LNG_RANGE[0], LNG_RANGE[1] - LNG_RANGE[0], size),
+    )
+    cursor.execute("CREATE INDEX ON bench_points (lat, lng)")
+    cursor.execute("ANALYZE bench_points")
+
+
+def nearby_query(cursor, lat, lng, radius_km, limit=50):
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    cursor.execute(
+        f"""
+        SELECT id, distance_km
+        FROM (
+            SELECT p.id, {haversine_sql("p")} AS distance_km
+            FROM bench_points p
+            WHERE p.lat BETWEEN %s AND %s AND p.lng BETWEEN %s AND %s
+        ) candidates
+        WHERE distance_km <= %s
+        ORDER BY distance_km, id
+        LIMIT %s
+        """,
+        (lat, lat, lng, min_lat, max_lat, min_lng, max_lng, radius_km, limit),
+    )
+    return cursor.fetchall()
+
+
+def time_lookups(cursor, centers, radius_km):
+    started = time.perf_counter()
+    found = 0
+    for lat, lng in centers:
+        found += len(nearby_query(cursor, lat, lng, radius_km))
+    elapsed = time.perf_counter() - started
+    return elapsed / len(centers), found / len(centers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--radius", type=float, nargs="+", default=[2, 5, 20])
+    parser.add_argument("--lookups", type=int, default=50)
+    parser.add_argument("--skip-seqscan", action="store_true")
+    args = parser.parse_args()
+
+    load_dotenv()
+    rng = random.Random(7)
+    centers = [(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for _ in range(args.lookups)]
+
+    connection = get_db_connection()
+    try:
+        cursor = connection.cursor()
+        print(f"{'points':>9}  {'radius km':>9}  {'plan':<8} {'ms/lookup':>10} {'avg hits':>9}")
+        for size in args.sizes:
+            load_points(cursor, size)
+            for radius_km in args.radius:
+                plans = [("index", "on")] + ([] if args.skip_seqscan else [("seqscan", "off")])
+                for plan, setting in plans:
+                    cursor.execute(f"SET enable_indexscan = {setting}")
+                    cursor.execute(f"SET enable_bitmapscan = {setting}")
+                    per_lookup, hits = time_lookups(cursor, centers, radius_km)
+                    print(f"{size:>9}  {radius_km:>9g}  {plan:<8} {per_lookup * 1000:>10.2f} {hits:>9.1f}")
+                cursor.execute("RESET enable_indexscan")
+                cursor.execute("RESET enable_bitmapscan")
+        connection.rollback()
+    finally:
+        release_db_connection(connection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Round trips per write endpoint: the old handler flows (ownership pre-check,
+write, re-select) against the single statements in utils.data_access.
+
+Every flow runs against a local Postgres inside one transaction that is
+rolled back at the end. Round trips are counted per cursor.execute. The
+projected column adds --rtt-ms per round trip to the measured time, which
+is what the saving looks like with the database on another host.
+
+    python -m benchmarks.bench_round_trips --repeat 200 --rtt-ms 0.5 2
+"""
+import argparse
+import time
+
+import psycopg2.extras
+from dotenv import load_dotenv
+
+from utils import data_access
+from utils.db_helpers import get_db_connection, release_db_connection
+
+FIELDS = {"title": "Round trip bench", "description": "Seeded by the benchmark", "category": "Food",
+          "address": "1 Main St", "city": "Austin", "requirements": None}
+COORDS = (30.267153, -97.743061)
+
+OLD_RESOURCE_BY_ID = """
+    SELECT r.id, r.created_by AS resource_author_id, r.title, r.description, r.category, r.address, r.city,
+           r.lat, r.lng, r.requirements, r.hidden_reason, r.hidden_at, r.geocode_status,
+           r.created_at AS "createdAt", r.updated_at AS "updatedAt", u.username AS author_username
+    FROM resources r
+    JOIN users u ON r.created_by = u.id
+    WHERE r.id = %s
+    """
+OLD_VERIFICATION_BY_ID = """
+    SELECT v.id AS verification_id, v.status, v.note, v.created_at AS "createdAt",
+           v.user_id AS verification_author_id, u.username AS verification_author_username
+    FROM verifications v
+    JOIN users u ON v.user_id = u.id
+    WHERE v.id = %s
+    """
+OLD_ENQUEUE = """
+    INSERT INTO geocode_jobs (resource_id) VALUES (%s)
+    ON CONFLICT (resource_id) DO UPDATE SET attempts = 0, next_attempt_at = NOW(), last_error = NULL
+    """
+
+
+class CountingCursor(psycopg2.extras.RealDictCursor):
+    round_trips = 0
+
+    def execute(self, query, params=None):
+        CountingCursor.round_trips += 1
+        return super().execute(query, params)
+
+
+def old_create_resource(cursor, ctx, i, pending):
+    status = "pending" if pending else "resolved"
+    lat, lng = (None, None) if pending else COORDS
+    cursor.execute(
+        """
+        INSERT INTO resources (created_by, title, description, category, address, city, lat, lng, requirements, geocode_status)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        RETURNING id
+        """,
+        (ctx["user_id"], FIELDS["title"], FIELDS["description"], FIELDS["category"], FIELDS["address"],
+         FIELDS["city"], lat, lng, FIELDS["requirements"], status),
+    )
+    resource_id = cursor.fetchone()["id"]
+    if pending:
+        cursor.execute(OLD_ENQUEUE, (resource_id,))
+    cursor.execute(OLD_RESOURCE_BY_ID, (resource_id,))
+    return cursor.fetchone()
+
+
+def new_create_resource(cursor, ctx, i, pending):
+    status = "pending" if pending else "resolved"
+    lat, lng = (None, None) if pending else COORDS
+    return data_access.create_resource(cursor, ctx["user_id"], FIELDS, lat, lng, status)
+
+
+def moved(i, change):
+    # A new address every iteration when the location should change.
+    return {**FIELDS, "address": f"{i} Main St"} if change else FIELDS
+
+
+def old_update_resource(cursor, ctx, i, change, pending):
+    fields = moved(i, change)
+    cursor.execute("SELECT * FROM resources WHERE id = %s", (ctx["resource_id"],))
+    current = cursor.fetchone()
+    if current["created_by"] != ctx["user_id"]:
+        raise AssertionError("unexpected owner")
+    if not change:
+        lat, lng, status = current["lat"], current["lng"], current["geocode_status"]
+    elif pending:
+        lat, lng, status = None, None, "pending"
+    else:
+        lat, lng, status = COORDS[0], COORDS[1], "resolved"
+    cursor.execute(
+        """
+        UPDATE resources
+        SET title = %s, description = %s, category = %s, address = %s, city = %s,
+            lat = %s, lng = %s, requirements = %s, geocode_status = %s, updated_at = NOW()
+        WHERE id = %s
+        RETURNING id
+        """,
+        (fields["title"], fields["description"], fields["category"], fields["address"], fields["city"],
+         lat, lng, fields["requirements"], status, ctx["resource_id"]),
+    )
+    resource_id = cursor.fetchone()["id"]
+    if change and pending:
+        cursor.execute(OLD_ENQUEUE, (resource_id,))
+    cursor.execute(OLD_RESOURCE_BY_ID, (resource_id,))
+    return cursor.fetchone()
+
+
+def new_update_resource(cursor, ctx, i, change, pending):
+    # Same two-step flow as the handler in sync mode.
+    fields = moved(i, change)
+    args = (cursor, ctx["resource_id"], ctx["user_id"], fields)
+    _, _, resource = data_access.update_resource(*args, geocode_status="pending" if pending else None)
+    if resource is None:
+        _, _, resource = data_access.update_resource(*args, *COORDS, "resolved")
+    return resource
+
+
+def old_delete_resource(cursor, ctx, i):
+    resource_id = ctx["spare_resources"][i]
+    cursor.execute("SELECT * FROM resources WHERE id = %s", (resource_id,))
+    resource = cursor.fetchone()
+    cursor.execute("DELETE FROM resources WHERE id = %s", (resource_id,))
+    return resource
+
+
+def new_delete_resource(cursor, ctx, i):
+    return data_access.delete_resource(cursor, ctx["spare_resources"][i], ctx["user_id"])
+
+
+def old_create_verification(cursor, ctx, i):
+    cursor.execute(
+        """
+        INSERT INTO verifications (resource_id, user_id, status, note)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (resource_id, user_id)
+        DO UPDATE SET status = EXCLUDED.status, note = EXCLUDED.note, created_at = NOW()
+        RETURNING id
+        """,
+        (ctx["resource_id"], ctx["user_id"], "Active", f"Checked {i}"),
+    )
+    cursor.execute(OLD_VERIFICATION_BY_ID, (cursor.fetchone()["id"],))
+    return cursor.fetchone()
+
+
+def new_create_verification(cursor, ctx, i):
+    return data_access.upsert_verification(cursor, ctx["resource_id"], ctx["user_id"], "Active", f"Checked {i}")
+
+
+def old_update_verification(cursor, ctx, i):
+    verification_id = ctx["verification_id"]
+    cursor.execute("SELECT * FROM verifications WHERE id = %s AND resource_id = %s",
+                   (verification_id, ctx["resource_id"]))
+    cursor.fetchone()
+    cursor.execute(
+        "UPDATE verifications SET status = %s, note = %s WHERE id = %s AND resource_id = %s RETURNING id",
+        ("Active", f"Updated {i}", verification_id, ctx["resource_id"]),
+    )
+    cursor.execute(OLD_VERIFICATION_BY_ID, (verification_id,))
+    return cursor.fetchone()
+
+
+def new_update_verification(cursor, ctx, i):
+    return data_access.update_verification(cursor, ctx["resource_id"], ctx["verification_id"], ctx["user_id"],
+                                            "Active", f"Updated {i}")
+
+
+def old_delete_verification(cursor, ctx, i):
+    resource_id, verification_id = ctx["spare_verifications"][i]
+    cursor.execute("SELECT * FROM verifications WHERE id = %s AND resource_id = %s", (verification_id, resource_id))
+    cursor.fetchone()
+    cursor.execute("DELETE FROM verifications WHERE id = %s AND resource_id = %s", (verification_id, resource_id))
+
+
+def new_delete_verification(cursor, ctx, i):
+    resource_id, verification_id = ctx["spare_verifications"][i]
+    return data_access.delete_verification(cursor, resource_id, verification_id, ctx["user_id"])
+
+
+# (endpoint, old flow, new flow, extra args)
+SCENARIOS = [
+    ("POST /resources", old_create_resource, new_create_resource, (False,)),
+    ("POST /resources?geocode=async", old_create_resource, new_create_resource, (True,)),
+    ("PUT /resources/<id> same location", old_update_resource, new_update_resource, (False, False)),
+    ("PUT /resources/<id> moved, sync", old_update_resource, new_update_resource, (True, False)),
+    ("PUT /resources/<id> moved, async", old_update_resource, new_update_resource, (True, True)),
+    ("POST .../verifications", old_create_verification, new_create_verification, ()),
+    ("PUT .../verifications/<id>", old_update_verification, new_update_verification, ()),
+    ("DELETE .../verifications/<id>", old_delete_verification, new_delete_verification, ()),
+    # Last: deleting the spare resources cascades to the spare verifications.
+    ("DELETE /resources/<id>", old_delete_resource, new_delete_resource, ()),
+]
+
+
+def seed(cursor, repeat):
+    """
+    A user, the resource and verification the updates work on, and 2 * repeat
+    spare resources and verifications for the deletes (old and new flows).
+    """
+    cursor.execute("INSERT INTO users (username, password) VALUES ('bench_round_trips', 'x') RETURNING id")
+    user_id = cursor.fetchone()["id"]
+    cursor.execute(
+        """
+        INSERT INTO resources (created_by, title, category, address, city, lat, lng)
+        SELECT %s, 'Round trip bench', 'Food', '1 Main St', 'Austin', %s, %s
+        FROM generate_series(0, %s)
+        RETURNING id
+        """,
+        (user_id, COORDS[0], COORDS[1], 2 * repeat),
+    )
+    resource_id, *spare_resources = [row["id"] for row in cursor.fetchall()]
+    cursor.execute(
+        """
+        INSERT INTO verifications (resource_id, user_id, status, note)
+        SELECT id, %s, 'Active', 'Seeded by the benchmark' FROM unnest(%s::int[]) id
+        RETURNING resource_id, id
+        """,
+        (user_id, [resource_id] + spare_resources),
+    )
+    verifications = [(row["resource_id"], row["id"]) for row in cursor.fetchall()]
+    return {
+        "user_id": user_id,
+        "resource_id": resource_id,
+        "verification_id": verifications[0][1],
+        "spare_resources": spare_resources,
+        # Verifications on other resources, so deleting them never touches resource_id's.
+        "spare_verifications": verifications[1:],
+    }
+
+
+def run(cursor, flow, ctx, args, repeat, offset):
+    flow(cursor, ctx, offset, *args)  # warm up (and prepare, for the new flows)
+    CountingCursor.round_trips = 0
+    started = time.perf_counter()
+    for i in range(offset + 1, offset + repeat):
+        flow(cursor, ctx, i, *args)
+    per_op = (time.perf_counter() - started) / (repeat - 1)
+    return CountingCursor.round_trips / (repeat - 1), per_op
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, nargs="+", default=[0.5, 2.0])
+    args = parser.parse_args()
+
+    load_dotenv()
+    connection = get_db_connection()
+    try:
+        cursor = connection.cursor(cursor_factory=CountingCursor)
+        ctx = seed(cursor, args.repeat)
+        projected = "".join(f"  {f'old/new @{rtt:g}ms':>18}" for rtt in args.rtt_ms)
+        print(f"{'endpoint':<36} {'trips old':>9} {'new':>5} {'saved':>6}  {'ms/op old':>9} {'new':>6}{projected}")
+        for name, old_flow, new_flow, extra in SCENARIOS:
+            old_trips, old_time = run(cursor, old_flow, ctx, extra, args.repeat, 0)
+            new_trips, new_time = run(cursor, new_flow, ctx, extra, args.repeat, args.repeat)
+            line = (f"{name:<36} {old_trips:>9.1f} {new_trips:>5.1f} {old_trips - new_trips:>6.1f}"
+                    f"  {old_time * 1000:>9.2f} {new_time * 1000:>6.2f}")
+            for rtt in args.rtt_ms:
+                old_ms = old_time * 1000 + old_trips * rtt
+                new_ms = new_time * 1000 + new_trips * rtt
+                line += f"  {f'{old_ms:.2f}/{new_ms:.2f}':>18}"
+            print(line)
+        connection.rollback()
+    finally:
+        release_db_connection(connection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Benchmarks every route of app.py against the data seeded by
+benchmarks.seed_data, with Mapbox stubbed out (benchmarks.stub_app).
+
+Each route gets --concurrency clients, each signed in as a different seeded
+user, for --duration seconds. Reported per route: requests/sec, latency
+percentiles, errors, and database queries per request (measured in process
+through the Flask test client and the http_request_db_queries metric).
+--save-baseline stores the results; later runs are compared with the stored
+baseline and exit 1 when a route is slower, or runs more queries, beyond
+--tolerance.
+
+    python -m benchmarks.seed_data --resources 100000 --reset
+    python -m benchmarks.bench_routes --spawn --workers 4 --save-baseline
+    python -m benchmarks.bench_routes --spawn --workers 4
+    python -m benchmarks.bench_routes --target http://127.0.0.1:8000 --route search --route saves
+
+Rate limits are turned off in the spawned server and for the query count;
+start servers passed with --target with RATE_LIMIT_*=off and the stub
+(gunicorn benchmarks.stub_app:app). Write routes add rows, so reseed with
+--reset before runs that are compared with each other.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from urllib.parse import quote
+
+import httpx
+from dotenv import load_dotenv
+
+# Loaded before the app imports, which read their settings at import time.
+load_dotenv()
+
+from benchmarks.load_test import percentile, wait_until_up
+from benchmarks.seed_data import BENCH_PASSWORD, BENCH_USER_PATTERN, BENCH_USER_PREFIX, TOPIC_WORDS
+from middleware.auth_middleware import create_token
+from utils import metrics
+from utils.change_feed import START
+from utils.db_helpers import get_db_connection, release_db_connection
+from utils.pagination_helpers import encode_cursor
+from utils import rate_limit
+from utils.rate_limit import DEFAULT_LIMITS, MemoryBackend, RateLimiter
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SPAWN_COMMANDS = {
+    "sync": ["gunicorn", "benchmarks.stub_app:app", "--workers", "{workers}", "--bind", "127.0.0.1:{port}"],
+    "async": [sys.executable, "-m", "uvicorn", "benchmarks.stub_app:asgi_app", "--workers", "{workers}",
+              "--port", "{port}"],
+}
+SAMPLE_RESOURCES = 1000
+
+
+def new_resource(i):
+    return {"title": f"Bench resource {i}", "description": "Created by the route benchmark", "category": "Food",
+            "address": f"{i} Bench Ave", "city": "Austin"}
+
+
+def pick(values, i, step=0):
+    return values[(i * 7919 + step) % len(values)]
+
+
+def bbox_around(point, half_lat=1, half_lng=2):
+    lat, lng = point
+    return f"{lng - half_lng:.4f},{lat - half_lat:.4f},{lng + half_lng:.4f},{lat + half_lat:.4f}"
+
+
+# (route, request builder): builder(ctx, user, i) -> (method, path, json body); i is unique per request.
+SCENARIOS = [
+    ("GET /", lambda ctx, user, i: ("GET", "/", None)),
+    ("GET /health", lambda ctx, user, i: ("GET", "/health", None)),
+    ("GET /resources?limit=50", lambda ctx, user, i: ("GET", "/resources?limit=50", None)),
+    ("GET /resources?limit=50&verifications=summary",
+     lambda ctx, user, i: ("GET", "/resources?limit=50&verifications=summary", None)),
+    ("GET /resources?limit=50&saved=true", lambda ctx, user, i: ("GET", "/resources?limit=50&saved=true", None)),
+    ("GET /resources (streamed, one city)",
+     lambda ctx, user, i: ("GET", "/resources?category=Food&city=Boston&verifications=summary", None)),
+    ("GET /resources/search", lambda ctx, user, i: (
+        "GET", f"/resources/search?limit=20&q={quote(pick(TOPIC_WORDS, i) + ' ' + pick(TOPIC_WORDS, i, 1))}", None)),
+    ("GET /resources/nearby", lambda ctx, user, i: (
+        "GET", "/resources/nearby?lat={:.4f}&lng={:.4f}&radius=25&limit=50".format(*pick(ctx["points"], i)), None)),
+    ("GET /resources/<id>", lambda ctx, user, i: ("GET", f"/resources/{pick(ctx['resource_ids'], i)}", None)),
+    ("GET /resources/clusters",
+     lambda ctx, user, i: ("GET", f"/resources/clusters?zoom=8&bbox={bbox_around(pick(ctx['points'], i))}", None)),
+    ("GET /resources/changes (last 50)",
+     lambda ctx, user, i: ("GET", f"/resources/changes?since={ctx['changes_token']}", None)),
+    ("GET /resources/<id>/geocode",
+     lambda ctx, user, i: ("GET", f"/resources/{pick(ctx['resource_ids'], i)}/geocode", None)),
+    ("GET /saves", lambda ctx, user, i: ("GET", "/saves", None)),
+    ("GET /saves/ids?format=bitmap", lambda ctx, user, i: ("GET", "/saves/ids?format=bitmap", None)),
+    ("GET /users", lambda ctx, user, i: ("GET", "/users", None)),
+    ("GET /users/<id>", lambda ctx, user, i: ("GET", f"/users/{user['id']}", None)),
+    ("POST /resources", lambda ctx, user, i: ("POST", "/resources", new_resource(i))),
+    ("PUT /resources/<id>",
+     lambda ctx, user, i: ("PUT", f"/resources/{user['resource_id']}", new_resource(i))),
+    ("POST /resources/<id>/verifications", lambda ctx, user, i: (
+        "POST", f"/resources/{pick(ctx['resource_ids'], i)}/verifications",
+        {"status": "Active", "note": f"Benchmark check {i}"})),
+    ("PUT /resources/<id>/verifications/<id>", lambda ctx, user, i: (
+        "PUT", "/resources/{}/verifications/{}".format(*user["verification"]),
+        {"status": "Info Needs Update", "note": f"Benchmark update {i}"})),
+    ("POST /resources/<id>/saves", lambda ctx, user, i: ("POST", f"/resources/{pick(ctx['resource_ids'], i)}/saves", None)),
+    ("DELETE /resources/<id>/saves",
+     lambda ctx, user, i: ("DELETE", f"/resources/{pick(ctx['resource_ids'], i)}/saves", None)),
+    ("POST /saves/batch", lambda ctx, user, i: ("POST", "/saves/batch", {
+        "save": sorted({pick(ctx["resource_ids"], i, step) for step in range(10)}),
+        "unsave": sorted({pick(ctx["resource_ids"], i, step) for step in range(10, 20)}
+                         - {pick(ctx["resource_ids"], i, step) for step in range(10)}),
+    })),
+    ("POST /auth/sign-in", lambda ctx, user, i: (
+        "POST", "/auth/sign-in", {"username": user["username"], "password": BENCH_PASSWORD})),
+    ("POST /auth/sign-up", lambda ctx, user, i: (
+        "POST", "/auth/sign-up", {"username": f"{BENCH_USER_PREFIX}signup_{uuid.uuid4().hex[:20]}",
+                                  "password": BENCH_PASSWORD})),
+]
+
+
+def load_context(cursor, clients):
+    """
+    Seeded users (with a token, one resource they own and one verification
+    they wrote, for the owner-only routes), sample resource ids and points.
+    """
+    cursor.execute("SELECT id, username FROM users WHERE username ~ %s ORDER BY id LIMIT %s",
+                   (BENCH_USER_PATTERN, clients * 4))
+    candidates = cursor.fetchall()
+    if not candidates:
+        raise SystemExit("No benchmark users: run python -m benchmarks.seed_data first")
+    user_ids = [user_id for user_id, _ in candidates]
+    cursor.execute("SELECT DISTINCT ON (created_by) created_by, id FROM resources "
+                   "WHERE created_by = ANY(%s) ORDER BY created_by, id", (user_ids,))
+    owned = dict(cursor.fetchall())
+    cursor.execute("SELECT DISTINCT ON (user_id) user_id, resource_id, id FROM verifications "
+                   "WHERE user_id = ANY(%s) ORDER BY user_id, id", (user_ids,))
+    verified = {user_id: (resource_id, verification_id) for user_id, resource_id, verification_id in cursor.fetchall()}
+
+    users = [
+        {"id": user_id, "username": username, "resource_id": owned[user_id], "verification": verified[user_id],
+         "token": create_token({"username": username, "id": user_id})}
+        for user_id, username in candidates if user_id in owned and user_id in verified
+    ][:clients]
+    if not users:
+        raise SystemExit("No benchmark user owns a resource and a verification: reseed with --reset")
+
+    cursor.execute("SELECT id, lat::float8, lng::float8 FROM resources WHERE lat IS NOT NULL "
+                   "ORDER BY random() LIMIT %s", (SAMPLE_RESOURCES,))
+    sample = cursor.fetchall()
+    # A sync token 50 changes behind the end of the change log, as of the start of the run.
+    cursor.execute("SELECT txid::text::bigint, resource_id, verification_id FROM resource_changes "
+                   "ORDER BY txid DESC, resource_id DESC, verification_id DESC OFFSET 50 LIMIT 1")
+    position = cursor.fetchone() or START
+    return {
+        "users": users,
+        "resource_ids": [row[0] for row in sample],
+        "points": [(row[1], row[2]) for row in sample],
+        "changes_token": encode_cursor(*position),
+    }
+
+
+async def drive(base_url, build, ctx, concurrency, duration, bust_cache, counter):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker(index):
+            nonlocal errors
+            user = ctx["users"][index % len(ctx["users"])]
+            headers = {"Authorization": f"Bearer {user['token']}"}
+            while time.perf_counter() < deadline:
+                i = next(counter)
+                method, path, body = build(ctx, user, i)
+                if bust_cache and method == "GET":
+                    path += f"{'&' if '?' in path else '?'}_={i}"
+                started = time.perf_counter()
+                try:
+                    res = await client.request(method, path, json=body, headers=headers)
+                    ok = res.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(index) for index in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return elapsed, latencies, errors
+
+
+def queries_per_request(flask_app, build, ctx, samples, counter):
+    """
+    Mean database round trips of the route, from samples sequential requests
+    through the Flask test client. Streamed listings count the queries run
+    before the body starts.
+    """
+    client = flask_app.test_client()
+    count_before, sum_before = metrics.REQUEST_DB_QUERIES.totals()
+    for sample in range(samples):
+        user = ctx["users"][sample % len(ctx["users"])]
+        method, path, body = build(ctx, user, next(counter))
+        response = client.open(path, method=method, json=body, headers={"Authorization": f"Bearer {user['token']}"})
+        response.get_data()
+        response.close()
+    count_after, sum_after = metrics.REQUEST_DB_QUERIES.totals()
+    return (sum_after - sum_before) / (count_after - count_before) if count_after > count_before else None
+
+
+def spawn(server, workers, port):
+    env = {**os.environ, **{f"RATE_LIMIT_{name.upper()}": "off" for name in DEFAULT_LIMITS}}
+    args = [part.format(workers=workers, port=port) for part in SPAWN_COMMANDS[server]]
+    process = subprocess.Popen(args, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    wait_until_up(base_url)
+    return process, base_url
+
+
+def compare(result, baseline, tolerance):
+    """
+    (change notes, regressed) of one route against its baseline entry.
+    """
+    notes = []
+    regressed = False
+    if baseline["rps"]:
+        change = result["rps"] / baseline["rps"] - 1
+        notes.append(f"req/s {change:+.0%}")
+        regressed |= change < -tolerance
+    if baseline["p99_ms"]:
+        change = result["p99_ms"] / baseline["p99_ms"] - 1
+        notes.append(f"p99 {change:+.0%}")
+        regressed |= change > tolerance
+    if baseline.get("queries") is not None and result["queries"] is not None:
+        change = result["queries"] - baseline["queries"]
+        if abs(change) >= 0.05:
+            notes.append(f"queries {change:+.1f}")
+        regressed |= change >= 0.05
+    return notes, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", help="base URL of a running server (see above)")
+    parser.add_argument("--spawn", action="store_true", help="start the stubbed app locally")
+    parser.add_argument("--server", choices=sorted(SPAWN_COMMANDS), default="sync")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--route", action="append", default=[], help="only routes containing this text")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=1)
+    parser.add_argument("--bust-cache", action="store_true")
+    parser.add_argument("--query-samples", type=int, default=5, help="0 skips counting queries")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown")
+    args = parser.parse_args()
+    if not args.target and not args.spawn:
+        parser.error("pass --target URL or --spawn")
+
+    # For the in-process query count; the spawned server gets RATE_LIMIT_*=off.
+    rate_limit.rate_limiter = RateLimiter(MemoryBackend(), {name: None for name in DEFAULT_LIMITS})
+    scenarios = [(name, build) for name, build in SCENARIOS
+                 if not args.route or any(text in name for text in args.route)]
+
+    connection = get_db_connection()
+    try:
+        ctx = load_context(connection.cursor(), args.concurrency)
+        connection.commit()
+    finally:
+        release_db_connection(connection)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    settings = {"server": args.server if args.spawn else args.target, "workers": args.workers,
+                "concurrency": args.concurrency, "duration": args.duration, "bust_cache": args.bust_cache}
+    if baseline and baseline["settings"] != settings:
+        if args.save_baseline:
+            baseline = None  # replaced as a whole
+        else:
+            print(f"Warning: baseline settings differ: {baseline['settings']}")
+
+    counter = itertools.count(int(time.time() * 1000))
+    flask_app = None
+    if args.query_samples:
+        from benchmarks.stub_app import app as flask_app
+
+    process, base_url = (None, args.target)
+    if args.spawn:
+        process, base_url = spawn(args.server, args.workers, args.port)
+
+    results = {}
+    regressions = []
+    try:
+        print(f"{len(ctx['users'])} users, {args.concurrency} concurrent clients, {args.duration:g}s per route")
+        print(f"{'route':<46} {'req/s':>8} {'p50 ms':>7} {'p90 ms':>7} {'p99 ms':>7} {'errors':>6} {'queries':>7}")
+        for name, build in scenarios:
+            queries = queries_per_request(flask_app, build, ctx, args.query_samples, counter) if flask_app else None
+            asyncio.run(drive(base_url, build, ctx, args.concurrency, args.warmup, args.bust_cache, counter))
+            elapsed, latencies, errors = asyncio.run(
+                drive(base_url, build, ctx, args.concurrency, args.duration, args.bust_cache, counter))
+            result = results[name] = {
+                "rps": len(latencies) / elapsed,
+                "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+                "p90_ms": percentile(latencies, 0.90) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "errors": errors,
+                "queries": queries,
+            }
+            line = (f"{name[:46]:<46} {result['rps']:>8.1f} {result['p50_ms']:>7.1f} {result['p90_ms']:>7.1f}"
+                    f" {result['p99_ms']:>7.1f} {errors:>6} {'-' if queries is None else f'{queries:.1f}':>7}")
+            if baseline and not args.save_baseline and name in baseline["routes"]:
+                notes, regressed = compare(result, baseline["routes"][name], args.tolerance)
+                line += "  " + ", ".join(notes) + ("  REGRESSED" if regressed else "")
+                if regressed:
+                    regressions.append(name)
+            print(line)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    if args.save_baseline:
+        # Routes left out with --route keep their stored results.
+        routes = {**(baseline["routes"] if baseline else {}), **results}
+        with open(args.baseline, "w") as file:
+            json.dump({"settings": settings, "routes": routes}, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+    elif baseline is None:
+        print(f"No baseline at {args.baseline}; store one with --save-baseline")
+    if regressions:
+        print(f"{len(regressions)} route(s) regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+CPU and memory of the listing row path: dict rows (RealDictCursor, then
+consolidation into nested dicts) against tuple rows folded into the
+__slots__ records of utils.resource_rows. Both paths build the listing and
+encode it as GET /resources does; the JSON must be identical.
+
+Rows are synthetic and start as tuples, the way psycopg2 receives them;
+the dict path pays for building a dict per row like RealDictCursor does.
+
+    python -m benchmarks.bench_rows
+    python -m benchmarks.bench_rows --sizes 10000 100000 --repeat 5
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from benchmarks.bench_consolidation import make_rows
+from utils.db_helpers import iter_consolidated_resources
+from utils.json_helpers import dumps
+from utils.resource_rows import ResourceReader
+
+
+def dict_listing(columns, rows):
+    return list(iter_consolidated_resources(dict(zip(columns, row)) for row in rows))
+
+
+def compact_listing(columns, rows):
+    return list(ResourceReader(columns).read(rows))
+
+
+IMPLEMENTATIONS = [
+    ("dict rows", dict_listing),
+    ("tuple + slots", compact_listing),
+]
+
+
+def best_time(function, columns, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        dumps(function(columns, rows))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def listing_memory(function, columns, rows):
+    """
+    (bytes held by the built listing, peak bytes while building and encoding it).
+    """
+    gc.collect()
+    tracemalloc.start()
+    listing = function(columns, rows)
+    held = tracemalloc.get_traced_memory()[0]
+    dumps(listing)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return held, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'implementation':<15} {'best ms':>9} {'us/row':>7} {'held MB':>8} {'peak MB':>8}")
+    for size in args.sizes:
+        sample = make_rows(size)
+        columns = list(sample[0])
+        rows = [tuple(row.values()) for row in sample]
+        del sample
+
+        outputs = set()
+        for name, function in IMPLEMENTATIONS:
+            outputs.add(dumps(function(columns, rows)))
+            elapsed = best_time(function, columns, rows, args.repeat)
+            held, peak = listing_memory(function, columns, rows)
+            print(f"{size:>8}  {name:<15} {elapsed * 1000:>9.2f} {elapsed / size * 1e6:>7.3f}"
+                  f" {held / 1e6:>8.2f} {peak / 1e6:>8.2f}")
+        if len(outputs) != 1:
+            raise SystemExit(f"JSON differs between implementations for {size} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark for /resources/search against a local Postgres.
+
+Loads N synthetic resources (default 500k) into a temporary table with the
+same search_vector generated column and GIN index as resources, then runs
+the ranked match used by the endpoint, once with the index and once with
+index scans disabled. With the index, lookup time depends on how many rows
+match rather than on N.
+
+    python -m benchmarks.bench_search --sizes 100000 500000 --terms "food bank" dental "free clinic"
+"""
+import argparse
+import time
+
+from dotenv import load_dotenv
+
+from utils.db_helpers import get_db_connection, release_db_connection
+
+# Vocabulary for the synthetic corpus; the rarer words give selective queries.
+COMMON_WORDS = ["free", "community", "help", "support", "students", "open", "weekly", "local", "center", "services"]
+TOPIC_WORDS = ["food", "bank", "pantry", "meals", "housing", "shelter", "rent", "health", "clinic", "dental",
+               "vision", "tutoring", "library", "scholarship", "counseling", "childcare", "transport", "legal"]
+CITIES = ["Austin", "Houston", "Dallas", "Chicago", "Boston", "Seattle", "Denver", "Miami", "Atlanta", "Phoenix"]
+
+
+def load_resources(cursor, size, seed=7):
+    cursor.execute("DROP TABLE IF EXISTS bench_resources")
+    cursor.execute(
+        """
+        CREATE TEMPORARY TABLE bench_resources (
+          id            SERIAL PRIMARY KEY,
+          title         TEXT NOT NULL,
+          description   TEXT,
+          requirements  TEXT,
+          city          TEXT NOT NULL,
+          -- same expression as resources.search_vector
+          search_vector TSVECTOR GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(requirements, '')), 'C') ||
+            setweight(to_tsvector('english', coalesce(city, '')), 'D')
+          ) STORED
+        )
+        """
+    )
+    # Words are picked in SQL so loading 500k rows does not go through Python.
+    cursor.execute("SELECT setseed(%s)", (seed / 100,))
+    cursor.execute(
+        """
+        INSERT INTO bench_resources (title, description, requirements, city)
+        SELECT concat_ws(' ', c[1 + floor(random() * cardinality(c))::int], t[1 + floor(random() * cardinality(t))::int],
+                              t[1 + floor(random() * cardinality(t))::int]),
+               concat_ws(' ', c[1 + floor(random() * cardinality(c))::int], t[1 + floor(random() * cardinality(t))::int],
+                              c[1 + floor(random() * cardinality(c))::int], t[1 + floor(random() * cardinality(t))::int],
+                              c[1 + floor(random() * cardinality(c))::int]),
+               CASE WHEN random() < 0.5 THEN 'Student ID required' END,
+               cities[1 + floor(random() * cardinality(cities))::int]
+        FROM generate_series(1, %s),
+             (SELECT %s::text[] AS c, %s::text[] AS t, %s::text[] AS cities) words
+        """,
+        (size, COMMON_WORDS, TOPIC_WORDS, CITIES),
+    )
+    cursor.execute("CREATE INDEX ON bench_resources USING GIN (search_vector)")
+    cursor.execute("ANALYZE bench_resources")
+
+
+def search(cursor, text, limit=50):
+    # The matches/page part of resource_queries.search_query.
+    cursor.execute(
+        """
+        SELECT id, rank
+        FROM (
+            SELECT r.id, ts_rank_cd(r.search_vector, query)::float8 AS rank
+            FROM bench_resources r, websearch_to_tsquery('english', %s) query
+            WHERE r.search_vector @@ query
+        ) matches
+        ORDER BY rank DESC, id DESC
+        LIMIT %s
+        """,
+        (text, limit),
+    )
+    return cursor.fetchall()
+
+
+def count_matches(cursor, text):
+    cursor.execute(
+        "SELECT count(*) FROM bench_resources WHERE search_vector @@ websearch_to_tsquery('english', %s)",
+        (text,),
+    )
+    return cursor.fetchone()[0]
+
+
+def time_searches(cursor, text, repeat):
+    search(cursor, text)  # warm the cache
+    started = time.perf_counter()
+    for _ in range(repeat):
+        search(cursor, text)
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500000])
+    parser.add_argument("--terms", nargs="+", default=["food bank", "dental", "\"free clinic\"", "scholarship -rent"])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--skip-seqscan", action="store_true")
+    args = parser.parse_args()
+
+    load_dotenv()
+    connection = get_db_connection()
+    try:
+        cursor = connection.cursor()
+        print(f"{'rows':>9}  {'query':<20} {'matches':>8}  {'plan':<8} {'ms/search':>10}")
+        for size in args.sizes:
+            load_resources(cursor, size)
+            for text in args.terms:
+                matches = count_matches(cursor, text)
+                plans = [("index", "on")] + ([] if args.skip_seqscan else [("seqscan", "off")])
+                for plan, setting in plans:
+                    cursor.execute(f"SET enable_indexscan = {setting}")
+                    cursor.execute(f"SET enable_bitmapscan = {setting}")
+                    per_search = time_searches(cursor, text, args.repeat)
+                    print(f"{size:>9}  {text[:20]:<20} {matches:>8}  {plan:<8} {per_search * 1000:>10.2f}")
+                cursor.execute("RESET enable_indexscan")
+                cursor.execute("RESET enable_bitmapscan")
+        connection.rollback()
+    finally:
+        release_db_connection(connection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Sign-in throughput benchmark for the bcrypt process pool.
+
+Runs the password check done by POST /auth/sign-in from many concurrent
+request threads, once inline (the old behaviour) and once per pool size,
+and reports checks/sec, latency percentiles and rejected (503) requests.
+
+    python -m benchmarks.bench_sign_in --requests 200 --concurrency 32 --rounds 12
+"""
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from utils.password_helpers import PasswordHasher, PasswordHasherBusy, _check
+
+
+def run(hasher, hashed, requests, concurrency):
+    password = b"correct horse battery staple"
+    latencies = []
+    rejected = 0
+
+    def sign_in(_):
+        started = time.perf_counter()
+        try:
+            assert hasher.run(_check, password, hashed)
+        except PasswordHasherBusy:
+            return None
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        for latency in clients.map(sign_in, range(requests)):
+            if latency is None:
+                rejected += 1
+            else:
+                latencies.append(latency)
+    elapsed = time.perf_counter() - started
+    return elapsed, latencies, rejected
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, max(os.cpu_count() // 2, 1), os.cpu_count()}))
+    parser.add_argument("--queue-limit", type=int, default=None,
+                        help="default: large enough that nothing is rejected")
+    args = parser.parse_args()
+
+    hashed = bcrypt.hashpw(b"correct horse battery staple", bcrypt.gensalt(args.rounds))
+    queue_limit = args.queue_limit or args.requests
+
+    print(f"bcrypt cost {args.rounds}, {args.requests} sign-ins from {args.concurrency} threads, {os.cpu_count()} cores")
+    print(f"{'mode':<12} {'checks/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'rejected':>9}")
+    for workers in [0] + args.workers:
+        hasher = PasswordHasher(workers, queue_limit, timeout=300)
+        # Warm up so process start-up is not measured.
+        hasher.run(_check, b"warm", hashed)
+        elapsed, latencies, rejected = run(hasher, hashed, args.requests, args.concurrency)
+        mode = "inline" if workers == 0 else f"pool x{workers}"
+        print(f"{mode:<12} {len(latencies) / elapsed:>9.1f} "
+              f"{statistics.median(latencies) * 1000 if latencies else 0:>8.1f} "
+              f"{percentile(latencies, 0.99) * 1000:>8.1f} {rejected:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Load test comparing the sync (gunicorn app:app) and async (uvicorn asgi:app)
+serving modes against a local Postgres.
+
+Each target gets the same paths from --concurrency concurrent clients for
+--duration seconds; requests/sec, latency percentiles and errors are
+reported per target and path. Either point it at servers you started:
+
+    python -m benchmarks.load_test --target sync=http://127.0.0.1:8000 \\
+        --target async=http://127.0.0.1:8001 --path "/resources?limit=50"
+
+or let it start both with the same number of workers:
+
+    python -m benchmarks.load_test --spawn --workers 4 --path /resources/1
+
+--bust-cache adds a unique query parameter to every request so the
+response cache is missed and the database is exercised on each request.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+SPAWN_COMMANDS = {
+    "sync": ["gunicorn", "app:app", "--workers", "{workers}", "--bind", "127.0.0.1:{port}"],
+    "async": [sys.executable, "-m", "uvicorn", "asgi:app", "--workers", "{workers}", "--port", "{port}"],
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run(base_url, path, concurrency, duration, bust_cache):
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+    separator = "&" if "?" in path else "?"
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                url = f"{path}{separator}_={next(counter)}" if bust_cache else path
+                started = time.perf_counter()
+                try:
+                    res = await client.get(url)
+                    ok = res.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return elapsed, latencies, errors
+
+
+def wait_until_up(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{base_url} did not start within {timeout}s")
+
+
+def spawn(workers, base_port):
+    servers = []
+    targets = []
+    for offset, (name, command) in enumerate(SPAWN_COMMANDS.items()):
+        port = base_port + offset
+        args = [part.format(workers=workers, port=port) for part in command]
+        servers.append(subprocess.Popen(args, env=os.environ.copy()))
+        targets.append((name, f"http://127.0.0.1:{port}"))
+    for _, base_url in targets:
+        wait_until_up(base_url)
+    return servers, targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", action="append", default=[], metavar="NAME=URL")
+    parser.add_argument("--path", action="append", default=[])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--bust-cache", action="store_true")
+    parser.add_argument("--spawn", action="store_true", help="start gunicorn and uvicorn locally")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    paths = args.path or ["/resources?limit=50"]
+    targets = [tuple(target.split("=", 1)) for target in args.target]
+    servers = []
+    if args.spawn:
+        from dotenv import load_dotenv
+        load_dotenv()
+        servers, spawned = spawn(args.workers, args.port)
+        targets += spawned
+    if not targets:
+        parser.error("pass --target NAME=URL or --spawn")
+
+    try:
+        print(f"{args.concurrency} concurrent clients, {args.duration:.0f}s per path")
+        print(f"{'target':<8} {'path':<32} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for path in paths:
+            for name, base_url in targets:
+                asyncio.run(run(base_url, path, args.concurrency, args.warmup, args.bust_cache))
+                elapsed, latencies, errors = asyncio.run(
+                    run(base_url, path, args.concurrency, args.duration, args.bust_cache))
+                print(f"{name:<8} {path[:32]:<32} {len(latencies) / elapsed:>9.1f} "
+                      f"{statistics.median(latencies) * 1000 if latencies else 0:>8.1f} "
+                      f"{percentile(latencies, 0.99) * 1000:>8.1f} {errors:>7}")
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
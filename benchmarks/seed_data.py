@@ -0,0 +1,175 @@
+"""
+Seeds the local Postgres from .env with benchmark data: users, resources,
+verifications and saves, at any scale from 10k to 1M resources.
+
+Every seeded user is named bench_user_<n> and signs in with BENCH_PASSWORD;
+--reset deletes them first, and with them (ON DELETE CASCADE) everything
+seeded or created by an earlier benchmark run.
+
+    python -m benchmarks.seed_data --resources 100000
+    python -m benchmarks.seed_data --resources 1000000 --users 20000 --reset
+"""
+import argparse
+import time
+
+from dotenv import load_dotenv
+
+# Loaded before the utils imports, which read their settings (BCRYPT_ROUNDS) at import time.
+load_dotenv()
+
+from utils.db_helpers import get_db_connection, release_db_connection
+from utils.password_helpers import hash_password
+
+BENCH_USER_PREFIX = "bench_user_"
+BENCH_PASSWORD = "bench-password"
+# Seeded users only; users signed up during a run share the prefix (so --reset removes them).
+BENCH_USER_PATTERN = f"^{BENCH_USER_PREFIX}[0-9]+$"
+BATCH_SIZE = 100000
+CITIES = ["Austin", "Houston", "Dallas", "Chicago", "Boston", "Seattle", "Denver", "Miami", "Atlanta", "Phoenix"]
+COMMON_WORDS = ["free", "community", "help", "support", "students", "open", "weekly", "local", "center", "services"]
+TOPIC_WORDS = ["food", "bank", "pantry", "meals", "housing", "shelter", "rent", "health", "clinic", "dental",
+               "vision", "tutoring", "library", "scholarship", "counseling", "childcare", "transport", "legal"]
+
+
+def reset(cursor):
+    cursor.execute("DELETE FROM users WHERE username LIKE %s", (BENCH_USER_PREFIX.replace("_", r"\_") + "%",))
+    return cursor.rowcount
+
+
+def seed_users(cursor, count):
+    # One hash for everyone: bcrypt at the configured cost is the slow part of sign-in, not of seeding.
+    cursor.execute(
+        """
+        INSERT INTO users (username, password)
+        SELECT %s || g, %s
+        FROM generate_series(1, %s) g
+        ON CONFLICT (username) DO NOTHING
+        """,
+        (BENCH_USER_PREFIX, hash_password(BENCH_PASSWORD), count),
+    )
+    cursor.execute("SELECT array_agg(id ORDER BY id) FROM users WHERE username ~ %s", (BENCH_USER_PATTERN,))
+    return cursor.fetchone()[0]
+
+
+def seed_resources(cursor, user_ids, start, count):
+    """
+    Resources start + 1 .. start + count: owners round-robin over the users,
+    one per minute back in time, in the cities' bounding box of the US, with
+    titles and descriptions from a small vocabulary so searches match.
+    """
+    cursor.execute(
+        """
+        INSERT INTO resources (created_by, title, description, category, address, city, lat, lng,
+                               requirements, created_at, updated_at)
+        SELECT u.ids[1 + g %% cardinality(u.ids)],
+               initcap(concat_ws(' ', w.c[1 + floor(random() * cardinality(w.c))::int],
+                                      w.t[1 + floor(random() * cardinality(w.t))::int],
+                                      w.t[1 + floor(random() * cardinality(w.t))::int])),
+               concat_ws(' ', w.c[1 + floor(random() * cardinality(w.c))::int],
+                              w.t[1 + floor(random() * cardinality(w.t))::int],
+                              w.c[1 + floor(random() * cardinality(w.c))::int],
+                              w.t[1 + floor(random() * cardinality(w.t))::int]),
+               (ARRAY['Food', 'Housing', 'Health', 'Education'])[1 + g %% 4]::resource_category,
+               g || ' Main St',
+               w.cities[1 + g %% cardinality(w.cities)],
+               round((25 + random() * 24)::numeric, 6),
+               round((-124 + random() * 57)::numeric, 6),
+               CASE WHEN random() < 0.5 THEN 'Student ID required' END,
+               NOW() - g * INTERVAL '1 minute',
+               NOW() - g * INTERVAL '1 minute'
+        FROM generate_series(%s, %s) g,
+             (SELECT %s::int[] AS ids) u,
+             (SELECT %s::text[] AS c, %s::text[] AS t, %s::text[] AS cities) w
+        RETURNING id
+        """,
+        (start + 1, start + count, user_ids, COMMON_WORDS, TOPIC_WORDS, CITIES),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def seed_verifications(cursor, user_ids, resource_ids, per_resource):
+    """
+    0 to 2 * per_resource verifications per resource (per_resource on
+    average), each by a different user.
+    """
+    cursor.execute(
+        """
+        INSERT INTO verifications (resource_id, user_id, status, note, created_at)
+        SELECT r.id,
+               u.ids[1 + (r.id * 7 + k) %% cardinality(u.ids)],
+               (ARRAY['Active', 'Active', 'Active', 'Temporarily Closed', 'No Longer Available',
+                      'Info Needs Update'])[1 + (r.id + k) %% 6]::verification_status,
+               'Seeded by the benchmark',
+               r.created_at + k * INTERVAL '1 hour'
+        FROM unnest(%s::int[]) AS ids(id)
+        JOIN resources r ON r.id = ids.id,
+             (SELECT %s::int[] AS ids) u,
+             generate_series(0, %s) k
+        WHERE k < (r.id::bigint * 2654435761 %% 4294967296) %% (2 * %s + 1)
+          AND k < cardinality(u.ids)
+        ON CONFLICT (resource_id, user_id) DO NOTHING
+        """,
+        (resource_ids, user_ids, 2 * per_resource, per_resource),
+    )
+    return cursor.rowcount
+
+
+def seed_saves(cursor, user_ids, resource_ids, per_user):
+    cursor.execute(
+        """
+        INSERT INTO saves (resource_id, user_id)
+        SELECT r.ids[1 + (u.id * 31 + k * 9973) %% cardinality(r.ids)], u.id
+        FROM unnest(%s::int[]) AS u(id), (SELECT %s::int[] AS ids) r, generate_series(0, %s - 1) k
+        ON CONFLICT (resource_id, user_id) DO NOTHING
+        """,
+        (user_ids, resource_ids, per_user),
+    )
+    return cursor.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resources", type=int, default=10000)
+    parser.add_argument("--users", type=int, help="default: one per 20 resources, at least 50")
+    parser.add_argument("--verifications-per-resource", type=int, default=2)
+    parser.add_argument("--saves-per-user", type=int, default=20)
+    parser.add_argument("--reset", action="store_true", help="delete earlier benchmark users and their data first")
+    args = parser.parse_args()
+    users = args.users or max(50, args.resources // 20)
+
+    connection = get_db_connection()
+    try:
+        cursor = connection.cursor()
+        started = time.perf_counter()
+        if args.reset:
+            print(f"deleted {reset(cursor)} benchmark users and their data")
+        user_ids = seed_users(cursor, users)
+        connection.commit()
+        print(f"{len(user_ids)} users")
+
+        verifications = 0
+        resource_ids = []
+        for start in range(0, args.resources, BATCH_SIZE):
+            batch = seed_resources(cursor, user_ids, start, min(BATCH_SIZE, args.resources - start))
+            verifications += seed_verifications(cursor, user_ids, batch, args.verifications_per_resource)
+            connection.commit()
+            resource_ids += batch
+            print(f"{len(resource_ids)} resources, {verifications} verifications "
+                  f"({time.perf_counter() - started:.0f}s)")
+
+        saves = seed_saves(cursor, user_ids, resource_ids, args.saves_per_user)
+        connection.commit()
+        print(f"{saves} saves")
+
+        # Fresh statistics, so the first benchmark run gets the same plans as later ones.
+        for table in ("users", "resources", "verifications", "resource_verification_summary", "saves", "resource_changes",
+                      "resource_cluster_cells"):
+            cursor.execute(f"ANALYZE {table}")
+        connection.commit()
+        print(f"done in {time.perf_counter() - started:.0f}s")
+    finally:
+        release_db_connection(connection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+The app with Mapbox stubbed out, for benchmarks: geocoding answers
+deterministic coordinates (inside the US) after BENCH_GEOCODE_MS of
+simulated latency, so runs neither need a token nor depend on Mapbox.
+
+    gunicorn benchmarks.stub_app:app --workers 4
+    uvicorn benchmarks.stub_app:asgi_app --workers 4
+"""
+import hashlib
+import os
+import time
+
+from app import app
+from asgi import app as asgi_app
+from utils.mapbox_helpers import set_geocoder
+
+GEOCODE_LATENCY = float(os.getenv("BENCH_GEOCODE_MS", "0")) / 1000
+
+
+def stub_geocode(address, city):
+    if GEOCODE_LATENCY:
+        time.sleep(GEOCODE_LATENCY)
+    digest = hashlib.sha256(f"{address}|{city}".lower().encode("utf-8")).digest()
+    lat = 25 + int.from_bytes(digest[:4], "big") / 2 ** 32 * 24
+    lng = -124 + int.from_bytes(digest[4:8], "big") / 2 ** 32 * 57
+    return round(lat, 6), round(lng, 6)
+
+
+set_geocoder(stub_geocode)
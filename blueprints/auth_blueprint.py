@@ -1,52 +1,88 @@
-import os
-import jwt
-import bcrypt
+import logging
 import psycopg2
 import psycopg2.extras
-from flask import Blueprint, jsonify, request
-from utils.db_helpers import get_db_connection
+from flask import Blueprint, jsonify, request, g
+from middleware.auth_middleware import token_required, create_token, revoke_token, set_revocation_loader
+from utils.db_helpers import get_db_connection, release_db_connection
+from utils.password_helpers import hash_password, check_password, needs_rehash, PasswordHasherBusy
+from utils.rate_limit import rate_limited
 
 
+logger = logging.getLogger(__name__)
+
 authentication_blueprint = Blueprint('authentication_blueprint', __name__)
 
 
+def load_revoked_jtis():
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        cursor.execute("SELECT jti FROM revoked_tokens WHERE expires_at > NOW();")
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        if connection:
+            release_db_connection(connection)
+
+
+set_revocation_loader(load_revoked_jtis)
+
+
+def busy_response(error):
+    return jsonify({"err": str(error)}), 503, {"Retry-After": "1"}
+
+
 @authentication_blueprint.route('/auth/sign-up', methods=['POST'])
+@rate_limited("sign_up", by="ip")
 def sign_up():
     connection = None
     try:
         new_user_data = request.get_json()
+        # A taken username is turned away before it costs a bcrypt slot.
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        cursor.execute("SELECT 1 FROM users WHERE username = %s", (new_user_data["username"],))
+        if cursor.fetchone() is not None:
+            return jsonify({"err": "Username already taken"}), 400
+        connection.rollback()
+        release_db_connection(connection)
+        connection = None
+
+        # Hashed without holding a connection; the insert still catches a race for the name.
+        hashed_password = hash_password(new_user_data["password"])
+
         connection = get_db_connection()
         cursor = connection.cursor(
             cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute("SELECT * FROM users WHERE username = %s;",
-                       (new_user_data["username"],))
-        existing_user = cursor.fetchone()
-        if existing_user:
-            cursor.close()
-            return jsonify({"err": "Username already taken"}), 400
-        hashed_password = bcrypt.hashpw(
-            bytes(new_user_data["password"], 'utf-8'), bcrypt.gensalt())
-        cursor.execute("INSERT INTO users (username, password) VALUES (%s, %s) RETURNING id, username",
-                       (new_user_data["username"], hashed_password.decode('utf-8')))
+        cursor.execute("""
+            INSERT INTO users (username, password) VALUES (%s, %s)
+            ON CONFLICT (username) DO NOTHING
+            RETURNING id, username
+            """, (new_user_data["username"], hashed_password))
         created_user = cursor.fetchone()
+        if created_user is None:
+            return jsonify({"err": "Username already taken"}), 400
         connection.commit()
 
         payload = {
             "username": created_user["username"], "id": created_user["id"]}
 
-        token = jwt.encode({"payload": payload}, os.getenv('JWT_SECRET'))
+        token = create_token(payload)
 
         return jsonify({"token": token}), 201
+    except PasswordHasherBusy as error:
+        return busy_response(error)
     except Exception as error:
         if connection:
             connection.rollback()
         return jsonify({"error": str(error)}), 500
     finally:
         if connection:
-            connection.close()
+            release_db_connection(connection)
 
 
 @authentication_blueprint.route('/auth/sign-in', methods=["POST"])
+@rate_limited("sign_in", by="ip")
 def sign_in():
     connection = None
     try:
@@ -54,24 +90,86 @@ def sign_in():
         connection = get_db_connection()
         cursor = connection.cursor(
             cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute("SELECT * FROM users WHERE username = %s;",
+        cursor.execute("SELECT id, username, password FROM users WHERE username = %s;",
                        (sign_in_form_data["username"],))
         existing_user = cursor.fetchone()
+        # Give the connection back while bcrypt runs.
+        release_db_connection(connection)
+        connection = None
+
         if existing_user is None:
             return jsonify({"err": "Invalid credentials."}), 401
-        password_is_valid = bcrypt.checkpw(bytes(
-            sign_in_form_data["password"], 'utf-8'), bytes(existing_user["password"], 'utf-8'))
+        password_is_valid = check_password(
+            sign_in_form_data["password"], existing_user["password"])
         if not password_is_valid:
             return jsonify({"err": "Invalid credentials."}), 401
 
+        if needs_rehash(existing_user["password"]):
+            upgrade_password_hash(existing_user, sign_in_form_data["password"])
+
         payload = {
             "username": existing_user["username"], "id": existing_user["id"]}
 
-        token = jwt.encode({"payload": payload}, os.getenv('JWT_SECRET'))
+        token = create_token(payload)
 
         return jsonify({"token": token}), 200
+    except PasswordHasherBusy as error:
+        return busy_response(error)
+    except Exception as err:
+        return jsonify({"err": str(err)}), 500
+    finally:
+        if connection:
+            release_db_connection(connection)
+
+
+def upgrade_password_hash(user, password):
+    """
+    Re-hashes with the current BCRYPT_ROUNDS after a successful sign-in.
+    Best effort: a failure here must not fail the sign-in.
+    """
+    connection = None
+    try:
+        new_hash = hash_password(password)
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        cursor.execute(
+            "UPDATE users SET password = %s WHERE id = %s AND password = %s;",
+            (new_hash, user["id"], user["password"]),
+        )
+        connection.commit()
+    except Exception as error:
+        logger.warning("Password hash upgrade skipped: %s", error)
+        if connection:
+            connection.rollback()
+    finally:
+        if connection:
+            release_db_connection(connection)
+
+
+@authentication_blueprint.route('/auth/sign-out', methods=["POST"])
+@token_required
+def sign_out():
+    if "jti" not in g.token:
+        return jsonify({"err": "This token cannot be revoked, sign in again to get one that can"}), 400
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            INSERT INTO revoked_tokens (jti, expires_at)
+            VALUES (%s, to_timestamp(%s))
+            ON CONFLICT (jti) DO NOTHING
+            """,
+            (g.token["jti"], g.token["exp"]),
+        )
+        connection.commit()
+        revoke_token(g.token["jti"])
+        return jsonify({"message": "Signed out"}), 200
     except Exception as err:
+        if connection:
+            connection.rollback()
         return jsonify({"err": str(err)}), 500
     finally:
         if connection:
-            connection.close()
\ No newline at end of file
+            release_db_connection(connection)
@@ -1,16 +1,41 @@
-from flask import Blueprint, jsonify, request, g
+import os
+from functools import partial
+from flask import Blueprint, Response, jsonify, request, g
 import psycopg2, psycopg2.extras
+import jwt
+
+
+from middleware.auth_middleware import token_required, optional_user
+from utils.db_helpers import get_db_connection, release_db_connection, consolidate_verifications_in_resources
+from utils.mapbox_helpers import geocode_address, geocode_addresses
+from utils.geocode_jobs import geocode_async_requested
+from utils.resource_helpers import validate_resource_fields, iter_import_records
+from utils.pagination_helpers import next_page_headers
+from utils.json_helpers import wants_ndjson, streamed_json_response, json_list_response, STREAM_BATCH_SIZE
+from utils.resource_queries import index_query, saved_requested, nearby_query, search_query, paginate, SHOW_RESOURCE_SQL, MY_SAVES_SQL
+from utils.response_cache import response_cache, cached_index_response, cached_clusters_response, cached_resource_response
+from utils.etag_helpers import conditional_response, catalog_version, resource_version
+from utils.rate_limit import rate_limited
+from utils import data_access
+from utils.resource_rows import iter_resources
+from utils.clusters import parse_clusters_args, clusters_query
+from utils.change_feed import parse_changes_args, read_changes, maybe_expire_tombstones, SyncExpired
+from utils.resource_events import (
+    publish, publish_deleted, parse_stream_filter, open_stream, StreamFull, STREAM_HEADERS,
+)
+from utils.saves_helpers import (
+    fetch_saved_ids, encode_saved_ids, parse_saves_batch, apply_saves_batch, CREATE_SAVE_SQL,
+)
 
+resources_blueprint = Blueprint('resources_blueprint', __name__)
 
-from middleware.auth_middleware import token_required
-from utils.db_helpers import get_db_connection, consolidate_verifications_in_resources
-from utils.mapbox_helpers import geocode_address
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "10000"))
 
-resources_blueprint = Blueprint('resources_blueprint', __name__)
 
 # POST /resources
 @resources_blueprint.route("/resources", methods=["POST"])
 @token_required
+@rate_limited("resource_writes")
 def create_resource():
     connection = None
     try:
@@ -18,71 +43,132 @@ def create_resource():
 
         creator_id = g.user["id"]
 
-        required = ["title", "category", "address", "city"]
-        missing = [field for field in required if not new_resource.get(field)]
-        if missing:
-            return jsonify({"error": f"Missing required fields: {', '.join(missing)}"}), 400
-        
-        allowed_categories = ["Food", "Housing", "Health", "Education"]
-        if new_resource["category"] not in allowed_categories:
-            return jsonify({"error": "Invalid category"}), 400
+        invalid = validate_resource_fields(new_resource)
+        if invalid:
+            return jsonify({"error": invalid}), 400
 
         # --- Geocoding en BACKEND (Mapbox) ---
-        coords = geocode_address(new_resource["address"], new_resource["city"])
-        if coords is None:
-            return jsonify({"error": "Address not found"}), 400
-        lat, lng = coords
+        # In async mode the row is stored as pending and geocode_worker.py fills in lat/lng.
+        geocode_async = geocode_async_requested(request.args)
+        if geocode_async:
+            lat, lng, geocode_status = None, None, "pending"
+        else:
+            coords = geocode_address(new_resource["address"], new_resource["city"])
+            if coords is None:
+                return jsonify({"error": "Address not found"}), 400
+            lat, lng = coords
+            geocode_status = "resolved"
 
         connection = get_db_connection()
         cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute(
-            """
-            INSERT INTO resources (created_by, title, description, category, address, city, lat, lng, requirements)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-            """,
-            (
-                creator_id,
-                new_resource["title"],
-                new_resource.get("description"),
-                new_resource["category"],
-                new_resource["address"],
-                new_resource["city"],
-                lat,
-                lng,
-                new_resource.get("requirements"),
-            ),
-        )
+        created_resource = data_access.create_resource(cursor, creator_id, new_resource, lat, lng, geocode_status)
+        publish(cursor, "resource.created", [created_resource["id"]])
+        connection.commit()
+        response_cache.invalidate_index()
+        return jsonify(created_resource), 202 if geocode_async else 201
 
-        resource_id = cursor.fetchone()["id"]
+    except Exception as error:
+        if connection:
+            connection.rollback()
+        return jsonify({"error": str(error)}), 500
+    finally:
+        if connection:
+            release_db_connection(connection)
 
-        cursor.execute(
-            """
-            SELECT r.id,
-                   r.created_by AS resource_author_id,
-                   r.title,
-                   r.description,
-                   r.category,
-                   r.address,
-                   r.city,
-                   r.lat,
-                   r.lng,
-                   r.requirements,
-                   r.hidden_reason,
-                   r.hidden_at,
-                   r.created_at AS "createdAt",
-                   r.updated_at AS "updatedAt",
-                   u.username AS author_username
-            FROM resources r
-            JOIN users u ON r.created_by = u.id
-            WHERE r.id = %s
-            """,
-            (resource_id,),
-        )
 
-        created_resource = cursor.fetchone()
-        connection.commit()
-        return jsonify(created_resource), 201
+# POST /resources/bulk
+@resources_blueprint.route("/resources/bulk", methods=["POST"])
+@token_required
+@rate_limited("bulk_import")
+def bulk_create_resources():
+    connection = None
+    try:
+        creator_id = g.user["id"]
+        geocode_async = geocode_async_requested(request.args)
+
+        # Rows are validated as they are read; only valid ones are kept.
+        results = []
+        valid_rows = []
+        try:
+            for row_number, record, error in iter_import_records(request.stream, request.content_type):
+                if row_number > BULK_IMPORT_MAX_ROWS:
+                    return jsonify({"error": f"Bulk imports are limited to {BULK_IMPORT_MAX_ROWS} rows"}), 413
+                if error:
+                    results.append({"row": row_number, "status": "error", "error": error})
+                else:
+                    valid_rows.append((row_number, record))
+        except ValueError as error:
+            return jsonify({"error": str(error)}), 400
+
+        if geocode_async:
+            coords_list = [None] * len(valid_rows)
+        else:
+            coords_list = geocode_addresses([(record["address"], record["city"]) for _, record in valid_rows])
+
+        to_insert = []
+        for (row_number, record), coords in zip(valid_rows, coords_list):
+            if geocode_async or isinstance(coords, Exception):
+                # Mapbox failed for the row (not "not found"): geocode_worker.py retries it.
+                to_insert.append((row_number, record, None, None, "pending"))
+            elif coords is None:
+                results.append({"row": row_number, "status": "error", "error": "Address not found"})
+            else:
+                to_insert.append((row_number, record, coords[0], coords[1], "resolved"))
+
+        if to_insert:
+            connection = get_db_connection()
+            cursor = connection.cursor()
+            inserted = psycopg2.extras.execute_values(
+                cursor,
+                """
+                INSERT INTO resources (created_by, title, description, category, address, city, lat, lng, requirements, geocode_status)
+                VALUES %s
+                RETURNING id
+                """,
+                [
+                    (
+                        creator_id,
+                        record["title"],
+                        record.get("description"),
+                        record["category"],
+                        record["address"],
+                        record["city"],
+                        lat,
+                        lng,
+                        record.get("requirements"),
+                        geocode_status,
+                    )
+                    for _, record, lat, lng, geocode_status in to_insert
+                ],
+                page_size=1000,
+                fetch=True,
+            )
+            jobs = [
+                resource for (*_, geocode_status), resource in zip(to_insert, inserted)
+                if geocode_status == "pending"
+            ]
+            if jobs:
+                psycopg2.extras.execute_values(
+                    cursor,
+                    "INSERT INTO geocode_jobs (resource_id) VALUES %s",
+                    jobs,
+                    page_size=1000,
+                )
+            publish(cursor, "resource.created", [resource_id for (resource_id,) in inserted])
+            connection.commit()
+            response_cache.invalidate_index()
+
+            for (row_number, *_, geocode_status), (resource_id,) in zip(to_insert, inserted):
+                results.append({"row": row_number, "status": "created", "id": resource_id,
+                                "geocode_status": geocode_status})
+
+        results.sort(key=lambda result: result["row"])
+        created = len(to_insert)
+        return jsonify({
+            "created": created,
+            "failed": len(results) - created,
+            "results": results,
+        }), 201 if created else 400
 
     except Exception as error:
         if connection:
@@ -90,209 +176,319 @@ def create_resource():
         return jsonify({"error": str(error)}), 500
     finally:
         if connection:
-            connection.close()
+            release_db_connection(connection)
+
+
+def saved_listing_user():
+    """
+    (user, None) for a ?saved=true listing, or (None, 401 response) when
+    the request has no valid token.
+    """
+    try:
+        user = optional_user()
+    except jwt.InvalidTokenError as error:
+        return None, (jsonify({"err": str(error)}), 401)
+    if user is None:
+        return None, (jsonify({"err": "Unauthorized"}), 401)
+    return user, None
 
 
 # GET /resources
 @resources_blueprint.route("/resources", methods=["GET"])
+@conditional_response(catalog_version)
+@cached_index_response
 def resources_index():
+    connection = None
+    streaming = False
+    try:
+        try:
+            query, params, limit = index_query(request.args)
+            saved = saved_requested(request.args)
+        except ValueError as error:
+            return jsonify({"error": str(error)}), 400
+        if saved:
+            user, unauthorized = saved_listing_user()
+            if unauthorized:
+                return unauthorized
+        ndjson = wants_ndjson(request.headers.get("Accept"))
+
+        connection = get_db_connection()
+        saved_ids = set(fetch_saved_ids(connection, user["id"])) if saved else None
+        if limit is None:
+            # Unpaginated: stream the whole catalogue from a server-side cursor,
+            # STREAM_BATCH_SIZE rows per round trip. The connection is released
+            # once the response has been sent.
+            cursor = connection.cursor(name="resources_index")
+            cursor.itersize = STREAM_BATCH_SIZE
+            cursor.execute(query, params)
+            response = streamed_json_response(iter_resources(cursor, saved_ids), ndjson, {"Vary": "Accept"})
+            response.call_on_close(partial(release_db_connection, connection))
+            streaming = True
+            return response
+
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+
+        consolidated, next_cursor = paginate(list(iter_resources(cursor, saved_ids)), limit)
+
+        headers = next_page_headers(request.base_url, request.args, next_cursor)
+        headers["Vary"] = "Accept"
+        return json_list_response(consolidated, ndjson, headers)
+
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+    finally:
+        if connection and not streaming:
+            release_db_connection(connection)
+
+
+# GET /resources/nearby?lat=&lng=&radius=
+@resources_blueprint.route("/resources/nearby", methods=["GET"])
+@conditional_response(catalog_version)
+def resources_nearby():
+    connection = None
+    try:
+        try:
+            query, params = nearby_query(request.args)
+            saved = saved_requested(request.args)
+        except ValueError as error:
+            return jsonify({"error": str(error)}), 400
+        if saved:
+            user, unauthorized = saved_listing_user()
+            if unauthorized:
+                return unauthorized
+
+        connection = get_db_connection()
+        saved_ids = set(fetch_saved_ids(connection, user["id"])) if saved else None
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+
+        nearby = list(iter_resources(cursor, saved_ids))
+        return jsonify(nearby), 200
+
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+    finally:
+        if connection:
+            release_db_connection(connection)
+
+
+# GET /resources/search?q=
+@resources_blueprint.route("/resources/search", methods=["GET"])
+@conditional_response(catalog_version)
+def search_resources():
+    connection = None
+    try:
+        try:
+            query, params, limit = search_query(request.args)
+            saved = saved_requested(request.args)
+        except ValueError as error:
+            return jsonify({"error": str(error)}), 400
+        if saved:
+            user, unauthorized = saved_listing_user()
+            if unauthorized:
+                return unauthorized
+
+        connection = get_db_connection()
+        saved_ids = set(fetch_saved_ids(connection, user["id"])) if saved else None
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+
+        ranked, next_cursor = paginate(list(iter_resources(cursor, saved_ids)), limit, cursor_fields=("rank", "id"))
+
+        headers = next_page_headers(request.base_url, request.args, next_cursor)
+        return jsonify(ranked), 200, headers
+
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+    finally:
+        if connection:
+            release_db_connection(connection)
+
+
+# GET /resources/clusters?bbox=&zoom=
+@resources_blueprint.route("/resources/clusters", methods=["GET"])
+@conditional_response(catalog_version)
+@cached_clusters_response
+def resource_clusters():
     connection = None
     try:
+        try:
+            zoom, tiles, category = parse_clusters_args(request.args)
+        except ValueError as error:
+            return jsonify({"error": str(error)}), 400
+
         connection = get_db_connection()
         cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute(*clusters_query(zoom, tiles, category))
+        min_x, max_x, min_y, max_y = tiles
+        return jsonify({
+            "zoom": zoom,
+            "tiles": {"min_x": min_x, "max_x": max_x, "min_y": min_y, "max_y": max_y},
+            "clusters": cursor.fetchall(),
+        }), 200
 
-        cursor.execute(
-            """
-            SELECT r.id,
-                   r.created_by AS resource_author_id,
-                   r.title,
-                   r.description,
-                   r.category,
-                   r.address,
-                   r.city,
-                   r.lat,
-                   r.lng,
-                   r.requirements,
-                   r.hidden_reason,
-                   r.hidden_at,
-                   r.created_at AS "createdAt",
-                   r.updated_at AS "updatedAt",
-                   u.username AS author_username,
-
-                   v.id AS verification_id,
-                   v.status AS verification_status,
-                   v.note AS verification_note,
-                   v.created_at AS "verificationCreatedAt",
-                   u_v.username AS verification_author_username,
-                   v.user_id AS verification_author_id
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+    finally:
+        if connection:
+            release_db_connection(connection)
 
-            FROM resources r
-            INNER JOIN users u ON r.created_by = u.id
-            LEFT JOIN verifications v ON r.id = v.resource_id
-            LEFT JOIN users u_v ON v.user_id = u_v.id
-            ORDER BY r.created_at DESC, v.created_at DESC
-            """
-        )
-        rows = cursor.fetchall()
 
-        consolidated = consolidate_verifications_in_resources(rows)
-        return jsonify(consolidated), 200
+# GET /resources/changes?since=
+@resources_blueprint.route("/resources/changes", methods=["GET"])
+def resource_changes():
+    connection = None
+    try:
+        try:
+            position, limit = parse_changes_args(request.args)
+        except ValueError as error:
+            return jsonify({"error": str(error)}), 400
+
+        connection = get_db_connection()
+        try:
+            changes = read_changes(connection, position, limit)
+        except SyncExpired as error:
+            return jsonify({"error": str(error)}), 410
+        connection.commit()
+        maybe_expire_tombstones(connection)
+        return jsonify(changes), 200
 
     except Exception as error:
+        if connection:
+            connection.rollback()
         return jsonify({"error": str(error)}), 500
     finally:
         if connection:
-            connection.close()
+            release_db_connection(connection)
+
+
+# GET /resources/stream
+@resources_blueprint.route("/resources/stream", methods=["GET"])
+def resource_stream():
+    # Holds a worker thread for as long as the client stays connected;
+    # uvicorn asgi:app serves this route on the event loop instead. A sync
+    # worker (gunicorn's default) would be held whole and killed by its timeout.
+    if not request.environ.get("wsgi.multithread"):
+        return jsonify({"error": "Streams are not served by single-threaded workers; use uvicorn asgi:app"}), 503
+    try:
+        event_filter = parse_stream_filter(request.args)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    try:
+        subscription, chunks = open_stream(event_filter)
+    except StreamFull as error:
+        return jsonify({"error": str(error)}), 503
+
+    response = Response(chunks, 200, STREAM_HEADERS)
+    response.call_on_close(subscription.close)
+    return response
 
 
 # GET /resources/resource_id
 @resources_blueprint.route("/resources/<int:resource_id>", methods=["GET"])
+@conditional_response(resource_version)
+@cached_resource_response
 def show_resource(resource_id):
     connection = None
     try:
         connection = get_db_connection()
         cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute(SHOW_RESOURCE_SQL, (resource_id,))
+
+        rows = cursor.fetchall()
+        if not rows:
+            return jsonify({"error": "Resource not found"}), 404
+
+        processed = consolidate_verifications_in_resources(rows)[0]
+        return jsonify(processed), 200
+
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
+    finally:
+        if connection:
+            release_db_connection(connection)
+
+
 
+# GET /resources/resource_id/geocode
+@resources_blueprint.route("/resources/<int:resource_id>/geocode", methods=["GET"])
+def show_geocode_status(resource_id):
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cursor.execute(
             """
-            SELECT r.id,
-                   r.created_by AS resource_author_id,
-                   r.title,
-                   r.description,
-                   r.category,
-                   r.address,
-                   r.city,
+            SELECT r.id AS resource_id,
+                   r.geocode_status,
                    r.lat,
                    r.lng,
-                   r.requirements,
-                   r.hidden_reason,
-                   r.hidden_at,
-                   r.created_at AS "createdAt",
-                   r.updated_at AS "updatedAt",
-                   u.username AS author_username,
-
-                   v.id AS verification_id,
-                   v.status AS verification_status,
-                   v.note AS verification_note,
-                   v.created_at AS "verificationCreatedAt",
-                   u_v.username AS verification_author_username,
-                   v.user_id AS verification_author_id
-
+                   j.attempts,
+                   j.next_attempt_at AS "nextAttemptAt",
+                   j.last_error
             FROM resources r
-            INNER JOIN users u ON r.created_by = u.id
-            LEFT JOIN verifications v ON r.id = v.resource_id
-            LEFT JOIN users u_v ON v.user_id = u_v.id
+            LEFT JOIN geocode_jobs j ON j.resource_id = r.id
             WHERE r.id = %s
-            ORDER BY v.created_at DESC
             """,
             (resource_id,),
         )
-
-        rows = cursor.fetchall()
-        if not rows:
+        status = cursor.fetchone()
+        if status is None:
             return jsonify({"error": "Resource not found"}), 404
-
-        processed = consolidate_verifications_in_resources(rows)[0]
-        return jsonify(processed), 200
+        return jsonify(status), 200
 
     except Exception as error:
         return jsonify({"error": str(error)}), 500
     finally:
         if connection:
-            connection.close()
-
+            release_db_connection(connection)
 
 
 # PUT /resources/:id
 @resources_blueprint.route("/resources/<int:resource_id>", methods=["PUT"])
 @token_required
+@rate_limited("resource_writes")
 def update_resource(resource_id):
     connection = None
     try:
         updated = request.get_json() or {}
         
-        required = ["title", "category", "address", "city"]
-        missing = [field for field in required if not updated.get(field)]
-        if missing:
-            return jsonify({"error": f"Missing required fields: {', '.join(missing)}"}), 400
-        
-        allowed_categories = ["Food", "Housing", "Health", "Education"]
-        if updated["category"] not in allowed_categories:
-            return jsonify({"error": "Invalid category"}), 400
+        invalid = validate_resource_fields(updated)
+        if invalid:
+            return jsonify({"error": invalid}), 400
 
+        # Async mode passes "pending" up front; sync mode only geocodes once
+        # the update has reported that the location changed.
+        geocode_async = geocode_async_requested(request.args)
         connection = get_db_connection()
         cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        cursor.execute("SELECT * FROM resources WHERE id = %s", (resource_id,))
-        resource_to_update = cursor.fetchone()
-        if resource_to_update is None:
+        result = data_access.update_resource(
+            cursor, resource_id, g.user["id"], updated, geocode_status="pending" if geocode_async else None
+        )
+        if result is None:
             return jsonify({"error": "Resource not found"}), 404
 
-        if resource_to_update["created_by"] != g.user["id"]:
+        owner_id, same_location, updated_resource = result
+        if owner_id != g.user["id"]:
             return jsonify({"error": "Unauthorized"}), 401
-        
-        # --- Geocoding (Mapbox)
-        coords = geocode_address(updated["address"], updated["city"])
-        if coords is None:
-            return jsonify({"error": "Address not found"}), 400
-        lat, lng = coords
-
-        cursor.execute(
-            """
-            UPDATE resources
-            SET title = %s,
-                description = %s,
-                category = %s,
-                address = %s,
-                city = %s,
-                lat = %s,
-                lng = %s,
-                requirements = %s,
-                updated_at = NOW()
-            WHERE id = %s
-            RETURNING id
-            """,
-            (
-                updated["title"],
-                updated.get("description"),
-                updated["category"],
-                updated["address"],
-                updated["city"],
-                lat,
-                lng,
-                updated.get("requirements"),
-                resource_id,
-            ),
-        )
-        updated_id = cursor.fetchone()["id"]
-
-        cursor.execute(
-            """
-            SELECT r.id,
-                   r.created_by AS resource_author_id,
-                   r.title,
-                   r.description,
-                   r.category,
-                   r.address,
-                   r.city,
-                   r.lat,
-                   r.lng,
-                   r.requirements,
-                   r.hidden_reason,
-                   r.hidden_at,
-                   r.created_at AS "createdAt",
-                   r.updated_at AS "updatedAt",
-                   u.username AS author_username
-            FROM resources r
-            JOIN users u ON r.created_by = u.id
-            WHERE r.id = %s
-            """,
-            (updated_id,),
-        )
-        updated_resource = cursor.fetchone()
 
+        if updated_resource is None:
+            # --- Geocoding (Mapbox), only when the location actually changed
+            coords = geocode_address(updated["address"], updated["city"])
+            if coords is None:
+                return jsonify({"error": "Address not found"}), 400
+            result = data_access.update_resource(cursor, resource_id, g.user["id"], updated, *coords, "resolved")
+            if result is None:
+                return jsonify({"error": "Resource not found"}), 404
+            _, same_location, updated_resource = result
+            if updated_resource is None:
+                return jsonify({"error": "Unauthorized"}), 401
+
+        publish(cursor, "resource.updated", [resource_id])
         connection.commit()
-        return jsonify(updated_resource), 200
+        response_cache.invalidate_resource(resource_id)
+        return jsonify(updated_resource), 202 if geocode_async and not same_location else 200
 
     except Exception as error:
         if connection:
@@ -300,7 +496,7 @@ def update_resource(resource_id):
         return jsonify({"error": str(error)}), 500
     finally:
         if connection:
-            connection.close()
+            release_db_connection(connection)
 
 
 # POST /resources/resource_id/saves
@@ -313,29 +509,17 @@ def create_save(resource_id):
         connection = get_db_connection()
         cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
-        cursor.execute("SELECT id FROM resources WHERE id = %s", (resource_id,))
-        resource = cursor.fetchone()
-        if resource is None:
-            return jsonify({"error": "Resource not found"}), 404
-
-        cursor.execute(
-            """
-            INSERT INTO saves (resource_id, user_id)
-            VALUES (%s, %s)
-            ON CONFLICT (resource_id, user_id) DO NOTHING
-            RETURNING id
-            """,
-            (resource_id, user_id),
-        )
-
+        cursor.execute(CREATE_SAVE_SQL, {"resource_id": resource_id, "user_id": user_id})
         inserted = cursor.fetchone()
         connection.commit()
+        if inserted is None:
+            return jsonify({"error": "Resource not found"}), 404
 
         return jsonify({
             "saved": True,
             "resource_id": resource_id,
             "user_id": user_id,
-            "save_id": inserted["id"] if inserted else None
+            "save_id": inserted["save_id"]
         }), 201
 
     except Exception as error:
@@ -344,7 +528,7 @@ def create_save(resource_id):
         return jsonify({"error": str(error)}), 500
     finally:
         if connection:
-            connection.close()
+            release_db_connection(connection)
 
 
 # GET /saves
@@ -352,48 +536,77 @@ def create_save(resource_id):
 @token_required
 def my_saves_index():
     connection = None
+    streaming = False
     try:
         user_id = g.user["id"]
         connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor = connection.cursor(name="my_saves_index", cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.itersize = STREAM_BATCH_SIZE
 
-        cursor.execute(
-            """
-            SELECT r.id,
-                   r.created_by AS resource_author_id,
-                   r.title,
-                   r.description,
-                   r.category,
-                   r.address,
-                   r.city,
-                   r.lat,
-                   r.lng,
-                   r.requirements,
-                   r.hidden_reason,
-                   r.hidden_at,
-                   r.created_at AS "createdAt",
-                   r.updated_at AS "updatedAt",
-                   u.username AS author_username,
-                   s.created_at AS "savedAt"
-            FROM saves s
-            JOIN resources r ON s.resource_id = r.id
-            JOIN users u ON r.created_by = u.id
-            WHERE s.user_id = %s
-            ORDER BY s.created_at DESC
-            """,
-            (user_id,),
-        )
+        cursor.execute(MY_SAVES_SQL, (user_id,))
 
-        rows = cursor.fetchall()
-        return jsonify(rows), 200
+        response = streamed_json_response(cursor, wants_ndjson(request.headers.get("Accept")), {"Vary": "Accept"})
+        response.call_on_close(partial(release_db_connection, connection))
+        streaming = True
+        return response
 
     except Exception as error:
         if connection:
             connection.rollback()
         return jsonify({"error": str(error)}), 500
+    finally:
+        if connection and not streaming:
+            release_db_connection(connection)
+
+
+# GET /saves/ids?format=bitmap
+@resources_blueprint.route("/saves/ids", methods=["GET"])
+@token_required
+def my_saved_ids():
+    connection = None
+    try:
+        output = request.args.get("format", "list")
+        if output not in ("list", "bitmap"):
+            return jsonify({"error": "format must be list or bitmap"}), 400
+
+        connection = get_db_connection()
+        ids = fetch_saved_ids(connection, g.user["id"])
+        connection.commit()
+
+        return jsonify(encode_saved_ids(ids, output)), 200
+
+    except Exception as error:
+        return jsonify({"error": str(error)}), 500
     finally:
         if connection:
-            connection.close()
+            release_db_connection(connection)
+
+
+# POST /saves/batch
+@resources_blueprint.route("/saves/batch", methods=["POST"])
+@token_required
+def batch_saves():
+    connection = None
+    try:
+        try:
+            save, unsave = parse_saves_batch(request.get_json(silent=True))
+        except ValueError as error:
+            return jsonify({"error": str(error)}), 400
+
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        added, removed = apply_saves_batch(cursor, g.user["id"], save, unsave)
+        connection.commit()
+
+        return jsonify({"added": added, "removed": removed}), 200
+
+    except Exception as error:
+        if connection:
+            connection.rollback()
+        return jsonify({"error": str(error)}), 500
+    finally:
+        if connection:
+            release_db_connection(connection)
 
 
 # DELETE /resources/resource_id/saves
@@ -431,7 +644,7 @@ def delete_save(resource_id):
         return jsonify({"error": str(error)}), 500
     finally:
         if connection:
-            connection.close()
+            release_db_connection(connection)
 
 
 @resources_blueprint.route("/resources/<int:resource_id>", methods=["DELETE"])
@@ -442,17 +655,17 @@ def delete_resource(resource_id):
         connection = get_db_connection()
         cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
-        cursor.execute("SELECT * FROM resources WHERE id = %s", (resource_id,))
-        resource_to_delete = cursor.fetchone()
-        if resource_to_delete is None:
+        result = data_access.delete_resource(cursor, resource_id, g.user["id"])
+        if result is None:
             return jsonify({"error": "Resource not found"}), 404
 
-        if resource_to_delete["created_by"] != g.user["id"]:
+        owner_id, resource_to_delete = result
+        if owner_id != g.user["id"]:
             return jsonify({"error": "Unauthorized"}), 401
 
-        cursor.execute("DELETE FROM resources WHERE id = %s", (resource_id,))
-
+        publish_deleted(cursor, resource_to_delete)
         connection.commit()
+        response_cache.invalidate_resource(resource_id)
         return jsonify(resource_to_delete), 200
 
     except Exception as error:
@@ -461,4 +674,4 @@ def delete_resource(resource_id):
         return jsonify({"error": str(error)}), 500
     finally:
         if connection:
-            connection.close()
\ No newline at end of file
+            release_db_connection(connection)
\ No newline at end of file
@@ -2,7 +2,7 @@ from flask import Blueprint
 from middleware.auth_middleware import token_required
 import psycopg2.extras
 from flask import jsonify, g
-from utils.db_helpers import get_db_connection
+from utils.db_helpers import get_db_connection, release_db_connection
 
 users_blueprint = Blueprint("users_blueprint", __name__)
 
@@ -18,7 +18,7 @@ def users_index():
         return jsonify(users), 200
     finally:
         if connection:
-            connection.close()
+            release_db_connection(connection)
 
 
 @users_blueprint.route("/users/<int:user_id>", methods=["GET"])
@@ -38,4 +38,4 @@ def users_show(user_id):
         return jsonify(user), 200
     finally:
         if connection:
-            connection.close()
\ No newline at end of file
+            release_db_connection(connection)
\ No newline at end of file
@@ -1,13 +1,18 @@
 from flask import Blueprint, jsonify, request, g
-from utils.db_helpers import get_db_connection
+from utils.db_helpers import get_db_connection, release_db_connection
 import psycopg2.extras
 from middleware.auth_middleware import token_required
+from utils.response_cache import response_cache
+from utils.rate_limit import rate_limited
+from utils import data_access
+from utils.resource_events import publish
 
 verifications_blueprint = Blueprint("verifications_blueprint", __name__)
 
 # POST /resources/resource_id/verifications
 @verifications_blueprint.route("/resources/<int:resource_id>/verifications", methods=["POST"])
 @token_required
+@rate_limited("verification_writes")
 def create_verification(resource_id):
     connection = None
     try:
@@ -31,39 +36,11 @@ def create_verification(resource_id):
         connection = get_db_connection()
         cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
-        cursor.execute(
-            """
-            INSERT INTO verifications (resource_id, user_id, status, note)
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT (resource_id, user_id)
-            DO UPDATE SET
-                status = EXCLUDED.status,
-                note = EXCLUDED.note,
-                created_at = NOW()
-            RETURNING id
-            """,
-            (resource_id, author_id, data["status"], data["note"]),
-        )
-
-        verification_id = cursor.fetchone()["id"]
-
-        cursor.execute(
-            """
-            SELECT v.id AS verification_id,
-                   v.status,
-                   v.note,
-                   v.created_at AS "createdAt",
-                   v.user_id AS verification_author_id,
-                   u.username AS verification_author_username
-            FROM verifications v
-            JOIN users u ON v.user_id = u.id
-            WHERE v.id = %s
-            """,
-            (verification_id,),
-        )
-        created = cursor.fetchone()
+        created = data_access.upsert_verification(cursor, resource_id, author_id, data["status"], data["note"])
+        publish(cursor, "verification.created", [resource_id], created["verification_id"], created["status"])
 
         connection.commit()
+        response_cache.invalidate_resource(resource_id)
         return jsonify(created), 201
 
     except Exception as error:
@@ -72,12 +49,13 @@ def create_verification(resource_id):
         return jsonify({"error": str(error)}), 500
     finally:
         if connection:
-            connection.close()
+            release_db_connection(connection)
 
 
 # PUT /resources/resource_id/verifications/verifications_id
 @verifications_blueprint.route("/resources/<int:resource_id>/verifications/<int:verification_id>", methods=["PUT"])
 @token_required
+@rate_limited("verification_writes")
 def update_verification(resource_id, verification_id):
     connection = None
     try:
@@ -99,44 +77,19 @@ def update_verification(resource_id, verification_id):
 
         connection = get_db_connection()
         cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute(
-            "SELECT * FROM verifications WHERE id = %s AND resource_id = %s",
-            (verification_id, resource_id),
+        result = data_access.update_verification(
+            cursor, resource_id, verification_id, g.user["id"], data["status"], data["note"]
         )
-        verification_to_update = cursor.fetchone()
-        if verification_to_update is None:
+        if result is None:
             return jsonify({"error": "Verification not found"}), 404
 
-        if verification_to_update["user_id"] != g.user["id"]:
+        owner_id, updated = result
+        if owner_id != g.user["id"]:
             return jsonify({"error": "Unauthorized"}), 401
 
-        cursor.execute(
-            """
-            UPDATE verifications
-            SET status = %s, note = %s
-            WHERE id = %s AND resource_id = %s
-            RETURNING id
-            """,
-            (data["status"], data["note"], verification_id, resource_id),
-        )
-
-        cursor.execute(
-            """
-            SELECT v.id AS verification_id,
-                   v.status,
-                   v.note,
-                   v.created_at AS "createdAt",
-                   v.user_id AS verification_author_id,
-                   u.username AS verification_author_username
-            FROM verifications v
-            JOIN users u ON v.user_id = u.id
-            WHERE v.id = %s
-            """,
-            (verification_id,),
-        )
-        updated = cursor.fetchone()
-
+        publish(cursor, "verification.updated", [resource_id], verification_id, updated["status"])
         connection.commit()
+        response_cache.invalidate_resource(resource_id)
         return jsonify(updated), 200
 
     except Exception as error:
@@ -145,7 +98,7 @@ def update_verification(resource_id, verification_id):
         return jsonify({"error": str(error)}), 500
     finally:
         if connection:
-            connection.close()
+            release_db_connection(connection)
 
 
 
@@ -159,25 +112,18 @@ def delete_verification(resource_id, verification_id):
         connection = get_db_connection()
         cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
-        # Validate that it exists and belongs to that resource_id
-        cursor.execute(
-            "SELECT * FROM verifications WHERE id = %s AND resource_id = %s",
-            (verification_id, resource_id),
-        )
-        verification_to_delete = cursor.fetchone()
-        if verification_to_delete is None:
+        # Deletes only if it belongs to that resource_id and to the user
+        result = data_access.delete_verification(cursor, resource_id, verification_id, g.user["id"])
+        if result is None:
             return jsonify({"error": "Verification not found"}), 404
 
-        # Validate ownership
-        if verification_to_delete["user_id"] != g.user["id"]:
+        owner_id, _ = result
+        if owner_id != g.user["id"]:
             return jsonify({"error": "Unauthorized"}), 401
 
-        cursor.execute(
-            "DELETE FROM verifications WHERE id = %s AND resource_id = %s",
-            (verification_id, resource_id),
-        )
-
+        publish(cursor, "verification.deleted", [resource_id], verification_id)
         connection.commit()
+        response_cache.invalidate_resource(resource_id)
         return jsonify({"message": "Verification deleted successfully"}), 200
 
     except Exception as error:
@@ -186,4 +132,4 @@ def delete_verification(resource_id, verification_id):
         return jsonify({"error": str(error)}), 500
     finally:
         if connection:
-            connection.close()
+            release_db_connection(connection)
@@ -0,0 +1,58 @@
+"""
+Background worker that resolves coordinates for resources created or
+updated with ?geocode=async (or GEOCODE_MODE=async).
+
+    python geocode_worker.py --concurrency 4
+"""
+import argparse
+import logging
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Loaded before the utils imports, which read their settings at import time.
+load_dotenv()
+
+from utils.geocode_jobs import process_due_jobs
+
+logger = logging.getLogger(__name__)
+
+
+def work(stop, batch_size, poll_interval):
+    while not stop.is_set():
+        try:
+            handled = process_due_jobs(batch_size)
+        except Exception as error:
+            logger.error("Geocode worker error: %s", error)
+            handled = 0
+        if handled == 0:
+            stop.wait(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve pending resource geocodes.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=5)
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=work, args=(stop, args.batch_size, args.poll_interval), daemon=True)
+        for _ in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,113 @@
+from datetime import date, datetime, timezone
 from functools import wraps
 from flask import request, jsonify, g
+import hashlib
+import logging
+import threading
+import time
+import uuid
 import jwt
 import os
 
+from utils.cache_helpers import TTLCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+JWT_ALGORITHM = "HS256"
+JWT_TTL_SECONDS = int(os.getenv("JWT_TTL_SECONDS", str(7 * 24 * 3600)))
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "30"))
+# Tokens issued before tokens carried exp are accepted until this date (UTC).
+LEGACY_TOKEN_CUTOFF = datetime.combine(
+    date.fromisoformat(os.getenv("LEGACY_TOKEN_CUTOFF", "2026-12-01")),
+    datetime.min.time(), tzinfo=timezone.utc,
+).timestamp()
+
+# sha256(token) -> claims, each entry expiring with its token.
+_verified_tokens = TTLCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "10000")), ttl=JWT_TTL_SECONDS)
+_revoked_jtis = frozenset()
+_revocations_loaded_at = None
+_revocations_lock = threading.Lock()
+_revocation_loader = None
+_signing_key = None
+
+
+def jwt_signing_key():
+    # Prepared on first use, once per process.
+    global _signing_key
+    if _signing_key is None:
+        secret = os.getenv('JWT_SECRET')
+        if not secret:
+            raise Exception("JWT_SECRET missing in .env")
+        _signing_key = jwt.algorithms.HMACAlgorithm(
+            jwt.algorithms.HMACAlgorithm.SHA256).prepare_key(secret)
+    return _signing_key
+
+
+def create_token(payload):
+    now = int(time.time())
+    return jwt.encode({
+        "payload": payload,
+        "iat": now,
+        "exp": now + JWT_TTL_SECONDS,
+        "jti": uuid.uuid4().hex,
+    }, jwt_signing_key(), algorithm=JWT_ALGORITHM)
+
+
+def set_revocation_loader(loader):
+    """
+    loader() returns every currently revoked jti; it is called at most once
+    per REVOCATION_REFRESH_SECONDS and replaces the in-memory set in bulk.
+    """
+    global _revocation_loader, _revocations_loaded_at
+    _revocation_loader = loader
+    _revocations_loaded_at = None
+
+
+def refresh_revocations(jtis):
+    global _revoked_jtis, _revocations_loaded_at
+    _revoked_jtis = frozenset(jtis)
+    _revocations_loaded_at = time.monotonic()
+
+
+def revoke_token(jti):
+    global _revoked_jtis
+    with _revocations_lock:
+        _revoked_jtis = _revoked_jtis | {jti}
+
+
+def _maybe_refresh_revocations():
+    if _revocation_loader is None:
+        return
+    if (_revocations_loaded_at is not None
+            and time.monotonic() - _revocations_loaded_at < REVOCATION_REFRESH_SECONDS):
+        return
+    # One request refreshes; the others keep using the current set.
+    if not _revocations_lock.acquire(blocking=False):
+        return
+    try:
+        refresh_revocations(_revocation_loader())
+    except Exception as error:
+        logger.warning("Revocation refresh failed: %s", error)
+    finally:
+        _revocations_lock.release()
+
+
+def verify_token(token):
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    claims = _verified_tokens.get(digest)
+    if claims is MISSING:
+        claims = jwt.decode(token, jwt_signing_key(), algorithms=[JWT_ALGORITHM])
+        expires_at = claims.get("exp", LEGACY_TOKEN_CUTOFF)
+        if expires_at <= time.time():
+            # Only a legacy token gets here: jwt.decode checks exp itself.
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        _verified_tokens.set(digest, claims, ttl=expires_at - time.time())
+
+    _maybe_refresh_revocations()
+    if claims.get("jti") in _revoked_jtis:
+        raise jwt.InvalidTokenError("Token has been revoked")
+    return claims
+
 
 def token_required(f):
     @wraps(f)
@@ -12,10 +117,26 @@ def token_required(f):
             return jsonify({"err": "Unauthorized"}), 401
         try:
             token = authorization_header.split(' ')[1]
-            token_data = jwt.decode(token, os.getenv(
-                'JWT_SECRET'), algorithms=["HS256"])
+            token_data = verify_token(token)
             g.user = token_data["payload"]
+            g.token = token_data
+        except jwt.InvalidTokenError as err:
+            return jsonify({"err": str(err)}), 401
         except Exception as err:
             return jsonify({"err": str(err)}), 500
         return f(*args, **kwargs)
-    return decorated_function
\ No newline at end of file
+    return decorated_function
+
+
+def optional_user():
+    """
+    The user of the Authorization header, or None when there is none.
+    Raises jwt.InvalidTokenError when the token is invalid.
+    """
+    authorization_header = request.headers.get('Authorization')
+    if authorization_header is None:
+        return None
+    parts = authorization_header.split(' ')
+    if len(parts) < 2:
+        raise jwt.InvalidTokenError("Malformed Authorization header")
+    return verify_token(parts[1])["payload"]
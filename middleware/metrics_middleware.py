@@ -0,0 +1,90 @@
+import hmac
+import os
+
+from flask import Response, g, request
+
+from utils import metrics
+from utils.db_helpers import db_pool_stats
+from utils.mapbox_helpers import geocode_cache_stats
+from utils.rate_limit import rate_limiter
+from utils.resource_events import event_hub
+from utils.response_cache import response_cache
+
+METRICS_MIMETYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+metrics.register(metrics.Collected(
+    "db_pool_connections", "Connections in the psycopg2 pool of this process.", "gauge", ("state",),
+    lambda: {(state,): db_pool_stats()[state] for state in ("in_use", "idle")},
+))
+metrics.register(metrics.Collected(
+    "db_pool_wait_seconds_total", "Time spent waiting for a pooled connection.", "counter", (),
+    lambda: {(): db_pool_stats()["wait_seconds_total"]},
+))
+metrics.register(metrics.Collected(
+    "db_pool_timeouts_total", "Requests that gave up waiting for a pooled connection.", "counter", (),
+    lambda: {(): db_pool_stats()["timeouts"]},
+))
+metrics.register(metrics.Collected(
+    "cache_lookups_total", "Response and geocode cache lookups by result.", "counter", ("cache", "result"),
+    lambda: {
+        (cache, result): stats[result]
+        for cache, stats in (("response", response_cache.stats()), ("geocode", geocode_cache_stats()))
+        for result in ("hits", "misses")
+    },
+))
+
+metrics.register(metrics.Collected(
+    "rate_limit_decisions_total", "Rate limited requests by decision.", "counter", ("decision",),
+    lambda: {(decision,): rate_limiter.stats()[decision] for decision in ("allowed", "limited")},
+))
+metrics.register(metrics.Collected(
+    "resource_stream_subscribers", "Open GET /resources/stream connections in this process.", "gauge", (),
+    lambda: {(): event_hub.stats()["subscribers"]},
+))
+metrics.register(metrics.Collected(
+    "resource_stream_events_total", "Resource events received by this process's listener.", "counter", (),
+    lambda: {(): event_hub.stats()["events"]},
+))
+
+
+def route_labels():
+    """
+    (blueprint, route) of the current request. Unmatched paths share one
+    label so 404 probes cannot grow the number of series.
+    """
+    rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    return request.blueprint or "app", rule
+
+
+def init_metrics(app):
+    """
+    Times every request of app (with its database queries) and serves
+    /metrics. Set METRICS_TOKEN to require "Authorization: Bearer <token>".
+    """
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_stats, g.request_stats_token = metrics.start_request()
+
+    @app.after_request
+    def remember_status(response):
+        g.response_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(error=None):
+        stats = g.pop("request_stats", None)
+        if stats is None:
+            return
+        blueprint, route = route_labels()
+        metrics.finish_request(
+            g.pop("request_stats_token"), stats, request.method, blueprint, route,
+            g.pop("response_status", 500), request.path,
+        )
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        token = os.getenv("METRICS_TOKEN")
+        if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return Response("Unauthorized\n", status=401, mimetype="text/plain")
+        return Response(metrics.render(), status=200, content_type=METRICS_MIMETYPE)
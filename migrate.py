@@ -0,0 +1,75 @@
+"""
+Schema migrations for the database configured in .env.
+
+    python migrate.py                  # apply every pending migration
+    python migrate.py --target 2       # ... up to 0002
+    python migrate.py --status
+    python migrate.py --baseline 1     # database created by the original student_bridge.sql
+    python migrate.py --check-plans    # exit 1 if a hot query falls back to a seq scan
+"""
+import argparse
+import sys
+
+import psycopg2
+from dotenv import load_dotenv
+
+# Loaded before the utils imports, which read their settings at import time.
+load_dotenv()
+
+from utils.db_helpers import db_dsn
+from utils.migrations import discover_migrations, applied_migrations, migrate, baseline, MigrationError
+from utils.plan_check import check_plans, SEED_RESOURCES
+
+
+def print_status(connection):
+    applied = applied_migrations(connection)
+    for migration in discover_migrations():
+        entry = applied.get(migration.version)
+        state = f"applied {entry[2]:%Y-%m-%d %H:%M}" if entry else "pending"
+        print(f"{migration.version:04d}_{migration.name:<40} {state}")
+
+
+def print_plan_check(connection, resources):
+    failures = 0
+    for name, scanned in check_plans(connection, resources):
+        if scanned:
+            failures += 1
+            print(f"SEQ SCAN  {name}: {', '.join(sorted(set(scanned)))}")
+        else:
+            print(f"ok        {name}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply and inspect schema migrations.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--target", type=int, help="migrate up to this version")
+    group.add_argument("--status", action="store_true")
+    group.add_argument("--baseline", type=int, metavar="VERSION",
+                       help="mark migrations up to VERSION as applied without running them")
+    group.add_argument("--check-plans", action="store_true")
+    parser.add_argument("--seed-resources", type=int, default=SEED_RESOURCES,
+                        help="rows seeded (and rolled back) by --check-plans")
+    args = parser.parse_args()
+
+    connection = psycopg2.connect(db_dsn())
+    try:
+        if args.status:
+            print_status(connection)
+        elif args.baseline is not None:
+            baseline(connection, args.baseline)
+            print_status(connection)
+        elif args.check_plans:
+            if print_plan_check(connection, args.seed_resources):
+                sys.exit(1)
+        else:
+            applied = migrate(connection, args.target)
+            print(f"{len(applied)} migration(s) applied")
+    except MigrationError as error:
+        sys.exit(f"Migration error: {error}")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
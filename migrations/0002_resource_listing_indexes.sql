@@ -0,0 +1,8 @@
+-- migrate: no-transaction
+-- Keyset pagination on (created_at, id), newest first, with optional filters
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_resources_created_at_id ON resources (created_at DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_resources_category_created_at_id ON resources (category, created_at DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_resources_city_created_at_id ON resources (lower(city), created_at DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_resources_visible_created_at_id ON resources (created_at DESC, id DESC)
+  WHERE hidden_at IS NULL;
@@ -0,0 +1,4 @@
+-- migrate: no-transaction
+-- Bounding-box prefilter for /resources/nearby (range on lat, lng checked in the index)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_resources_lat_lng ON resources (lat, lng);
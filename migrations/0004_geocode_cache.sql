@@ -0,0 +1,11 @@
+-- ------------------- GEOCODE CACHE -----
+-- Keyed by normalized (address, city); NULL lat/lng caches "not found".
+
+CREATE TABLE geocode_cache (
+  address_key TEXT NOT NULL,
+  city_key    TEXT NOT NULL,
+  lat         NUMERIC(9,6),
+  lng         NUMERIC(9,6),
+  resolved_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (address_key, city_key)
+);
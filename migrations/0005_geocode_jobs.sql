@@ -0,0 +1,25 @@
+CREATE TYPE geocode_status AS ENUM (
+  'pending',
+  'resolved',
+  'failed'
+);
+
+-- lat/lng are NULL while geocode_status is pending/failed
+ALTER TABLE resources
+  ALTER COLUMN lat DROP NOT NULL,
+  ALTER COLUMN lng DROP NOT NULL,
+  ADD COLUMN geocode_status geocode_status NOT NULL DEFAULT 'resolved';
+
+-- ------------------- GEOCODE JOBS -----
+-- Pending async geocodes, claimed by geocode_worker.py with FOR UPDATE SKIP LOCKED.
+
+CREATE TABLE geocode_jobs (
+  id              SERIAL PRIMARY KEY,
+  resource_id     INTEGER NOT NULL UNIQUE REFERENCES resources(id) ON DELETE CASCADE,
+  attempts        INTEGER NOT NULL DEFAULT 0,
+  next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  last_error      TEXT,
+  created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_geocode_jobs_next_attempt_at ON geocode_jobs (next_attempt_at);
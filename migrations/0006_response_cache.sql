@@ -0,0 +1,14 @@
+-- ------------------- RESPONSE CACHE -----
+-- Only used with RESPONSE_CACHE_BACKEND=postgres. UNLOGGED: losing it on a crash is fine.
+
+CREATE UNLOGGED TABLE response_cache (
+  key        TEXT PRIMARY KEY,
+  body       BYTEA NOT NULL,
+  headers    JSONB NOT NULL DEFAULT '{}',
+  expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE UNLOGGED TABLE response_cache_generations (
+  name       TEXT PRIMARY KEY,
+  generation BIGINT NOT NULL DEFAULT 0
+);
@@ -0,0 +1,81 @@
+-- -------------- DATA VERSIONS -----------------------------------------
+-- Monotonic counter behind ETag / Last-Modified, bumped by triggers below.
+
+CREATE SEQUENCE data_version_seq;
+
+CREATE TABLE data_versions (
+  name       TEXT PRIMARY KEY,
+  version    BIGINT NOT NULL,
+  changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO data_versions (name, version) VALUES ('resources', nextval('data_version_seq'));
+
+-- Bumped on any change to a resource, its verifications included
+ALTER TABLE resources
+  ADD COLUMN version    BIGINT NOT NULL DEFAULT nextval('data_version_seq'),
+  ADD COLUMN changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+-- ----------- VERSION TRIGGERS
+
+CREATE FUNCTION bump_resource_version() RETURNS trigger AS $$
+BEGIN
+  NEW.version := nextval('data_version_seq');
+  NEW.changed_at := NOW();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_resources_version
+BEFORE UPDATE ON resources
+FOR EACH ROW EXECUTE FUNCTION bump_resource_version();
+
+CREATE FUNCTION bump_resource_version_from_verification() RETURNS trigger AS $$
+BEGIN
+  -- trg_resources_version assigns the new version.
+  UPDATE resources SET version = version
+  WHERE id = CASE WHEN TG_OP = 'DELETE' THEN OLD.resource_id ELSE NEW.resource_id END;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_verifications_resource_version
+AFTER INSERT OR UPDATE OR DELETE ON verifications
+FOR EACH ROW EXECUTE FUNCTION bump_resource_version_from_verification();
+
+-- The catalog version is bumped once per writing transaction, right before
+-- it commits, so writers only queue on the data_versions row for the length
+-- of their commit instead of holding it from their first write.
+CREATE TABLE catalog_commits (
+  txid xid8 PRIMARY KEY DEFAULT pg_current_xact_id()
+);
+
+CREATE FUNCTION note_catalog_commit() RETURNS void AS $$
+  INSERT INTO catalog_commits DEFAULT VALUES ON CONFLICT DO NOTHING;
+$$ LANGUAGE sql;
+
+CREATE FUNCTION bump_catalog_version_at_commit() RETURNS trigger AS $$
+BEGIN
+  UPDATE data_versions
+  SET version = nextval('data_version_seq'), changed_at = NOW()
+  WHERE name = 'resources';
+  DELETE FROM catalog_commits WHERE txid = NEW.txid;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE CONSTRAINT TRIGGER trg_catalog_commits_bump
+AFTER INSERT ON catalog_commits
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION bump_catalog_version_at_commit();
+
+CREATE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+BEGIN
+  PERFORM note_catalog_commit();
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_resources_catalog_version
+AFTER INSERT OR UPDATE OR DELETE ON resources
+FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version();
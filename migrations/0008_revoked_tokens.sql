@@ -0,0 +1,9 @@
+-- ------------------- REVOKED TOKENS -----
+-- jti of signed-out tokens until they expire; loaded in bulk by every worker.
+
+CREATE TABLE revoked_tokens (
+  jti        TEXT PRIMARY KEY,
+  expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX idx_revoked_tokens_expires_at ON revoked_tokens (expires_at);
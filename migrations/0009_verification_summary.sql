@@ -0,0 +1,123 @@
+-- Verifications written while this runs would miss both the backfill and the trigger.
+LOCK TABLE verifications IN SHARE MODE;
+
+-- Newest verifications of a resource first (history, summary refresh)
+CREATE INDEX idx_verifications_resource_created_at ON verifications (resource_id, created_at DESC, id DESC);
+
+-- ----------- VERIFICATION SUMMARY
+-- One row per verified resource, kept in step with verifications by the
+-- triggers below, so listings can show the current status without the join.
+
+CREATE TABLE resource_verification_summary (
+  resource_id               INTEGER PRIMARY KEY REFERENCES resources(id) ON DELETE CASCADE,
+  latest_verification_id    INTEGER,
+  latest_status             verification_status,
+  last_verified_at          TIMESTAMPTZ,
+  verification_count        INTEGER NOT NULL DEFAULT 0,
+  active_count              INTEGER NOT NULL DEFAULT 0,
+  temporarily_closed_count  INTEGER NOT NULL DEFAULT 0,
+  no_longer_available_count INTEGER NOT NULL DEFAULT 0,
+  info_needs_update_count   INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE FUNCTION adjust_verification_counts(p_resource_id INTEGER, p_status verification_status, p_delta INTEGER)
+RETURNS void AS $$
+BEGIN
+  IF p_delta > 0 THEN
+    INSERT INTO resource_verification_summary AS s (
+      resource_id, verification_count, active_count, temporarily_closed_count,
+      no_longer_available_count, info_needs_update_count
+    )
+    VALUES (
+      p_resource_id, p_delta,
+      CASE WHEN p_status = 'Active' THEN p_delta ELSE 0 END,
+      CASE WHEN p_status = 'Temporarily Closed' THEN p_delta ELSE 0 END,
+      CASE WHEN p_status = 'No Longer Available' THEN p_delta ELSE 0 END,
+      CASE WHEN p_status = 'Info Needs Update' THEN p_delta ELSE 0 END
+    )
+    ON CONFLICT (resource_id) DO UPDATE SET
+      verification_count        = s.verification_count + EXCLUDED.verification_count,
+      active_count              = s.active_count + EXCLUDED.active_count,
+      temporarily_closed_count  = s.temporarily_closed_count + EXCLUDED.temporarily_closed_count,
+      no_longer_available_count = s.no_longer_available_count + EXCLUDED.no_longer_available_count,
+      info_needs_update_count   = s.info_needs_update_count + EXCLUDED.info_needs_update_count;
+  ELSE
+    -- No insert here: when a resource is deleted its summary may already be gone.
+    UPDATE resource_verification_summary SET
+      verification_count        = verification_count + p_delta,
+      active_count              = active_count + CASE WHEN p_status = 'Active' THEN p_delta ELSE 0 END,
+      temporarily_closed_count  = temporarily_closed_count + CASE WHEN p_status = 'Temporarily Closed' THEN p_delta ELSE 0 END,
+      no_longer_available_count = no_longer_available_count + CASE WHEN p_status = 'No Longer Available' THEN p_delta ELSE 0 END,
+      info_needs_update_count   = info_needs_update_count + CASE WHEN p_status = 'Info Needs Update' THEN p_delta ELSE 0 END
+    WHERE resource_id = p_resource_id;
+  END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION maintain_verification_summary() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM adjust_verification_counts(OLD.resource_id, OLD.status, -1);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM adjust_verification_counts(NEW.resource_id, NEW.status, 1);
+  END IF;
+
+  -- The latest verification was removed or moved back in time: re-read the
+  -- newest one (an index lookup on idx_verifications_resource_created_at).
+  IF TG_OP = 'DELETE'
+     OR (TG_OP = 'UPDATE' AND (NEW.resource_id <> OLD.resource_id OR NEW.created_at < OLD.created_at)) THEN
+    UPDATE resource_verification_summary s
+    SET (latest_verification_id, latest_status, last_verified_at) = (
+      SELECT v.id, v.status, v.created_at
+      FROM verifications v
+      WHERE v.resource_id = s.resource_id
+      ORDER BY v.created_at DESC, v.id DESC
+      LIMIT 1
+    )
+    WHERE s.resource_id = OLD.resource_id AND s.latest_verification_id = OLD.id;
+  END IF;
+
+  -- Otherwise the changed verification only matters if it is (or stays) the newest.
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE resource_verification_summary
+    SET latest_verification_id = NEW.id,
+        latest_status = NEW.status,
+        last_verified_at = NEW.created_at
+    WHERE resource_id = NEW.resource_id
+      AND (latest_verification_id IS NULL
+           OR latest_verification_id = NEW.id
+           OR (NEW.created_at, NEW.id) > (last_verified_at, latest_verification_id));
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_verifications_summary
+AFTER INSERT OR UPDATE OR DELETE ON verifications
+FOR EACH ROW EXECUTE FUNCTION maintain_verification_summary();
+
+-- Summaries for the verifications that already exist
+INSERT INTO resource_verification_summary (
+  resource_id, verification_count, active_count, temporarily_closed_count,
+  no_longer_available_count, info_needs_update_count
+)
+SELECT resource_id,
+       COUNT(*),
+       COUNT(*) FILTER (WHERE status = 'Active'),
+       COUNT(*) FILTER (WHERE status = 'Temporarily Closed'),
+       COUNT(*) FILTER (WHERE status = 'No Longer Available'),
+       COUNT(*) FILTER (WHERE status = 'Info Needs Update')
+FROM verifications
+GROUP BY resource_id;
+
+UPDATE resource_verification_summary s
+SET latest_verification_id = latest.id,
+    latest_status = latest.status,
+    last_verified_at = latest.created_at
+FROM (
+  SELECT DISTINCT ON (resource_id) resource_id, id, status, created_at
+  FROM verifications
+  ORDER BY resource_id, created_at DESC, id DESC
+) latest
+WHERE s.resource_id = latest.resource_id;
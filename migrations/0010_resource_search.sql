@@ -0,0 +1,10 @@
+-- Full-text search for /resources/search; weights rank title matches highest
+
+ALTER TABLE resources ADD COLUMN search_vector TSVECTOR GENERATED ALWAYS AS (
+  setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+  setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+  setweight(to_tsvector('english', coalesce(requirements, '')), 'C') ||
+  setweight(to_tsvector('english', coalesce(city, '')), 'D')
+) STORED;
+
+CREATE INDEX idx_resources_search ON resources USING GIN (search_vector);
@@ -0,0 +1,14 @@
+-- migrate: no-transaction
+-- Indexes for the remaining hot paths. CONCURRENTLY keeps the tables
+-- writable while they build, which cannot happen inside a transaction.
+-- (verifications.resource_id and resources.created_at DESC are covered by
+-- idx_verifications_resource_created_at and idx_resources_created_at_id.)
+
+-- Ownership checks and ON DELETE CASCADE from users
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_resources_created_by ON resources (created_by);
+
+-- GET /saves: a user's saves, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_saves_user_created_at ON saves (user_id, created_at DESC);
+
+-- ON DELETE CASCADE from users
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_verifications_user_id ON verifications (user_id);
@@ -0,0 +1,8 @@
+-- SQL twin of utils.mapbox_helpers.normalize_location, so an update can tell
+-- in the same statement whether the address or city actually changed.
+-- lower() folds less than Python's casefold(): the worst case is a
+-- redundant (cached) geocode, never a skipped one.
+
+CREATE FUNCTION normalize_location_part(value TEXT) RETURNS TEXT AS $$
+  SELECT lower(btrim(regexp_replace(coalesce(value, ''), '\s+', ' ', 'g'), ' ,.'))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
@@ -0,0 +1,44 @@
+-- Token buckets for RATE_LIMIT_BACKEND=postgres, shared by every worker.
+-- UNLOGGED: losing them on a crash only hands out one fresh burst.
+
+CREATE UNLOGGED TABLE rate_limit_buckets (
+  key        TEXT PRIMARY KEY,
+  tokens     DOUBLE PRECISION NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX idx_rate_limit_buckets_updated_at ON rate_limit_buckets (updated_at);
+
+-- Refills the bucket for the time since it was last used (rate tokens per
+-- second, up to capacity) and takes one token if there is one. The row lock
+-- serializes concurrent requests on the same key.
+CREATE FUNCTION rate_limit_take(
+  p_key TEXT,
+  p_capacity DOUBLE PRECISION,
+  p_rate DOUBLE PRECISION,
+  OUT allowed BOOLEAN,
+  OUT retry_after DOUBLE PRECISION
+) AS $$
+DECLARE
+  now_ts TIMESTAMPTZ := clock_timestamp();
+  available DOUBLE PRECISION;
+BEGIN
+  INSERT INTO rate_limit_buckets (key, tokens, updated_at)
+  VALUES (p_key, p_capacity, now_ts)
+  ON CONFLICT (key) DO NOTHING;
+
+  SELECT least(p_capacity, tokens + greatest(0, extract(epoch FROM now_ts - updated_at)) * p_rate)
+  INTO available
+  FROM rate_limit_buckets
+  WHERE key = p_key
+  FOR UPDATE;
+
+  allowed := available >= 1;
+  IF allowed THEN
+    available := available - 1;
+  END IF;
+
+  UPDATE rate_limit_buckets SET tokens = available, updated_at = greatest(updated_at, now_ts) WHERE key = p_key;
+  retry_after := CASE WHEN allowed THEN 0 ELSE (1 - available) / p_rate END;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,88 @@
+-- Change log for GET /resources/changes: one row per resource, stamped with
+-- the id of the transaction that last changed it, plus tombstones for
+-- deleted resources and verifications.
+--
+-- resources.version is drawn before the writing transaction commits, so a
+-- sync that read "everything after version v" could skip a change whose
+-- transaction was still open. Log rows carry the writer's transaction id
+-- (xid8, never reused) instead, and GET /resources/changes only returns rows
+-- of transactions below the xmin of its snapshot, which have all ended; a
+-- transaction still open has a higher id and is read on a later sync. Writers
+-- do not wait on each other for this: a long-running transaction delays the
+-- feed until it ends, it does not make it skip anything.
+
+CREATE TABLE resource_changes (
+  resource_id     INTEGER NOT NULL,
+  verification_id INTEGER NOT NULL DEFAULT 0,  -- 0: the resource itself; else a deleted verification
+  txid            xid8 NOT NULL DEFAULT pg_current_xact_id(),
+  deleted         BOOLEAN NOT NULL DEFAULT FALSE,
+  changed_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (resource_id, verification_id)
+);
+
+CREATE INDEX idx_resource_changes_txid ON resource_changes (txid, resource_id, verification_id);
+CREATE INDEX idx_resource_changes_tombstones ON resource_changes (changed_at) WHERE deleted;
+
+-- txid of the newest tombstone expired so far; older sync tokens must resync.
+INSERT INTO data_versions (name, version) VALUES ('resource_changes_expired', 0);
+
+-- Statement level: one upsert per statement, however many rows it touched.
+CREATE FUNCTION log_resource_changes() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    INSERT INTO resource_changes (resource_id, deleted)
+    SELECT id, TRUE FROM old_rows
+    ON CONFLICT (resource_id, verification_id)
+    DO UPDATE SET txid = EXCLUDED.txid, deleted = TRUE, changed_at = NOW();
+    -- The resource tombstone covers its verifications.
+    DELETE FROM resource_changes
+    WHERE resource_id IN (SELECT id FROM old_rows) AND verification_id <> 0;
+  ELSE
+    INSERT INTO resource_changes (resource_id)
+    SELECT id FROM new_rows
+    ON CONFLICT (resource_id, verification_id)
+    DO UPDATE SET txid = EXCLUDED.txid, deleted = FALSE, changed_at = NOW();
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A transition table can only belong to a trigger for a single event.
+CREATE TRIGGER trg_resources_log_insert
+AFTER INSERT ON resources
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION log_resource_changes();
+
+CREATE TRIGGER trg_resources_log_update
+AFTER UPDATE ON resources
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION log_resource_changes();
+
+CREATE TRIGGER trg_resources_log_delete
+AFTER DELETE ON resources
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION log_resource_changes();
+
+-- Deleting a verification also updates its resource (trg_verifications_resource_version),
+-- which logs the resource; the tombstone tells clients which verification went.
+-- Verifications deleted along with their resource are skipped.
+CREATE FUNCTION log_verification_deletes() RETURNS trigger AS $$
+BEGIN
+  INSERT INTO resource_changes (resource_id, verification_id, deleted)
+  SELECT o.resource_id, o.id, TRUE
+  FROM old_rows o
+  JOIN resources r ON r.id = o.resource_id
+  ON CONFLICT (resource_id, verification_id)
+  DO UPDATE SET txid = EXCLUDED.txid, changed_at = NOW();
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_verifications_log_delete
+AFTER DELETE ON verifications
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION log_verification_deletes();
+
+-- Existing resources were committed long ago: any txid below every running one will do.
+INSERT INTO resource_changes (resource_id, txid)
+SELECT id, '0' FROM resources;
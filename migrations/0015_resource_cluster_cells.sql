@@ -0,0 +1,143 @@
+-- Grid counts for GET /resources/clusters: for every map zoom 0-16, each
+-- web-mercator tile is split into 8 x 8 cells (cell coordinates are tile
+-- coordinates at zoom + 3), and each cell keeps the number of resources per
+-- category and the sums of their coordinates (for the cluster centroid).
+-- Only visible resources with coordinates are counted. The triggers below
+-- stage every resource write as +1/-1 deltas, and the commit-time trigger
+-- of 0007 applies them; cells that drop to 0 are kept (they are few, and
+-- readers skip them).
+
+CREATE TABLE resource_cluster_cells (
+  zoom     SMALLINT          NOT NULL,
+  x        INTEGER           NOT NULL,
+  y        INTEGER           NOT NULL,
+  category resource_category NOT NULL,
+  count    INTEGER           NOT NULL,
+  lat_sum  DOUBLE PRECISION  NOT NULL,
+  lng_sum  DOUBLE PRECISION  NOT NULL,
+  PRIMARY KEY (zoom, x, y, category)
+);
+
+-- Web-mercator tile coordinates at a zoom level (the math of utils/geo_helpers.tile_x/tile_y).
+CREATE FUNCTION mercator_tile_x(lng DOUBLE PRECISION, zoom INTEGER) RETURNS INTEGER AS $$
+  SELECT least(greatest(floor((lng + 180) / 360 * 2 ^ zoom), 0), 2 ^ zoom - 1)::integer;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE FUNCTION mercator_tile_y(lat DOUBLE PRECISION, zoom INTEGER) RETURNS INTEGER AS $$
+  SELECT least(greatest(floor(
+    (1 - asinh(tan(radians(least(greatest(lat, -85.0511287798), 85.0511287798)))) / pi()) / 2 * 2 ^ zoom
+  ), 0), 2 ^ zoom - 1)::integer;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Rows never outlive their transaction, so nothing is lost by not logging them.
+CREATE UNLOGGED TABLE resource_cluster_deltas (
+  txid     xid8              NOT NULL DEFAULT pg_current_xact_id(),
+  category resource_category NOT NULL,
+  lat      DOUBLE PRECISION  NOT NULL,
+  lng      DOUBLE PRECISION  NOT NULL,
+  delta    INTEGER           NOT NULL
+);
+
+CREATE INDEX idx_resource_cluster_deltas_txid ON resource_cluster_deltas (txid);
+
+-- Stages delta (+1 or -1) resources at (lat, lng) of category for the commit.
+-- The cells of low zooms are shared by most resources; upserting them here
+-- would keep them locked for the rest of the writer's transaction.
+CREATE FUNCTION adjust_cluster_cells(
+  p_category resource_category[],
+  p_lat DOUBLE PRECISION[],
+  p_lng DOUBLE PRECISION[],
+  p_delta INTEGER[]
+) RETURNS void AS $$
+BEGIN
+  INSERT INTO resource_cluster_deltas (category, lat, lng, delta)
+  SELECT * FROM unnest(p_category, p_lat, p_lng, p_delta);
+  PERFORM note_catalog_commit();
+END;
+$$ LANGUAGE plpgsql;
+
+-- Adds the deltas staged by transaction p_txid to their cell at every zoom.
+CREATE FUNCTION apply_cluster_deltas(p_txid xid8) RETURNS void AS $$
+  WITH staged AS (
+    DELETE FROM resource_cluster_deltas WHERE txid = p_txid
+    RETURNING category, lat, lng, delta
+  )
+  INSERT INTO resource_cluster_cells AS c (zoom, x, y, category, count, lat_sum, lng_sum)
+  SELECT z, mercator_tile_x(d.lng, z + 3), mercator_tile_y(d.lat, z + 3), d.category,
+         sum(d.delta), sum(d.delta * d.lat), sum(d.delta * d.lng)
+  FROM staged d, generate_series(0, 16) z
+  GROUP BY 1, 2, 3, 4
+  ORDER BY 1, 2, 3, 4
+  ON CONFLICT (zoom, x, y, category)
+  DO UPDATE SET count = c.count + EXCLUDED.count,
+                lat_sum = c.lat_sum + EXCLUDED.lat_sum,
+                lng_sum = c.lng_sum + EXCLUDED.lng_sum;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION bump_catalog_version_at_commit() RETURNS trigger AS $$
+BEGIN
+  -- Cells (in key order), then the catalog row: the same order for every committing writer.
+  PERFORM apply_cluster_deltas(NEW.txid);
+  UPDATE data_versions
+  SET version = nextval('data_version_seq'), changed_at = NOW()
+  WHERE name = 'resources';
+  DELETE FROM catalog_commits WHERE txid = NEW.txid;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION maintain_cluster_cells() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM adjust_cluster_cells(array_agg(category), array_agg(lat::float8), array_agg(lng::float8), array_agg(1))
+    FROM new_rows
+    WHERE lat IS NOT NULL AND lng IS NOT NULL AND hidden_at IS NULL
+    HAVING count(*) > 0;
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM adjust_cluster_cells(array_agg(category), array_agg(lat::float8), array_agg(lng::float8), array_agg(-1))
+    FROM old_rows
+    WHERE lat IS NOT NULL AND lng IS NOT NULL AND hidden_at IS NULL
+    HAVING count(*) > 0;
+  ELSE
+    -- Most updates (edits, verification bumps) move nothing and stop here.
+    PERFORM adjust_cluster_cells(array_agg(d.category), array_agg(d.lat), array_agg(d.lng), array_agg(d.delta))
+    FROM (
+      SELECT o.category, o.lat::float8 AS lat, o.lng::float8 AS lng, -1 AS delta
+      FROM old_rows o
+      JOIN new_rows n ON n.id = o.id
+      WHERE (o.category, o.lat, o.lng, o.hidden_at IS NULL) IS DISTINCT FROM (n.category, n.lat, n.lng, n.hidden_at IS NULL)
+        AND o.lat IS NOT NULL AND o.lng IS NOT NULL AND o.hidden_at IS NULL
+      UNION ALL
+      SELECT n.category, n.lat::float8, n.lng::float8, 1
+      FROM new_rows n
+      JOIN old_rows o ON o.id = n.id
+      WHERE (o.category, o.lat, o.lng, o.hidden_at IS NULL) IS DISTINCT FROM (n.category, n.lat, n.lng, n.hidden_at IS NULL)
+        AND n.lat IS NOT NULL AND n.lng IS NOT NULL AND n.hidden_at IS NULL
+    ) d
+    HAVING count(*) > 0;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_resources_cluster_cells_insert
+AFTER INSERT ON resources
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION maintain_cluster_cells();
+
+CREATE TRIGGER trg_resources_cluster_cells_update
+AFTER UPDATE ON resources
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION maintain_cluster_cells();
+
+CREATE TRIGGER trg_resources_cluster_cells_delete
+AFTER DELETE ON resources
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION maintain_cluster_cells();
+
+INSERT INTO resource_cluster_cells (zoom, x, y, category, count, lat_sum, lng_sum)
+SELECT z, mercator_tile_x(r.lng::float8, z + 3), mercator_tile_y(r.lat::float8, z + 3), r.category,
+       count(*), sum(r.lat::float8), sum(r.lng::float8)
+FROM resources r, generate_series(0, 16) z
+WHERE r.lat IS NOT NULL AND r.lng IS NOT NULL AND r.hidden_at IS NULL
+GROUP BY 1, 2, 3, 4;
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import asgi
+from utils.resource_events import EventHub, STREAM_START
+
+
+def sleepy_wsgi_app(environ, start_response):
+    time.sleep(0.3)
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [b"done"]
+
+
+def http_scope(path, query_string=b""):
+    return {"type": "http", "method": "GET", "path": path, "query_string": query_string, "headers": [],
+            "scheme": "http", "server": ("localhost", 80), "root_path": "", "http_version": "1.1"}
+
+
+async def call(application, path="/", query_string=b""):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await application(http_scope(path, query_string), receive, send)
+    return sent
+
+
+def test_wsgi_requests_run_concurrently():
+    application = asgi.ThreadPoolWsgiToAsgi(sleepy_wsgi_app)
+
+    async def run():
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(call(application) for _ in range(4)))
+        return time.perf_counter() - started, responses
+
+    elapsed, responses = asyncio.run(run())
+    assert elapsed < 1.0
+    assert all(sent[0]["status"] == 200 for sent in responses)
+
+
+def test_flask_routes_are_served():
+    sent = asyncio.run(call(asgi.app, "/"))
+    assert sent[0]["status"] == 200
+    assert b"".join(message.get("body", b"") for message in sent[1:]) == b"Hello world"
+
+
+def test_stream_is_served_on_the_event_loop(monkeypatch):
+    hub = EventHub()
+    hub._thread = object()  # no LISTEN connection in tests
+    monkeypatch.setattr(asgi, "event_hub", hub)
+
+    async def run():
+        sent = []
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+        gone = asyncio.Event()
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await gone.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message.get("body") == STREAM_START:
+                hub.dispatch('{"event": "resource.created", "resource_id": 1}')
+            elif message.get("body", b"").startswith(b"event:"):
+                gone.set()
+
+        await asgi.app(http_scope("/resources/stream"), receive, send)
+        return sent
+
+    sent = asyncio.run(asyncio.wait_for(run(), 5))
+    assert sent[0]["status"] == 200
+    assert (b"content-type", b"text/event-stream") in sent[0]["headers"]
+    assert sent[2]["body"] == b'event: resource.created\ndata: {"event": "resource.created", "resource_id": 1}\n\n'
+    assert hub.stats()["subscribers"] == 0
+
+
+def test_stream_rejects_invalid_filters_on_the_event_loop():
+    sent = asyncio.run(call(asgi.app, "/resources/stream", b"category=Nope"))
+    assert sent[0]["status"] == 400
@@ -0,0 +1,98 @@
+import time
+
+import jwt
+import pytest
+from flask import Flask, g, jsonify
+
+from middleware import auth_middleware
+from middleware.auth_middleware import (
+    create_token, revoke_token, set_revocation_loader, token_required, verify_token,
+)
+from utils.cache_helpers import TTLCache
+
+SECRET = "test-secret-long-enough-for-hs256!"
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setenv("JWT_SECRET", SECRET)
+    monkeypatch.setattr(auth_middleware, "_signing_key", None)
+    monkeypatch.setattr(auth_middleware, "_verified_tokens", TTLCache(maxsize=16, ttl=60))
+    monkeypatch.setattr(auth_middleware, "_revoked_jtis", frozenset())
+    monkeypatch.setattr(auth_middleware, "_revocation_loader", None)
+    monkeypatch.setattr(auth_middleware, "_revocations_loaded_at", None)
+
+
+def test_verified_tokens_are_not_decoded_again(monkeypatch):
+    token = create_token({"id": 1})
+    assert verify_token(token)["payload"] == {"id": 1}
+
+    def fail(*args, **kwargs):
+        raise AssertionError("decoded twice")
+    monkeypatch.setattr(auth_middleware.jwt, "decode", fail)
+    assert verify_token(token)["payload"] == {"id": 1}
+
+
+def test_invalid_and_expired_tokens_are_rejected():
+    with pytest.raises(jwt.InvalidTokenError):
+        verify_token(create_token({"id": 1}) + "x")
+    now = int(time.time())
+    expired = jwt.encode({"payload": {"id": 1}, "iat": now - 20, "exp": now - 10},
+                         SECRET, algorithm="HS256")
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verify_token(expired)
+
+
+def test_legacy_tokens_without_exp_work_until_the_cutoff(monkeypatch):
+    legacy = jwt.encode({"payload": {"id": 1}}, SECRET, algorithm="HS256")
+    monkeypatch.setattr(auth_middleware, "LEGACY_TOKEN_CUTOFF", time.time() + 60)
+    assert verify_token(legacy)["payload"] == {"id": 1}
+
+    monkeypatch.setattr(auth_middleware, "_verified_tokens", TTLCache(maxsize=16, ttl=60))
+    monkeypatch.setattr(auth_middleware, "LEGACY_TOKEN_CUTOFF", time.time() - 1)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verify_token(legacy)
+
+
+def test_revoked_tokens_are_rejected_even_when_cached():
+    token = create_token({"id": 1})
+    claims = verify_token(token)
+    revoke_token(claims["jti"])
+    with pytest.raises(jwt.InvalidTokenError, match="revoked"):
+        verify_token(token)
+
+
+def test_revocations_are_reloaded_at_most_once_per_interval(monkeypatch):
+    token = create_token({"id": 1})
+    jti = verify_token(token)["jti"]
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return [jti] if len(loads) > 1 else []
+
+    set_revocation_loader(loader)
+    verify_token(token)
+    verify_token(token)
+    assert len(loads) == 1
+
+    monkeypatch.setattr(auth_middleware, "_revocations_loaded_at",
+                        time.monotonic() - auth_middleware.REVOCATION_REFRESH_SECONDS - 1)
+    with pytest.raises(jwt.InvalidTokenError):
+        verify_token(token)
+    assert len(loads) == 2
+
+
+def test_token_required():
+    app = Flask(__name__)
+
+    @app.route("/me")
+    @token_required
+    def me():
+        return jsonify(g.user)
+
+    client = app.test_client()
+    assert client.get("/me").status_code == 401
+    assert client.get("/me", headers={"Authorization": "Bearer nope"}).status_code == 401
+    token = create_token({"id": 1})
+    assert client.get("/me", headers={"Authorization": f"Bearer {token}"}).json == {"id": 1}
@@ -0,0 +1,45 @@
+from flask import Flask
+
+from app import app
+from benchmarks.bench_routes import SCENARIOS, compare, queries_per_request
+from middleware.metrics_middleware import init_metrics
+
+CTX = {
+    "users": [{"id": 1, "username": "bench_user_1", "resource_id": 10, "verification": (10, 100), "token": "t"}],
+    "resource_ids": [10, 11, 12],
+    "points": [(30.25, -97.75)],
+    "changes_token": "token",
+}
+
+
+def test_every_scenario_requests_an_existing_route():
+    adapter = app.url_map.bind("localhost")
+    for name, build in SCENARIOS:
+        method, path, body = build(CTX, CTX["users"][0], 7)
+        assert name.startswith(method)
+        adapter.match(path.split("?")[0], method=method)
+
+
+def test_compare_flags_slower_routes_and_extra_queries():
+    baseline = {"rps": 100.0, "p99_ms": 50.0, "queries": 2.0}
+    assert compare({"rps": 95.0, "p99_ms": 55.0, "queries": 2.0}, baseline, 0.15) == (["req/s -5%", "p99 +10%"], False)
+    assert compare({"rps": 80.0, "p99_ms": 50.0, "queries": 2.0}, baseline, 0.15)[1]
+    assert compare({"rps": 100.0, "p99_ms": 60.0, "queries": 2.0}, baseline, 0.15)[1]
+    assert compare({"rps": 100.0, "p99_ms": 50.0, "queries": 3.0}, baseline, 0.15) == (
+        ["req/s +0%", "p99 +0%", "queries +1.0"], True,
+    )
+    assert not compare({"rps": 100.0, "p99_ms": 50.0, "queries": 1.0}, baseline, 0.15)[1]
+
+
+def test_queries_per_request_reads_the_request_metric():
+    flask_app = Flask(__name__)
+    init_metrics(flask_app)
+
+    @flask_app.route("/ping")
+    def ping():
+        return "pong"
+
+    def build(ctx, user, i):
+        return "GET", "/ping", None
+
+    assert queries_per_request(flask_app, build, CTX, 3, iter(range(3))) == 0
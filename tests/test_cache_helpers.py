@@ -0,0 +1,24 @@
+from utils.cache_helpers import MISSING, TTLCache
+
+
+def test_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("utils.cache_helpers.time.monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("a", None)
+    cache.set("b", 1, ttl=60)
+    assert cache.get("a") is None
+    now[0] += 6
+    assert cache.get("a") is MISSING
+    assert cache.get("b") == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["hits"] == 3
@@ -0,0 +1,57 @@
+import pytest
+
+from utils.change_feed import SyncExpired, parse_changes_args, read_changes, START
+from utils.pagination_helpers import decode_change_token, encode_cursor
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append(params)
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.cursor_ = FakeCursor(rows)
+
+    def cursor(self):
+        return self.cursor_
+
+
+def test_change_token_round_trip():
+    assert decode_change_token(encode_cursor(123, 4, 0)) == (123, 4, 0)
+    with pytest.raises(ValueError):
+        decode_change_token("not a token")
+
+
+def test_parse_changes_args():
+    assert parse_changes_args({}) == (START, 500)
+    assert parse_changes_args({"since": encode_cursor(9, 1, 0), "limit": "10"}) == ((9, 1, 0), 10)
+
+
+def test_token_older_than_the_expired_tombstones_must_sync_again():
+    with pytest.raises(SyncExpired):
+        read_changes(FakeConnection([(50, None, None, None, None)]), (40, 1, 0), 10)
+
+
+def test_only_deletions_need_no_resource_lookup():
+    rows = [(0, 60, 1, 0, True), (0, 60, 2, 7, True), (0, 61, 3, 0, True)]
+    connection = FakeConnection(rows)
+    changes = read_changes(connection, (55, 0, 0), 2)
+    assert changes["deleted"] == {"resources": [1], "verifications": [{"id": 7, "resource_id": 2}]}
+    assert changes["resources"] == []
+    assert changes["has_more"] is True
+    assert decode_change_token(changes["next"]) == (60, 2, 7)
+    assert len(connection.cursor_.executed) == 1
+
+
+def test_nothing_changed_keeps_the_position():
+    changes = read_changes(FakeConnection([(0, None, None, None, None)]), (70, 3, 0), 10)
+    assert decode_change_token(changes["next"]) == (70, 3, 0)
+    assert changes["has_more"] is False
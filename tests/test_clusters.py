@@ -0,0 +1,38 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from utils.clusters import CELL_BITS, clusters_query, parse_clusters_args, tile_key
+from utils.geo_helpers import tile_range, tile_x, tile_y
+
+
+def test_tiles_of_the_world_and_of_a_point():
+    assert (tile_x(-180, 0), tile_y(85, 0)) == (0, 0)
+    assert (tile_x(180, 2), tile_y(-90, 2)) == (3, 3)
+    assert (tile_x(0, 1), tile_y(0, 1)) == (1, 1)
+    assert tile_range((-97.8, 30.2, -97.7, 30.3), 10) == (233, 234, 421, 421)
+
+
+def test_parse_clusters_args():
+    zoom, tiles, category = parse_clusters_args(MultiDict({"bbox": "-97.8,30.2,-97.7,30.3", "zoom": "10"}))
+    assert (zoom, tiles, category) == (10, (233, 234, 421, 421), None)
+
+
+@pytest.mark.parametrize("args", [
+    {"bbox": "-97.8,30.2,-97.7,30.3"},
+    {"bbox": "-97.8,30.2,-97.7,30.3", "zoom": "17"},
+    {"bbox": "-97.8,30.2,-97.7,30.3", "zoom": "x"},
+    {"zoom": "10"},
+    {"bbox": "-180,-85,180,85", "zoom": "10"},
+    {"bbox": "-97.8,30.2,-97.7,30.3", "zoom": "10", "category": "Nope"},
+])
+def test_parse_clusters_args_rejects(args):
+    with pytest.raises(ValueError):
+        parse_clusters_args(MultiDict(args))
+
+
+def test_query_reads_the_cells_of_the_tiles():
+    sql, params = clusters_query(10, (233, 234, 421, 421), "Food")
+    cells = 1 << CELL_BITS
+    assert params == [10, 233 * cells, 235 * cells - 1, 421 * cells, 422 * cells - 1, "Food"]
+    assert "AND category = %s" in sql
+    assert tile_key(10, (233, 234, 421, 421), "Food") == "10/233-234/421-421:Food"
@@ -0,0 +1,97 @@
+import psycopg2.errors
+
+from utils.data_access import DELETE_RESOURCE, PreparedStatement, ROLLBACK_TO_SAVEPOINT
+
+
+class FakeConnection:
+    pass
+
+
+class FakeCursor:
+    """Records statements; failures maps a statement prefix to the errors it raises, in order."""
+
+    def __init__(self, connection=None, failures=None):
+        self.connection = connection or FakeConnection()
+        self.failures = failures or {}
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        for prefix, errors in self.failures.items():
+            if prefix in sql and errors:
+                raise errors.pop(0)
+
+
+def statement():
+    return PreparedStatement(
+        "find_thing",
+        "SELECT * FROM things WHERE id = %(id)s AND name LIKE 'a%%' AND owner = %(id)s OR tag = %(tag)s",
+        {"id": "integer", "tag": "text"},
+    )
+
+
+def test_rewrites_placeholders_to_positional_parameters():
+    prepared = statement()
+    assert prepared.params == ["id", "tag"]
+    assert prepared.prepare_sql == (
+        "PREPARE find_thing (integer, text) AS "
+        "SELECT * FROM things WHERE id = $1 AND name LIKE 'a%' AND owner = $1 OR tag = $2"
+    )
+    assert prepared.execute_sql == "EXECUTE find_thing (%(id)s, %(tag)s)"
+
+
+def test_prepares_once_per_connection():
+    prepared = statement()
+    connection = FakeConnection()
+    first, second = FakeCursor(connection), FakeCursor(connection)
+    prepared.execute(first, {"id": 1, "tag": "x"})
+    prepared.execute(second, {"id": 2, "tag": "y"})
+    assert any("PREPARE find_thing" in sql for sql in first.statements)
+    assert not any("PREPARE" in sql for sql in second.statements)
+
+
+def test_failed_first_execute_keeps_the_statement_prepared():
+    prepared = statement()
+    connection = FakeConnection()
+    failing = FakeCursor(connection, {"EXECUTE": [psycopg2.errors.ForeignKeyViolation("no such user")]})
+    try:
+        prepared.execute(failing, {"id": 1, "tag": "x"})
+    except psycopg2.errors.ForeignKeyViolation:
+        pass
+    else:
+        raise AssertionError("the EXECUTE error should reach the caller")
+
+    cursor = FakeCursor(connection)
+    prepared.execute(cursor, {"id": 1, "tag": "x"})
+    assert not any("PREPARE" in sql for sql in cursor.statements)
+
+
+def test_statement_already_in_the_session_is_taken_as_prepared():
+    prepared = statement()
+    cursor = FakeCursor(failures={"PREPARE": [psycopg2.errors.DuplicatePreparedStatement("exists")]})
+    prepared.execute(cursor, {"id": 1, "tag": "x"})
+    assert cursor.statements[1] == ROLLBACK_TO_SAVEPOINT
+    assert cursor.statements[2].endswith(prepared.execute_sql)
+
+    again = FakeCursor(cursor.connection)
+    prepared.execute(again, {"id": 1, "tag": "x"})
+    assert not any("PREPARE" in sql for sql in again.statements)
+
+
+def test_lost_statement_is_prepared_again_and_retried():
+    prepared = statement()
+    connection = FakeConnection()
+    prepared.execute(FakeCursor(connection), {"id": 1, "tag": "x"})
+
+    cursor = FakeCursor(connection, {"EXECUTE": [psycopg2.errors.InvalidSqlStatementName("gone")]})
+    prepared.execute(cursor, {"id": 1, "tag": "x"})
+    assert cursor.statements[1] == ROLLBACK_TO_SAVEPOINT
+    assert "PREPARE find_thing" in cursor.statements[2]
+    assert cursor.statements[3] == prepared.execute_sql
+
+
+def test_delete_returns_the_resource_columns_of_other_writes():
+    for column in ("search_vector", "version", "changed_at", "r.*", "d.*"):
+        assert column not in DELETE_RESOURCE.sql.split("RETURNING r.*")[1]
+    assert "r.lat::float8 AS lat" in DELETE_RESOURCE.sql
+    assert "u.username AS author_username" in DELETE_RESOURCE.sql
@@ -0,0 +1,111 @@
+import psycopg2.extensions
+import pytest
+
+from utils.db_helpers import (
+    ConnectionPool, PoolTimeout, consolidate_verifications_in_resources, iter_consolidated_resources,
+    resource_with_summary,
+)
+
+
+class FakeConnection:
+    closed = False
+
+    def __init__(self):
+        self.rolled_back = 0
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rolled_back += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = True
+
+
+def test_connections_are_reused_and_rolled_back_when_returned():
+    pool = ConnectionPool(FakeConnection, maxconn=2)
+    connection = pool.getconn()
+    connection.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+    pool.putconn(connection)
+    assert connection.rolled_back == 1
+    assert pool.getconn() is connection
+    assert pool.stats()["size"] == 1
+
+
+def test_borrowing_beyond_maxconn_times_out():
+    pool = ConnectionPool(FakeConnection, maxconn=1, timeout=0.05)
+    pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_closed_connections_are_replaced():
+    pool = ConnectionPool(FakeConnection, maxconn=1)
+    connection = pool.getconn()
+    connection.close()
+    pool.putconn(connection)
+    replacement = pool.getconn()
+    assert replacement is not connection
+    assert pool.stats()["discarded"] == 1
+
+
+def test_failed_connect_frees_its_slot():
+    attempts = []
+
+    def connect():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise psycopg2.OperationalError("down")
+        return FakeConnection()
+
+    pool = ConnectionPool(connect, maxconn=1, timeout=0.05)
+    with pytest.raises(psycopg2.OperationalError):
+        pool.getconn()
+    assert isinstance(pool.getconn(), FakeConnection)
+
+
+def row(resource_id, verification_id=None, title="Food bank"):
+    return {
+        "id": resource_id,
+        "title": title,
+        "verification_id": verification_id,
+        "verification_status": "Active" if verification_id else None,
+        "verification_note": f"note {verification_id}" if verification_id else None,
+        "verificationCreatedAt": None,
+        "verification_author_username": "ana" if verification_id else None,
+        "verification_author_id": 7 if verification_id else None,
+    }
+
+
+def test_rows_fold_into_resources_with_their_verifications():
+    resources = list(iter_consolidated_resources([row(2, 20), row(2, 21), row(1)]))
+    assert [resource["id"] for resource in resources] == [2, 1]
+    assert [v["verification_id"] for v in resources[0]["verifications"]] == [20, 21]
+    assert resources[0]["verifications"][0] == {
+        "verification_id": 20, "status": "Active", "note": "note 20", "createdAt": None,
+        "verification_author_username": "ana", "verification_author_id": 7,
+    }
+    assert resources[1]["verifications"] == []
+    assert "verification_status" not in resources[0]
+
+
+def test_consolidation_keeps_query_order_for_rows_that_are_not_adjacent():
+    resources = consolidate_verifications_in_resources([row(2, 20), row(1, 10), row(2, 21)])
+    assert [resource["id"] for resource in resources] == [2, 1]
+    assert [v["verification_id"] for v in resources[0]["verifications"]] == [20, 21]
+
+
+def test_summary_columns_fold_into_a_verification_summary():
+    row = {"id": 1, "summary_latest_status": "Active", "summaryLastVerifiedAt": "Thu, 01 Jan 2026 00:00:00 GMT",
+           "summary_total": 3, "summary_active": 2, "summary_temporarily_closed": 1,
+           "summary_no_longer_available": 0, "summary_info_needs_update": 0}
+    assert resource_with_summary(row) == {"id": 1, "verification_summary": {
+        "latest_status": "Active",
+        "lastVerifiedAt": "Thu, 01 Jan 2026 00:00:00 GMT",
+        "total": 3,
+        "counts": {"Active": 2, "Temporarily Closed": 1, "No Longer Available": 0, "Info Needs Update": 0},
+    }}
@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+
+from flask import Flask, jsonify
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import http_date
+
+from utils.etag_helpers import catalog_seed, conditional_response, is_not_modified, validators
+
+MODIFIED = datetime(2026, 1, 1, 12, 0, 0, 250000, tzinfo=timezone.utc)
+
+
+def test_catalog_seed_ignores_arg_order():
+    first = catalog_seed(7, "/resources", MultiDict([("limit", "20"), ("category", "Food")]))
+    assert first == catalog_seed(7, "/resources", MultiDict([("category", "Food"), ("limit", "20")]))
+    assert first != catalog_seed(8, "/resources", MultiDict([("category", "Food"), ("limit", "20")]))
+    assert first != catalog_seed(7, "/resources", MultiDict([("category", "Food"), ("limit", "20")]), ndjson=True)
+
+
+def test_validators_truncate_to_http_date_precision():
+    etag, last_modified = validators("7:1", MODIFIED)
+    assert len(etag) == 40
+    assert last_modified == MODIFIED.replace(microsecond=0)
+
+
+def test_is_not_modified_prefers_if_none_match():
+    etag, last_modified = validators("7:1", MODIFIED)
+    since = http_date(last_modified)
+    assert is_not_modified(etag, last_modified, f'"{etag}"', None)
+    assert is_not_modified(etag, last_modified, "*", None)
+    assert not is_not_modified(etag, last_modified, '"other"', since)
+    assert is_not_modified(etag, last_modified, None, since)
+    assert not is_not_modified(etag, last_modified, None, "not a date")
+    assert not is_not_modified(etag, last_modified, None, None)
+
+
+def _app(calls):
+    app = Flask(__name__)
+
+    @app.route("/things/<int:thing_id>")
+    @conditional_response(lambda thing_id: None if thing_id == 2 else (f"7:{thing_id}", MODIFIED))
+    def show(thing_id):
+        calls.append(thing_id)
+        if thing_id == 3:
+            return jsonify({"error": "Not found"}), 404
+        return jsonify({"id": thing_id})
+
+    return app.test_client()
+
+
+def test_conditional_response_skips_the_view_on_a_match():
+    calls = []
+    client = _app(calls)
+    first = client.get("/things/1")
+    assert len(first.headers["ETag"]) == 42
+    assert first.headers["Cache-Control"] == "no-cache"
+    assert first.headers["Last-Modified"] == http_date(MODIFIED.replace(microsecond=0))
+
+    second = client.get("/things/1", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert calls == [1]
+
+    # Without a version, or on errors, no validators are sent.
+    assert "ETag" not in client.get("/things/2").headers
+    assert "ETag" not in client.get("/things/3").headers
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    calls = []
+    client = _app(calls)
+    since = http_date(MODIFIED.replace(microsecond=0))
+    assert client.get("/things/1", headers={"If-Modified-Since": since}).status_code == 304
+    assert client.get("/things/1", headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get("/things/1", headers={"If-None-Match": '"other"', "If-Modified-Since": since}).status_code == 200
+    assert client.get("/things/1", headers={"If-Modified-Since": "not a date"}).status_code == 200
+    assert calls == [1, 1]
@@ -0,0 +1,43 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from utils.geo_helpers import bounding_box, haversine_km, parse_coordinate
+from utils.resource_queries import nearby_query
+
+
+def test_haversine():
+    assert haversine_km(30.27, -97.74, 30.27, -97.74) == 0
+    # Austin to Dallas, about 293 km.
+    assert 285 < haversine_km(30.2672, -97.7431, 32.7767, -96.7970) < 300
+
+
+def test_bounding_box_contains_every_point_within_the_radius():
+    lat, lng, radius = 60.0, 10.0, 50.0
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius)
+    for bearing_lat, bearing_lng in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        # Step out until just inside the radius along each axis.
+        step = 0.0
+        while haversine_km(lat, lng, lat + bearing_lat * (step + 0.01), lng + bearing_lng * (step + 0.01)) <= radius:
+            step += 0.01
+        point_lat, point_lng = lat + bearing_lat * step, lng + bearing_lng * step
+        assert min_lat <= point_lat <= max_lat and min_lng <= point_lng <= max_lng
+
+
+def test_bounding_box_widens_at_the_poles_and_antimeridian():
+    assert bounding_box(89.9, 0, 50)[2:] == (-180.0, 180.0)
+    assert bounding_box(0, 179.9, 50)[2:] == (-180.0, 180.0)
+
+
+def test_parse_coordinate():
+    assert parse_coordinate("45.5", "lat", 90) == 45.5
+    for value in (None, "", "north", "91", "nan", "inf"):
+        with pytest.raises(ValueError):
+            parse_coordinate(value, "lat", 90)
+
+
+def test_nearby_query_validates_the_radius():
+    sql, params = nearby_query(MultiDict({"lat": "30.27", "lng": "-97.74", "radius": "5"}))
+    assert params[:3] == [30.27, 30.27, -97.74]
+    assert params[-2:] == [5.0, 50]
+    with pytest.raises(ValueError):
+        nearby_query(MultiDict({"lat": "30.27", "lng": "-97.74", "radius": "0"}))
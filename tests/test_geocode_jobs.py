@@ -0,0 +1,19 @@
+from utils import geocode_jobs
+from utils.geocode_jobs import backoff_seconds, geocode_async_requested
+
+
+def test_request_mode_wins_over_the_environment(monkeypatch):
+    monkeypatch.setenv("GEOCODE_MODE", "async")
+    assert geocode_async_requested({})
+    assert not geocode_async_requested({"geocode": "sync"})
+    monkeypatch.delenv("GEOCODE_MODE")
+    assert not geocode_async_requested({})
+    assert geocode_async_requested({"geocode": "async"})
+
+
+def test_backoff_doubles_with_jitter_up_to_the_maximum(monkeypatch):
+    monkeypatch.setattr(geocode_jobs, "GEOCODE_BACKOFF_BASE", 5)
+    monkeypatch.setattr(geocode_jobs, "GEOCODE_BACKOFF_MAX", 600)
+    for attempts, full in ((1, 5), (2, 10), (4, 40), (20, 600)):
+        for _ in range(20):
+            assert full * 0.5 <= backoff_seconds(attempts) <= full
@@ -0,0 +1,56 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+from utils.json_helpers import JSONProvider, dumps, iter_json_chunks, wants_ndjson
+
+ITEMS = [{"id": n, "title": f"Resource {n}"} for n in range(5)]
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 5, 10])
+def test_chunks_join_into_a_json_array(batch_size):
+    assert json.loads(b"".join(iter_json_chunks(ITEMS, batch_size=batch_size))) == ITEMS
+
+
+def test_chunks_as_ndjson():
+    body = b"".join(iter_json_chunks(ITEMS, ndjson=True, batch_size=2))
+    assert [json.loads(line) for line in body.splitlines()] == ITEMS
+    assert b"".join(iter_json_chunks([], ndjson=True)) == b""
+    assert b"".join(iter_json_chunks([])) == b"[]\n"
+
+
+def test_chunks_are_produced_lazily():
+    def items():
+        yield from ITEMS[:2]
+        raise RuntimeError("not read yet")
+
+    chunks = iter_json_chunks(items(), batch_size=2)
+    assert next(chunks) == b"["
+    assert json.loads(b"[" + next(chunks) + b"]") == ITEMS[:2]
+    with pytest.raises(RuntimeError):
+        next(chunks)
+
+
+def test_dumps_matches_the_default_flask_provider():
+    value = {"b": Decimal("1.5"), "a": uuid.UUID(int=1),
+             "at": datetime(2026, 1, 1, tzinfo=timezone.utc), "title": "Café"}
+    app = Flask(__name__)
+    assert json.loads(dumps(value)) == json.loads(app.json.dumps(value))
+    assert list(json.loads(dumps(value))) == ["a", "at", "b", "title"]
+    app.json = JSONProvider(app)
+    assert app.json.dumps(value) == dumps(value).decode("utf-8")
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, False),
+    ("application/json", False),
+    ("application/x-ndjson", True),
+    ("application/json;q=0.5, application/x-ndjson", True),
+    ("*/*", False),
+])
+def test_wants_ndjson(accept, expected):
+    assert wants_ndjson(accept) is expected
@@ -0,0 +1,76 @@
+import pytest
+
+from utils import mapbox_helpers
+
+
+class FakeResponse:
+    status_code = 200
+    text = ""
+
+    def __init__(self, batch):
+        self.batch = batch
+
+    def json(self):
+        return {"batch": self.batch}
+
+
+def feature(lng, lat):
+    return {"features": [{"geometry": {"coordinates": [lng, lat]}}]}
+
+
+@pytest.fixture
+def no_persistent_cache(monkeypatch):
+    monkeypatch.setattr(mapbox_helpers, "_read_persistent_cache", lambda keys: {})
+    monkeypatch.setattr(mapbox_helpers, "_write_persistent_cache", lambda results: None)
+    yield
+    mapbox_helpers.set_geocoder(None)
+
+
+def test_batch_response_shorter_than_the_queries(monkeypatch):
+    monkeypatch.setattr(mapbox_helpers, "_mapbox_token", lambda: "test")
+    monkeypatch.setattr(mapbox_helpers.requests, "post",
+                        lambda *args, **kwargs: FakeResponse([feature(-97.7, 30.3), {"features": []}]))
+    results = mapbox_helpers.mapbox_batch_geocode([("1 Main St", "Austin"), ("2 Main St", "Austin"), ("3 Main St", "Austin")])
+    assert results[:2] == [(30.3, -97.7), None]
+    assert isinstance(results[2], Exception)
+
+
+def test_geocode_addresses_reports_missing_batch_results_as_failures(no_persistent_cache):
+    mapbox_helpers.set_geocoder(lambda address, city: None, lambda locations: [(30.3, -97.7)])
+    results = mapbox_helpers.geocode_addresses([("1 Main St", "Austin"), ("2 Main St", "Austin"), ("1 main st", "austin")])
+    assert results[0] == (30.3, -97.7)
+    assert isinstance(results[1], Exception)
+    assert results[2] == (30.3, -97.7)
+
+
+def test_failures_are_not_cached(no_persistent_cache):
+    mapbox_helpers.set_geocoder(lambda address, city: None, lambda locations: [])
+    assert isinstance(mapbox_helpers.geocode_addresses([("1 Main St", "Austin")])[0], Exception)
+    mapbox_helpers.set_geocoder(lambda address, city: None, lambda locations: [(1.0, 2.0)])
+    assert mapbox_helpers.geocode_addresses([("1 Main St", "Austin")]) == [(1.0, 2.0)]
+
+
+def test_locations_are_normalized():
+    assert mapbox_helpers.normalize_location("  12 Main  St. ", "AUSTIN,") == mapbox_helpers.normalize_location("12 main st", "austin")
+
+
+def test_geocode_address_caches_results_and_misses(no_persistent_cache):
+    calls = []
+
+    def geocoder(address, city):
+        calls.append(address)
+        return None if address.startswith("nowhere") else ("30.3", "-97.7")
+
+    mapbox_helpers.set_geocoder(geocoder)
+    assert mapbox_helpers.geocode_address("1 Main St", "Austin") == (30.3, -97.7)
+    assert mapbox_helpers.geocode_address("1 main st.", "austin") == (30.3, -97.7)
+    assert mapbox_helpers.geocode_address("nowhere", "Austin") is None
+    assert mapbox_helpers.geocode_address("nowhere", "Austin") is None
+    assert calls == ["1 Main St", "nowhere"]
+
+
+def test_geocode_address_uses_the_persistent_cache(monkeypatch, no_persistent_cache):
+    key = mapbox_helpers.normalize_location("1 Main St", "Austin")
+    monkeypatch.setattr(mapbox_helpers, "_read_persistent_cache", lambda keys: {key: (1.0, 2.0)})
+    mapbox_helpers.set_geocoder(lambda address, city: pytest.fail("should not geocode"))
+    assert mapbox_helpers.geocode_address("1 Main St", "Austin") == (1.0, 2.0)
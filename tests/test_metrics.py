@@ -0,0 +1,60 @@
+from utils import metrics
+from utils.metrics import Collected, Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("t_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value, "/a")
+    histogram.observe(0.5, 'say "hi"\n')
+    assert histogram.totals() == (4, 3.05)
+    assert histogram.render() == [
+        "# HELP t_seconds Test.",
+        "# TYPE t_seconds histogram",
+        't_seconds_bucket{route="/a",le="0.1"} 1',
+        't_seconds_bucket{route="/a",le="1"} 2',
+        't_seconds_bucket{route="/a",le="+Inf"} 3',
+        't_seconds_sum{route="/a"} 2.55',
+        't_seconds_count{route="/a"} 3',
+        't_seconds_bucket{route="say \\"hi\\"\\n",le="0.1"} 0',
+        't_seconds_bucket{route="say \\"hi\\"\\n",le="1"} 1',
+        't_seconds_bucket{route="say \\"hi\\"\\n",le="+Inf"} 1',
+        't_seconds_sum{route="say \\"hi\\"\\n"} 0.5',
+        't_seconds_count{route="say \\"hi\\"\\n"} 1',
+    ]
+
+
+def test_collected_metrics_that_fail_are_left_out():
+    ok = Collected("t_total", "Test.", "counter", ("state",), lambda: {("idle",): 2.0, ("in_use",): 1})
+    assert ok.render()[2:] == ['t_total{state="idle"} 2', 't_total{state="in_use"} 1']
+    assert Collected("t_broken", "Test.", "gauge", (), lambda: 1 / 0).render() == []
+
+
+def test_queries_are_counted_per_request(monkeypatch):
+    monkeypatch.setattr(metrics, "SLOW_REQUEST_MS", 0)
+    metrics.record_query("SELECT 1", 0.01)  # outside a request: not attributed to any
+
+    stats, token = metrics.start_request()
+    metrics.record_query("SELECT 1", 0.01)
+    metrics.record_query("SELECT 2", 0.02)
+    assert (stats.queries, round(stats.db_seconds, 6), stats.statements) == (2, 0.03, None)
+
+    metrics.finish_request(token, stats, "GET", "app", "/counted", 200, "/counted")
+    assert 'http_request_db_queries_sum{method="GET",blueprint="app",route="/counted"} 2.0' in (
+        metrics.REQUEST_DB_QUERIES.render()
+    )
+    metrics.record_query("SELECT 3", 0.01)
+    assert stats.queries == 2
+
+
+def test_slow_requests_log_their_sql(monkeypatch, caplog):
+    monkeypatch.setattr(metrics, "SLOW_REQUEST_MS", 0.001)
+    monkeypatch.setattr(metrics, "SLOW_REQUEST_SQL_CHARS", 20)
+    stats, token = metrics.start_request()
+    metrics.record_query("SELECT *\n  FROM resources WHERE id = %s", 0.002)
+    metrics.finish_request(token, stats, "GET", "app", "/test", 200, "/test?id=1")
+    [record] = caplog.records
+    assert record.levelname == "WARNING"
+    output = record.getMessage()
+    assert "Slow request: GET /test?id=1 -> 200" in output
+    assert "SELECT * FROM resour..." in output
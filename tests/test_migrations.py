@@ -0,0 +1,64 @@
+import pytest
+
+from utils.migrations import Migration, MigrationError, _check_applied, discover_migrations
+
+
+def write(directory, filename, sql):
+    path = directory / filename
+    path.write_text(sql, encoding="utf-8")
+    return path
+
+
+def test_repository_migrations_are_numbered_without_gaps():
+    migrations = discover_migrations()
+    assert [migration.version for migration in migrations] == list(range(1, len(migrations) + 1))
+
+
+def test_repository_no_transaction_migrations_split_into_statements():
+    for migration in discover_migrations():
+        if not migration.in_transaction:
+            assert migration.statements()
+            assert all("CREATE INDEX CONCURRENTLY" in statement for statement in migration.statements())
+
+
+def test_discover_rejects_gaps_and_ignores_other_files(tmp_path):
+    write(tmp_path, "0001_first.sql", "SELECT 1;\n")
+    write(tmp_path, "README.md", "notes")
+    assert [migration.name for migration in discover_migrations(tmp_path)] == ["first"]
+
+    write(tmp_path, "0003_third.sql", "SELECT 3;\n")
+    with pytest.raises(MigrationError, match="Expected migration 0002"):
+        discover_migrations(tmp_path)
+
+
+def test_no_transaction_statements_run_one_at_a_time(tmp_path):
+    migration = Migration(2, "indexes", write(tmp_path, "0002_indexes.sql", (
+        "-- migrate: no-transaction\n"
+        "-- Built without blocking writes.\n"
+        "CREATE INDEX CONCURRENTLY a_idx\n"
+        "  ON a (x);\n"
+        "\n"
+        "CREATE INDEX CONCURRENTLY b_idx ON b (y);\n"
+    )))
+    assert not migration.in_transaction
+    assert migration.statements() == [
+        "CREATE INDEX CONCURRENTLY a_idx\n  ON a (x);",
+        "CREATE INDEX CONCURRENTLY b_idx ON b (y);",
+    ]
+
+
+def test_unterminated_statement_is_an_error(tmp_path):
+    migration = Migration(2, "indexes", write(tmp_path, "0002_indexes.sql", (
+        "-- migrate: no-transaction\nCREATE INDEX CONCURRENTLY a_idx ON a (x)\n"
+    )))
+    with pytest.raises(MigrationError, match="terminating"):
+        migration.statements()
+
+
+def test_edited_or_unknown_applied_migrations_are_errors(tmp_path):
+    migration = Migration(1, "first", write(tmp_path, "0001_first.sql", "SELECT 1;\n"))
+    _check_applied([migration], {1: ("first", migration.checksum, None)})
+    with pytest.raises(MigrationError, match="edited"):
+        _check_applied([migration], {1: ("first", "0" * 64, None)})
+    with pytest.raises(MigrationError, match="not in"):
+        _check_applied([migration], {2: ("second", "0" * 64, None)})
@@ -0,0 +1,65 @@
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from utils.pagination_helpers import decode_cursor, encode_cursor, next_page_headers, parse_limit
+from utils.resource_queries import index_query, paginate, resource_filters
+
+Record = namedtuple("Record", "id createdAt")
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 1, 12, 30, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+@pytest.mark.parametrize("token", ["", "!!!", encode_cursor(1), encode_cursor("not a date", 1)])
+def test_invalid_cursors(token):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(token)
+
+
+def test_parse_limit():
+    assert parse_limit(None) == 50
+    assert parse_limit("10") == 10
+    assert parse_limit("1000") == 200
+    for value in ("0", "-1", "ten"):
+        with pytest.raises(ValueError):
+            parse_limit(value)
+
+
+def test_paginate_trims_the_extra_record():
+    created_at = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    records = [Record(3, created_at), Record(2, created_at), Record(1, created_at)]
+    page, next_cursor = paginate(records, 2)
+    assert page == records[:2]
+    assert decode_cursor(next_cursor) == (created_at, 2)
+    assert paginate(records[:2], 2) == (records[:2], None)
+    assert paginate(records, None) == (records, None)
+
+
+def test_next_page_headers():
+    headers = next_page_headers("http://api/resources", MultiDict({"limit": "2", "cursor": "old"}), "new")
+    assert headers["X-Next-Cursor"] == "new"
+    assert headers["Link"] == '<http://api/resources?limit=2&cursor=new>; rel="next"'
+    assert next_page_headers("http://api/resources", MultiDict(), None) == {}
+
+
+def test_resource_filters():
+    filters, params = resource_filters(MultiDict({"category": "Food", "city": "Austin", "hidden": "false"}))
+    assert filters == ["r.category = %s", "lower(r.city) = lower(%s)", "r.hidden_at IS NULL"]
+    assert params == ["Food", "Austin"]
+    for args in ({"category": "Pets"}, {"hidden": "maybe"}):
+        with pytest.raises(ValueError):
+            resource_filters(MultiDict(args))
+
+
+def test_index_query_fetches_one_extra_row_after_the_cursor():
+    created_at = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    sql, params, limit = index_query(MultiDict({"limit": "10", "cursor": encode_cursor(created_at, 5), "category": "Food"}))
+    assert limit == 10
+    assert params == ["Food", created_at, 5, 11]
+    assert "(r.created_at, r.id) < (%s, %s)" in sql
+    assert index_query(MultiDict())[2] is None
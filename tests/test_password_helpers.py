@@ -0,0 +1,45 @@
+import time
+
+import pytest
+
+from utils.password_helpers import (
+    PasswordHasher, PasswordHasherBusy, check_password, hash_password, needs_rehash,
+)
+
+
+def test_inline_hasher_limits_nothing_after_it_returns():
+    hasher = PasswordHasher(workers=0, queue_limit=1, timeout=1)
+    assert hasher.run(len, "abc") == 3
+    assert hasher.run(len, "abcd") == 4
+    assert hasher.queue_depth() == 0
+
+
+def test_timed_out_work_keeps_its_slot_until_it_ends():
+    hasher = PasswordHasher(workers=1, queue_limit=1, timeout=0.05)
+    hasher.run(len, "warm up the pool")
+    with pytest.raises(TimeoutError):
+        hasher.run(time.sleep, 0.5)
+    assert hasher.queue_depth() == 1
+    with pytest.raises(PasswordHasherBusy):
+        hasher.run(len, "abc")
+
+    deadline = time.monotonic() + 5
+    while hasher.queue_depth() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert hasher.queue_depth() == 0
+
+
+def test_needs_rehash(monkeypatch):
+    monkeypatch.setattr("utils.password_helpers.BCRYPT_ROUNDS", 12)
+    assert not needs_rehash("$2b$12$abcdefghijklmnopqrstuv")
+    assert needs_rehash("$2b$10$abcdefghijklmnopqrstuv")
+    assert needs_rehash("not a hash")
+
+
+def test_hash_and_check_round_trip(monkeypatch):
+    monkeypatch.setattr("utils.password_helpers.password_hasher",
+                        PasswordHasher(workers=0, queue_limit=1, timeout=1))
+    hashed = hash_password("secret", rounds=4)
+    assert hashed.startswith("$2b$04$")
+    assert check_password("secret", hashed)
+    assert not check_password("wrong", hashed)
@@ -0,0 +1,113 @@
+import pytest
+from flask import Flask
+
+from utils import rate_limit
+from utils.rate_limit import (
+    MemoryBackend, RateLimiter, client_ip, int_setting, load_limits, parse_rate, rate_limit_key, rate_limited,
+    retry_after_header,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == (10, 10 / 60)
+    assert parse_rate(" 2 / Seconds ") == (2, 2.0)
+    assert parse_rate("OFF") is None
+    for value in ("10", "ten/minute", "10/day", "0/minute"):
+        with pytest.raises(ValueError):
+            parse_rate(value)
+
+
+def test_bucket_empties_then_refills(clock):
+    backend = MemoryBackend()
+    assert [backend.take("a", 2, 1.0)[0] for _ in range(3)] == [True, True, False]
+    assert backend.take("a", 2, 1.0) == (False, 1.0)
+    # Other keys have their own bucket.
+    assert backend.take("b", 2, 1.0) == (True, 0.0)
+
+    clock.now += 0.5
+    assert backend.take("a", 2, 1.0) == (False, 0.5)
+    clock.now += 10
+    assert [backend.take("a", 2, 1.0)[0] for _ in range(3)] == [True, True, False]
+
+
+def test_least_recently_used_buckets_are_dropped(clock):
+    backend = MemoryBackend(maxsize=1)
+    backend.take("a", 1, 1.0)
+    assert not backend.take("a", 1, 1.0)[0]
+    backend.take("b", 1, 1.0)
+    assert backend.take("a", 1, 1.0)[0]
+
+
+def test_limits_come_from_the_environment(monkeypatch, clock):
+    monkeypatch.setenv("RATE_LIMIT_SIGN_UP", "off")
+    monkeypatch.setenv("RATE_LIMIT_SIGN_IN", "1/hour")
+    limiter = RateLimiter(MemoryBackend())
+    assert limiter.take("sign_up", "ip:1") == 0
+    assert limiter.take("sign_in", "ip:1") == 0
+    assert limiter.take("sign_in", "ip:1") == 3600
+    assert limiter.stats() == {"backend": "MemoryBackend", "allowed": 1, "limited": 1}
+
+
+def test_invalid_or_unknown_settings_name_the_variable(monkeypatch):
+    assert load_limits({"RATE_LIMIT_BACKEND": "postgres"})["sign_in"] == (10, 10 / 60)
+    with pytest.raises(ValueError, match="RATE_LIMIT_SIGN_IN"):
+        load_limits({"RATE_LIMIT_SIGN_IN": "10/fortnight"})
+    with pytest.raises(ValueError, match="Unknown setting RATE_LIMIT_SIGNIN"):
+        load_limits({"RATE_LIMIT_SIGNIN": "10/minute"})
+
+    monkeypatch.setenv("RATE_LIMIT_MEMORY_KEYS", "lots")
+    with pytest.raises(ValueError, match="RATE_LIMIT_MEMORY_KEYS"):
+        int_setting("RATE_LIMIT_MEMORY_KEYS", "10000", 1)
+
+
+def test_client_keys(monkeypatch):
+    assert rate_limit_key({"id": 7}, "10.0.0.1", None) == "user:7"
+    assert rate_limit_key({"id": 7}, "10.0.0.1", None, by="ip") == "ip:10.0.0.1"
+    assert rate_limit_key(None, None, None) == "ip:unknown"
+
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXIES", 0)
+    assert client_ip("10.0.0.1", "1.1.1.1") == "10.0.0.1"
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXIES", 1)
+    assert client_ip("10.0.0.1", "6.6.6.6, 1.1.1.1") == "1.1.1.1"
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXIES", 5)
+    assert client_ip("10.0.0.1", "6.6.6.6, 1.1.1.1") == "6.6.6.6"
+
+
+def test_retry_after_header_rounds_up():
+    assert retry_after_header(0.2) == {"Retry-After": "1"}
+    assert retry_after_header(2.5) == {"Retry-After": "3"}
+
+
+def test_rate_limited_answers_429(monkeypatch, clock):
+    monkeypatch.setenv("RATE_LIMIT_SIGN_UP", "1/minute")
+    monkeypatch.setattr(rate_limit, "rate_limiter", RateLimiter(MemoryBackend()))
+    app = Flask(__name__)
+
+    @app.route("/sign-up", methods=["POST"])
+    @rate_limited("sign_up", by="ip")
+    def sign_up():
+        return "ok"
+
+    client = app.test_client()
+    assert client.post("/sign-up").status_code == 200
+    limited = client.post("/sign-up")
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "60"
+
+    with pytest.raises(KeyError):
+        rate_limited("unknown")
@@ -0,0 +1,45 @@
+import io
+
+import pytest
+
+from utils.resource_helpers import iter_import_records, validate_resource_fields
+
+VALID = {"title": "Pantry", "category": "Food", "address": "1 Main St", "city": "Springfield"}
+
+
+def _records(body, content_type):
+    return list(iter_import_records(io.BytesIO(body.encode()), content_type))
+
+
+def test_validate_resource_fields():
+    assert validate_resource_fields(VALID) is None
+    assert validate_resource_fields([]) == "Each resource must be an object"
+    assert validate_resource_fields({"title": "Pantry"}) == "Missing required fields: category, address, city"
+    assert validate_resource_fields(dict(VALID, category="Parks")) == "Invalid category"
+
+
+def test_ndjson_reports_bad_lines_and_keeps_going():
+    body = '{"title": "Pantry", "category": "Food", "address": "1 Main St", "city": "Springfield"}\n\nnot json\n{"title": "Clinic"}\n'
+    rows = _records(body, "application/x-ndjson; charset=utf-8")
+    assert rows[0] == (1, VALID, None)
+    assert rows[1][:2] == (2, None) and rows[1][2].startswith("Invalid JSON")
+    assert rows[2][2] == "Missing required fields: category, address, city"
+
+
+def test_csv_treats_empty_cells_as_missing():
+    body = "﻿title,category,address,city,description\nPantry,Food,1 Main St,Springfield,\nClinic,Health,,Springfield,Walk-in\n"
+    rows = _records(body, "text/csv")
+    assert rows[0] == (1, dict(VALID, description=None), None)
+    assert rows[1][2] == "Missing required fields: address"
+
+
+def test_json_array_must_be_a_list():
+    assert _records('[{"title": "Pantry", "category": "Food", "address": "1 Main St", "city": "Springfield"}]',
+                    "application/json") == [(1, VALID, None)]
+    with pytest.raises(ValueError):
+        _records('{"title": "Pantry"}', "application/json")
+
+
+def test_unknown_content_type_is_rejected():
+    with pytest.raises(ValueError):
+        _records("", "text/plain")
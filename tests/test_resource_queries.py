@@ -0,0 +1,42 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from utils.pagination_helpers import encode_cursor
+from utils.resource_queries import index_query, search_query, summary_requested
+
+
+def test_summary_requested():
+    assert not summary_requested(MultiDict())
+    assert not summary_requested(MultiDict({"verifications": "full"}))
+    assert summary_requested(MultiDict({"verifications": "summary"}))
+    with pytest.raises(ValueError):
+        summary_requested(MultiDict({"verifications": "latest"}))
+
+
+def test_summary_listing_reads_one_row_per_resource():
+    sql, params, limit = index_query(MultiDict({"verifications": "summary", "limit": "10"}))
+    assert "summary_total" in sql and "verification_id" not in sql
+    assert params == [11] and limit == 10
+
+    sql, _, _ = index_query(MultiDict({"limit": "10"}))
+    assert "verification_id" in sql and "summary_total" not in sql
+
+
+@pytest.mark.parametrize("q", [None, "", "   ", "x" * 201])
+def test_search_query_rejects_missing_or_long_terms(q):
+    args = MultiDict() if q is None else MultiDict({"q": q})
+    with pytest.raises(ValueError):
+        search_query(args)
+
+
+def test_search_query_pages_on_rank():
+    sql, params, limit = search_query(MultiDict({"q": " food bank ", "category": "Food", "limit": "5"}))
+    assert params == ["food bank", "Food", 6] and limit == 5
+    assert "WHERE (rank, id) < (%s, %s)" not in sql
+
+    cursor = encode_cursor(0.25, 42)
+    sql, params, _ = search_query(MultiDict({"q": "food", "cursor": cursor, "limit": "5"}))
+    assert "WHERE (rank, id) < (%s, %s)" in sql
+    assert params == ["food", 0.25, 42, 6]
+    with pytest.raises(ValueError):
+        search_query(MultiDict({"q": "food", "cursor": "not-a-cursor"}))
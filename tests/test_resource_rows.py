@@ -0,0 +1,60 @@
+import copy
+
+from utils.db_helpers import iter_consolidated_resources, resource_with_summary
+from utils.json_helpers import dumps
+from utils.resource_rows import ResourceReader, iter_resources
+
+COLUMNS = ["id", "title", "createdAt", "verification_id", "verification_status", "verification_note",
+           "verificationCreatedAt", "verification_author_username", "verification_author_id"]
+SUMMARY_COLUMNS = ["id", "title", "summary_latest_status", "summaryLastVerifiedAt", "summary_total",
+                   "summary_active", "summary_temporarily_closed", "summary_no_longer_available",
+                   "summary_info_needs_update"]
+
+
+def row(resource_id, verification_id=None):
+    if verification_id is None:
+        return (resource_id, f"Resource {resource_id}", "Thu, 01 Jan 2026 00:00:00 GMT") + (None,) * 6
+    return (resource_id, f"Resource {resource_id}", "Thu, 01 Jan 2026 00:00:00 GMT", verification_id,
+            "Active", f"note {verification_id}", "Fri, 02 Jan 2026 00:00:00 GMT", "ana", 7)
+
+
+ROWS = [row(3, 30), row(3, 31), row(2), row(1, 10)]
+
+
+def test_records_encode_like_the_dict_rows():
+    dict_rows = [dict(zip(COLUMNS, values)) for values in ROWS]
+    expected = list(iter_consolidated_resources(copy.deepcopy(dict_rows)))
+    records = list(ResourceReader(COLUMNS).read(ROWS))
+    assert [record.id for record in records] == [3, 2, 1]
+    assert [len(record.verifications) for record in records] == [2, 0, 1]
+    assert dumps(records) == dumps(expected)
+
+
+def test_summary_records_encode_like_the_dict_rows():
+    rows = [(1, "Resource 1", "Active", "Thu, 01 Jan 2026 00:00:00 GMT", 3, 2, 1, 0, 0),
+            (2, "Resource 2", None, None, 0, 0, 0, 0, 0)]
+    expected = [resource_with_summary(dict(zip(SUMMARY_COLUMNS, values))) for values in rows]
+    assert dumps(list(ResourceReader(SUMMARY_COLUMNS).read(rows))) == dumps(expected)
+
+
+def test_saved_flags():
+    records = list(ResourceReader(COLUMNS, saved_ids={1, 3}).read(ROWS))
+    assert [record.saved for record in records] == [True, False, True]
+    assert not hasattr(next(ResourceReader(COLUMNS).read(ROWS)), "saved")
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.description = None
+
+    def __iter__(self):
+        # Like a named cursor, the description only exists once rows are fetched.
+        for values in self.rows:
+            self.description = COLUMNS
+            yield values
+
+
+def test_iter_resources_reads_a_cursor():
+    assert [record.id for record in iter_resources(FakeCursor(ROWS))] == [3, 2, 1]
+    assert list(iter_resources(FakeCursor([]))) == []
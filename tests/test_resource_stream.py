@@ -0,0 +1,47 @@
+import pytest
+
+from app import app
+from utils.resource_events import EventHub, StreamFilter, StreamFull, parse_stream_filter
+
+
+def test_stream_is_refused_by_single_threaded_workers():
+    response = app.test_client().get("/resources/stream", environ_overrides={"wsgi.multithread": False})
+    assert response.status_code == 503
+
+
+def test_stream_rejects_invalid_filters():
+    response = app.test_client().get("/resources/stream?category=Nope", environ_overrides={"wsgi.multithread": True})
+    assert response.status_code == 400
+
+
+def test_stream_filter_matches_category_city_and_bbox():
+    event = {"category": "Food", "city": "Austin", "lat": 30.27, "lng": -97.74}
+    assert StreamFilter().matches(event)
+    assert StreamFilter(category="Food", city="austin").matches(event)
+    assert not StreamFilter(category="Housing").matches(event)
+    assert not StreamFilter(city="Dallas").matches(event)
+    assert StreamFilter(bbox=(-98, 30, -97, 31)).matches(event)
+    assert not StreamFilter(bbox=(-97, 30, -96, 31)).matches(event)
+    assert not StreamFilter(bbox=(-98, 30, -97, 31)).matches({"category": "Food", "lat": None, "lng": None})
+
+
+def test_parse_stream_filter():
+    event_filter = parse_stream_filter({"category": "Food", "bbox": "-98,30,-97,31"})
+    assert event_filter.category == "Food"
+    assert event_filter.bbox == (-98, 30, -97, 31)
+    with pytest.raises(ValueError):
+        parse_stream_filter({"category": "Nope"})
+
+
+def test_hub_delivers_matching_events_only():
+    hub = EventHub(max_subscribers=2)
+    hub._thread = object()  # no LISTEN connection in tests
+    food, housing = [], []
+    hub.subscribe(StreamFilter(category="Food"), food.append)
+    hub.subscribe(StreamFilter(category="Housing"), housing.append)
+    with pytest.raises(StreamFull):
+        hub.subscribe(StreamFilter(), print)
+
+    hub.dispatch('{"event": "resource.created", "resource_id": 1, "category": "Food"}')
+    assert food == [b'event: resource.created\ndata: {"event": "resource.created", "resource_id": 1, "category": "Food"}\n\n']
+    assert housing == []
@@ -0,0 +1,106 @@
+from datetime import datetime, timezone
+
+from flask import Flask, Response, jsonify
+from werkzeug.datastructures import MultiDict
+
+from utils import response_cache as cache_module
+from utils.etag_helpers import conditional_response
+from utils.response_cache import MemoryBackend, ResponseCache, cached_response, versioned_key
+
+MODIFIED = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_index_key_sorts_args_and_changes_with_the_generation():
+    cache = ResponseCache(MemoryBackend())
+    key = cache.index_key(MultiDict([("limit", "20"), ("category", "Food")]))
+    assert key == cache.index_key(MultiDict([("category", "Food"), ("limit", "20")]))
+    assert key != cache.index_key(MultiDict([("category", "Food"), ("limit", "20")]), ndjson=True)
+
+    cache.invalidate_index()
+    assert cache.index_key(MultiDict([("category", "Food"), ("limit", "20")])) != key
+
+
+def test_invalidating_a_resource_invalidates_the_listings():
+    cache = ResponseCache(MemoryBackend())
+    resource_key, other_key, index_key = cache.resource_key(1), cache.resource_key(2), cache.index_key(MultiDict())
+    cache.invalidate_resource(1)
+    assert cache.resource_key(1) != resource_key
+    assert cache.resource_key(2) == other_key
+    assert cache.index_key(MultiDict()) != index_key
+
+
+def test_versioned_key():
+    assert versioned_key("resource:1:0", None) == "resource:1:0"
+    assert versioned_key("resource:1:0", "abc") == "resource:1:0:abc"
+
+
+def test_cached_body_is_never_sent_with_a_newer_etag(monkeypatch):
+    # Another process wrote: the version moved but this process's generation did not.
+    monkeypatch.setattr(cache_module, "response_cache", ResponseCache(MemoryBackend()))
+    state = {"version": 1, "title": "Old"}
+    app = Flask(__name__)
+
+    @app.route("/things/<int:thing_id>")
+    @conditional_response(lambda thing_id: (f"{state['version']}:{thing_id}", MODIFIED))
+    @cached_response(lambda thing_id: f"thing:{thing_id}:0")
+    def show(thing_id):
+        return jsonify({"title": state["title"]})
+
+    client = app.test_client()
+    first = client.get("/things/1")
+    assert first.json == {"title": "Old"}
+    assert client.get("/things/1").json == {"title": "Old"}
+
+    state.update(version=2, title="New")
+    second = client.get("/things/1")
+    assert second.json == {"title": "New"}
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert client.get("/things/1", headers={"If-None-Match": second.headers["ETag"]}).status_code == 304
+
+
+def _cached_app(monkeypatch, calls):
+    cache = ResponseCache(MemoryBackend())
+    monkeypatch.setattr(cache_module, "response_cache", cache)
+    app = Flask(__name__)
+
+    @app.route("/things/<int:thing_id>")
+    @cached_response(lambda thing_id: f"thing:{thing_id}")
+    def show(thing_id):
+        calls.append(thing_id)
+        if thing_id == 404:
+            return jsonify({"error": "Not found"}), 404
+        response = jsonify({"id": thing_id})
+        response.headers["X-Next-Cursor"] = "abc"
+        response.headers["X-Private"] = "1"
+        return response
+
+    @app.route("/stream")
+    @cached_response(lambda: "stream")
+    def stream():
+        calls.append("stream")
+        return Response(iter([b"[", b"]"]), mimetype="application/json")
+
+    return app.test_client(), cache
+
+
+def test_hits_serve_the_cached_body_and_listed_headers(monkeypatch):
+    calls = []
+    client, cache = _cached_app(monkeypatch, calls)
+    client.get("/things/1")
+    hit = client.get("/things/1")
+    assert calls == [1]
+    assert hit.json == {"id": 1}
+    assert hit.headers["Content-Type"] == "application/json"
+    assert hit.headers["X-Next-Cursor"] == "abc"
+    assert "X-Private" not in hit.headers
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_errors_and_streamed_responses_are_not_cached(monkeypatch):
+    calls = []
+    client, _ = _cached_app(monkeypatch, calls)
+    assert client.get("/things/404").status_code == 404
+    assert client.get("/things/404").status_code == 404
+    client.get("/stream")
+    assert client.get("/stream").data == b"[]"
+    assert calls == [404, 404, "stream", "stream"]
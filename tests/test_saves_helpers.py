@@ -0,0 +1,36 @@
+import base64
+
+import pytest
+
+from utils.saves_helpers import encode_id_bitmap, encode_saved_ids, parse_saves_batch
+
+
+def test_bitmap_bits():
+    encoded = encode_id_bitmap([4, 5, 12])
+    assert (encoded["offset"], encoded["length"]) == (4, 9)
+    assert base64.b64decode(encoded["bitmap"]) == bytes([0b00000011, 0b00000001])
+
+
+def test_dense_ids_are_sent_as_a_bitmap():
+    ids = list(range(1000, 2000))
+    body = encode_saved_ids(ids, "bitmap")
+    assert body["format"] == "bitmap"
+    assert body["count"] == 1000
+    assert len(body["bitmap"]) < len(",".join(map(str, ids)))
+
+
+def test_sparse_ids_are_sent_as_a_list():
+    assert encode_saved_ids([1, 10_000_000], "bitmap") == {"format": "list", "count": 2, "ids": [1, 10_000_000]}
+
+
+def test_list_format_and_no_ids():
+    assert encode_saved_ids([1, 2, 3]) == {"format": "list", "count": 3, "ids": [1, 2, 3]}
+    assert encode_saved_ids([], "bitmap") == {"format": "list", "count": 0, "ids": []}
+
+
+def test_parse_saves_batch():
+    assert parse_saves_batch({"save": [1, 2, 2], "unsave": [3]}) == ([1, 2], [3])
+    for payload in (None, {}, {"save": ["1"]}, {"save": [True]}, {"save": [1], "unsave": [1]},
+                    {"save": [0]}, {"unsave": [-3]}, {"save": [2_147_483_648]}):
+        with pytest.raises(ValueError):
+            parse_saves_batch(payload)
@@ -0,0 +1,132 @@
+"""
+GET /resources/changes: incremental sync from the resource_changes log
+(migrations/0014_resource_changes.sql).
+
+The log keeps one row per resource, stamped with the id of the transaction
+that last changed it, plus tombstones for deleted resources and
+verifications. A sync token is the (txid, resource_id, verification_id)
+position of the last row a client has seen. Only rows of transactions below
+the xmin of the reading snapshot are returned: those have ended, and every
+transaction still open has a higher id, so it is read on a later sync.
+"""
+import os
+import random
+
+from utils.pagination_helpers import parse_limit, encode_cursor, decode_change_token
+from utils.resource_queries import RESOURCE_COLUMNS, VERIFICATION_COLUMNS, VERIFICATION_JOINS
+from utils.resource_rows import iter_resources
+
+CHANGES_PAGE_SIZE = 500
+MAX_CHANGES_PAGE_SIZE = 2000
+# Tombstones older than this are dropped; clients that have not synced for longer start over.
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("CHANGE_TOMBSTONE_RETENTION_DAYS", "30"))
+START = (0, 0, 0)
+
+# One statement, so the expiry watermark, the xmin and the rows come from
+# the same snapshot. Rows are all NULL but expired when nothing changed.
+CHANGES_SQL = """
+            SELECT e.version AS expired, c.txid::text::bigint, c.resource_id, c.verification_id, c.deleted
+            FROM data_versions e
+            LEFT JOIN LATERAL (
+                SELECT txid, resource_id, verification_id, deleted
+                FROM resource_changes
+                WHERE (txid, resource_id, verification_id) > (%s::text::xid8, %s, %s)
+                  AND txid < pg_snapshot_xmin(pg_current_snapshot())
+                ORDER BY txid, resource_id, verification_id
+                LIMIT %s
+            ) c ON TRUE
+            WHERE e.name = 'resource_changes_expired'
+            ORDER BY c.txid, c.resource_id, c.verification_id
+            """
+
+CHANGED_RESOURCES_SQL = f"""
+            SELECT {RESOURCE_COLUMNS},
+{VERIFICATION_COLUMNS}
+            FROM resources r
+            {VERIFICATION_JOINS}
+            WHERE r.id = ANY(%s)
+            ORDER BY r.id, v.created_at DESC, v.id DESC
+            """
+
+EXPIRE_TOMBSTONES_SQL = """
+            WITH expired AS (
+                DELETE FROM resource_changes
+                WHERE deleted AND changed_at < NOW() - make_interval(days => %s)
+                RETURNING txid::text::bigint AS txid
+            )
+            UPDATE data_versions
+            SET version = greatest(version, (SELECT max(txid) FROM expired)), changed_at = NOW()
+            WHERE name = 'resource_changes_expired' AND EXISTS (SELECT 1 FROM expired)
+            """
+
+
+class SyncExpired(Exception):
+    pass
+
+
+def parse_changes_args(args):
+    """
+    (position, limit) for ?since=&limit=. No since means a full sync from
+    the start. Raises ValueError on invalid values.
+    """
+    since = args.get("since")
+    position = decode_change_token(since) if since else START
+    return position, parse_limit(args.get("limit"), CHANGES_PAGE_SIZE, MAX_CHANGES_PAGE_SIZE)
+
+
+def read_changes(connection, position, limit):
+    """
+    The page of changes after position: {"resources": current records of
+    the changed resources, "deleted": {"resources": ids, "verifications":
+    [{"id", "resource_id"}]}, "next": token, "has_more": bool}.
+    Raises SyncExpired when tombstones after position have been dropped.
+    """
+    cursor = connection.cursor()
+    cursor.execute(CHANGES_SQL, (*position, limit + 1))
+    rows = cursor.fetchall()
+    expired = rows[0][0]
+    if position != START and position[0] < expired:
+        raise SyncExpired("since is older than the change log; sync again without since")
+
+    changes = [row[1:] for row in rows if row[1] is not None]
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    changed_ids = []
+    deleted_ids = []
+    deleted_verifications = []
+    for txid, resource_id, verification_id, deleted in changes:
+        if verification_id:
+            deleted_verifications.append({"id": verification_id, "resource_id": resource_id})
+        elif deleted:
+            deleted_ids.append(resource_id)
+        else:
+            changed_ids.append(resource_id)
+
+    resources = []
+    if changed_ids:
+        cursor.execute(CHANGED_RESOURCES_SQL, (changed_ids,))
+        resources = list(iter_resources(cursor))
+        # Deleted after the log was read; its tombstone comes on a later sync.
+        found = {resource.id for resource in resources}
+        deleted_ids.extend(resource_id for resource_id in changed_ids if resource_id not in found)
+
+    last = changes[-1][:3] if changes else position
+    return {
+        "resources": resources,
+        "deleted": {"resources": deleted_ids, "verifications": deleted_verifications},
+        "next": encode_cursor(*last),
+        "has_more": has_more,
+    }
+
+
+def maybe_expire_tombstones(connection, chance=0.01):
+    """
+    Drops old tombstones on about one call in 100 and raises the expiry
+    watermark to the txid of the newest one dropped. Commits.
+    """
+    if random.random() >= chance:
+        return
+    cursor = connection.cursor()
+    cursor.execute(EXPIRE_TOMBSTONES_SQL, (TOMBSTONE_RETENTION_DAYS,))
+    connection.commit()
@@ -0,0 +1,84 @@
+"""
+GET /resources/clusters: resource counts per grid cell for zoomed-out maps,
+read from resource_cluster_cells (migrations/0015_resource_cluster_cells.sql),
+which triggers keep up to date on every resource write.
+
+A request is answered for the whole tiles covering its bbox, so every view
+inside the same tiles gets the same response and shares a cache entry.
+"""
+from utils.geo_helpers import parse_bbox, tile_range
+from utils.resource_helpers import ALLOWED_CATEGORIES
+
+# Must match migrations/0015_resource_cluster_cells.sql.
+MAX_CLUSTER_ZOOM = 16
+CELL_BITS = 3  # 8 x 8 cells per tile
+# About a large screen of 512px tiles; bigger boxes should zoom out.
+MAX_CLUSTER_TILES = 64
+
+CLUSTERS_SQL = """
+            SELECT round((sum(lat_sum) / sum(count))::numeric, 6)::float8 AS lat,
+                   round((sum(lng_sum) / sum(count))::numeric, 6)::float8 AS lng,
+                   sum(count)::integer AS count,
+                   json_object_agg(category, count) AS categories
+            FROM resource_cluster_cells
+            WHERE zoom = %s
+              AND x BETWEEN %s AND %s
+              AND y BETWEEN %s AND %s
+              AND count > 0
+              {category_filter}
+            GROUP BY x, y
+            ORDER BY y, x
+            """
+
+
+def parse_clusters_args(args):
+    """
+    (zoom, tiles, category) for ?bbox=&zoom=&category=. tiles is the
+    (min_x, max_x, min_y, max_y) tile range covering bbox at zoom. Raises
+    ValueError on invalid values.
+    """
+    zoom = args.get("zoom")
+    if zoom is None or zoom == "":
+        raise ValueError("zoom is required")
+    try:
+        zoom = int(zoom)
+    except ValueError:
+        raise ValueError("zoom must be an integer")
+    if not 0 <= zoom <= MAX_CLUSTER_ZOOM:
+        raise ValueError(f"zoom must be between 0 and {MAX_CLUSTER_ZOOM}")
+
+    if not args.get("bbox"):
+        raise ValueError("bbox is required")
+    tiles = tile_range(parse_bbox(args["bbox"]), zoom)
+    min_x, max_x, min_y, max_y = tiles
+    if (max_x - min_x + 1) * (max_y - min_y + 1) > MAX_CLUSTER_TILES:
+        raise ValueError(f"bbox covers more than {MAX_CLUSTER_TILES} tiles at this zoom")
+
+    category = args.get("category")
+    if category and category not in ALLOWED_CATEGORIES:
+        raise ValueError("Invalid category")
+    return zoom, tiles, category or None
+
+
+def tile_key(zoom, tiles, category=None):
+    """
+    "zoom/min_x-max_x/min_y-max_y", plus the category: the response cache key.
+    """
+    min_x, max_x, min_y, max_y = tiles
+    key = f"{zoom}/{min_x}-{max_x}/{min_y}-{max_y}"
+    return f"{key}:{category}" if category else key
+
+
+def clusters_query(zoom, tiles, category=None):
+    """
+    (sql, params) reading the cells of the tiles: one range scan of the
+    primary key, one row per non-empty cell.
+    """
+    min_x, max_x, min_y, max_y = tiles
+    params = [zoom, min_x << CELL_BITS, (max_x << CELL_BITS) + (1 << CELL_BITS) - 1,
+              min_y << CELL_BITS, (max_y << CELL_BITS) + (1 << CELL_BITS) - 1]
+    category_filter = ""
+    if category:
+        category_filter = "AND category = %s"
+        params.append(category)
+    return CLUSTERS_SQL.format(category_filter=category_filter), params
@@ -0,0 +1,342 @@
+"""
+Writes for the resource and verification endpoints, one statement each.
+
+Every write is a single query: the ownership check is part of the WHERE
+clause and the response row comes back from the data-modifying CTE joined
+to users, so a handler never reads before or after it writes. The
+statements are prepared once per pooled connection and reused by every
+request that borrows it.
+"""
+import re
+import threading
+import weakref
+
+import psycopg2
+import psycopg2.errors
+
+from utils.resource_queries import RESOURCE_COLUMNS
+
+PLACEHOLDER = re.compile(r"%\((\w+)\)s")
+
+VERIFICATION_RESPONSE_COLUMNS = """
+                   v.id AS verification_id,
+                   v.status,
+                   v.note,
+                   v.created_at AS "createdAt",
+                   v.user_id AS verification_author_id,
+                   u.username AS verification_author_username"""
+
+# A resource that already has a job gets it reset, as if freshly enqueued.
+GEOCODE_JOB_CONFLICT = """
+                ON CONFLICT (resource_id)
+                DO UPDATE SET attempts = 0, next_attempt_at = NOW(), last_error = NULL"""
+
+SAVEPOINT = "SAVEPOINT prepared_statement"
+ROLLBACK_TO_SAVEPOINT = "ROLLBACK TO SAVEPOINT prepared_statement"
+
+RESOURCE_PARAM_TYPES = {
+    "title": "text",
+    "description": "text",
+    "category": "resource_category",
+    "address": "text",
+    "city": "text",
+    "lat": "numeric",
+    "lng": "numeric",
+    "requirements": "text",
+    "geocode_status": "geocode_status",
+}
+
+
+class PreparedStatement:
+    """
+    SQL with %(name)s placeholders, run through PREPARE/EXECUTE on psycopg2
+    connections. psycopg2 has no protocol-level prepared statements, so the
+    first execute on a connection sends PREPARE and later ones only EXECUTE.
+
+    PREPARE outlives the transaction it ran in, so a statement is marked
+    prepared as soon as PREPARE succeeds, whatever its EXECUTE does. Both run
+    after a savepoint, so a statement the session has lost (DISCARD ALL, a
+    pooler switching backends) or already has can be prepared again, or
+    taken as prepared, without aborting the caller's transaction.
+    """
+
+    _prepared = weakref.WeakKeyDictionary()  # connection -> names prepared on it
+    _lock = threading.Lock()
+
+    def __init__(self, name, sql, types):
+        self.name = name
+        self.sql = sql
+        self.params = list(dict.fromkeys(PLACEHOLDER.findall(sql)))
+        positions = {param: index for index, param in enumerate(self.params, start=1)}
+        body = PLACEHOLDER.sub(lambda match: f"${positions[match.group(1)]}", sql).replace("%%", "%")
+        self.prepare_sql = f"PREPARE {name} ({', '.join(types[param] for param in self.params)}) AS {body}"
+        self.execute_sql = f"EXECUTE {name} ({', '.join(f'%({param})s' for param in self.params)})"
+
+    def _is_prepared(self, connection):
+        with self._lock:
+            return self.name in self._prepared.get(connection, ())
+
+    def _mark(self, connection, prepared):
+        with self._lock:
+            names = self._prepared.setdefault(connection, set())
+            if prepared:
+                names.add(self.name)
+            else:
+                names.clear()
+
+    def _prepare(self, cursor):
+        try:
+            cursor.execute(f"{SAVEPOINT}; {self.prepare_sql}")
+        except psycopg2.errors.DuplicatePreparedStatement:
+            cursor.execute(ROLLBACK_TO_SAVEPOINT)
+        self._mark(cursor.connection, True)
+
+    def execute(self, cursor, params):
+        connection = cursor.connection
+        if not self._is_prepared(connection):
+            self._prepare(cursor)
+        try:
+            cursor.execute(f"{SAVEPOINT}; {self.execute_sql}", params)
+        except psycopg2.errors.InvalidSqlStatementName:
+            cursor.execute(ROLLBACK_TO_SAVEPOINT)
+            self._mark(connection, False)
+            self._prepare(cursor)
+            cursor.execute(self.execute_sql, params)
+
+
+CREATE_RESOURCE = PreparedStatement(
+    "create_resource",
+    f"""
+            WITH created AS (
+                INSERT INTO resources (created_by, title, description, category, address, city, lat, lng, requirements, geocode_status)
+                VALUES (%(user_id)s, %(title)s, %(description)s, %(category)s, %(address)s, %(city)s,
+                        %(lat)s, %(lng)s, %(requirements)s, %(geocode_status)s)
+                RETURNING *
+            ),
+            job AS (
+                INSERT INTO geocode_jobs (resource_id)
+                SELECT id FROM created WHERE geocode_status = 'pending'
+            )
+            SELECT {RESOURCE_COLUMNS}
+            FROM created r
+            JOIN users u ON r.created_by = u.id
+            """,
+    {"user_id": "integer", **RESOURCE_PARAM_TYPES},
+)
+
+# The row is only written by its owner, and a changed location is only
+# written once the caller knows how to geocode it (geocode_status set).
+# An unchanged location keeps its coordinates and status.
+UPDATE_RESOURCE = PreparedStatement(
+    "update_resource",
+    f"""
+            WITH target AS (
+                SELECT id,
+                       created_by,
+                       normalize_location_part(address) = normalize_location_part(%(address)s)
+                       AND normalize_location_part(city) = normalize_location_part(%(city)s) AS same_location
+                FROM resources
+                WHERE id = %(resource_id)s
+            ),
+            updated AS (
+                UPDATE resources r
+                SET title = %(title)s,
+                    description = %(description)s,
+                    category = %(category)s,
+                    address = %(address)s,
+                    city = %(city)s,
+                    lat = CASE WHEN t.same_location THEN r.lat ELSE %(lat)s::numeric END,
+                    lng = CASE WHEN t.same_location THEN r.lng ELSE %(lng)s::numeric END,
+                    requirements = %(requirements)s,
+                    geocode_status = CASE WHEN t.same_location THEN r.geocode_status
+                                          ELSE %(geocode_status)s::geocode_status END,
+                    updated_at = NOW()
+                FROM target t
+                WHERE r.id = t.id
+                  AND t.created_by = %(user_id)s
+                  AND (t.same_location OR %(geocode_status)s::geocode_status IS NOT NULL)
+                RETURNING r.*
+            ),
+            job AS (
+                INSERT INTO geocode_jobs (resource_id)
+                SELECT r.id FROM updated r, target t
+                WHERE NOT t.same_location AND r.geocode_status = 'pending'
+                {GEOCODE_JOB_CONFLICT}
+            )
+            SELECT t.created_by AS owner_id,
+                   t.same_location,
+                   {RESOURCE_COLUMNS}
+            FROM target t
+            LEFT JOIN updated r ON true
+            LEFT JOIN users u ON r.created_by = u.id
+            """,
+    {"resource_id": "integer", "user_id": "integer", **RESOURCE_PARAM_TYPES},
+)
+
+# The response (and the resource.deleted event) is the deleted row as RESOURCE_COLUMNS.
+DELETE_RESOURCE = PreparedStatement(
+    "delete_resource",
+    f"""
+            WITH target AS (
+                SELECT id, created_by FROM resources WHERE id = %(resource_id)s
+            ),
+            deleted AS (
+                DELETE FROM resources r
+                USING target t
+                WHERE r.id = t.id AND t.created_by = %(user_id)s
+                RETURNING r.*
+            )
+            SELECT t.created_by AS owner_id,
+                   {RESOURCE_COLUMNS}
+            FROM target t
+            LEFT JOIN deleted r ON true
+            LEFT JOIN users u ON r.created_by = u.id
+            """,
+    {"resource_id": "integer", "user_id": "integer"},
+)
+
+UPSERT_VERIFICATION = PreparedStatement(
+    "upsert_verification",
+    f"""
+            WITH saved AS (
+                INSERT INTO verifications (resource_id, user_id, status, note)
+                VALUES (%(resource_id)s, %(user_id)s, %(status)s, %(note)s)
+                ON CONFLICT (resource_id, user_id)
+                DO UPDATE SET
+                    status = EXCLUDED.status,
+                    note = EXCLUDED.note,
+                    created_at = NOW()
+                RETURNING *
+            )
+            SELECT {VERIFICATION_RESPONSE_COLUMNS}
+            FROM saved v
+            JOIN users u ON v.user_id = u.id
+            """,
+    {"resource_id": "integer", "user_id": "integer", "status": "verification_status", "note": "text"},
+)
+
+UPDATE_VERIFICATION = PreparedStatement(
+    "update_verification",
+    f"""
+            WITH target AS (
+                SELECT id, user_id FROM verifications
+                WHERE id = %(verification_id)s AND resource_id = %(resource_id)s
+            ),
+            updated AS (
+                UPDATE verifications v
+                SET status = %(status)s, note = %(note)s
+                FROM target t
+                WHERE v.id = t.id AND t.user_id = %(user_id)s
+                RETURNING v.*
+            )
+            SELECT t.user_id AS owner_id,
+                   {VERIFICATION_RESPONSE_COLUMNS}
+            FROM target t
+            LEFT JOIN updated v ON true
+            LEFT JOIN users u ON v.user_id = u.id
+            """,
+    {"verification_id": "integer", "resource_id": "integer", "user_id": "integer",
+     "status": "verification_status", "note": "text"},
+)
+
+DELETE_VERIFICATION = PreparedStatement(
+    "delete_verification",
+    """
+            WITH target AS (
+                SELECT id, user_id FROM verifications
+                WHERE id = %(verification_id)s AND resource_id = %(resource_id)s
+            ),
+            deleted AS (
+                DELETE FROM verifications v
+                USING target t
+                WHERE v.id = t.id AND t.user_id = %(user_id)s
+                RETURNING v.id
+            )
+            SELECT t.user_id AS owner_id, d.id
+            FROM target t
+            LEFT JOIN deleted d ON true
+            """,
+    {"verification_id": "integer", "resource_id": "integer", "user_id": "integer"},
+)
+
+
+def resource_params(fields, lat, lng, geocode_status):
+    return {
+        "title": fields["title"],
+        "description": fields.get("description"),
+        "category": fields["category"],
+        "address": fields["address"],
+        "city": fields["city"],
+        "lat": lat,
+        "lng": lng,
+        "requirements": fields.get("requirements"),
+        "geocode_status": geocode_status,
+    }
+
+
+def _owned_write(statement, cursor, params, id_column, *keys):
+    """
+    Runs an ownership-checked write. None when its target does not exist,
+    else the values of keys (owner_id first) followed by the written row,
+    which is None when nothing was written (id_column is NULL).
+    """
+    statement.execute(cursor, params)
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    values = [row.pop(key) for key in keys]
+    return (*values, row if row[id_column] is not None else None)
+
+
+def create_resource(cursor, user_id, fields, lat, lng, geocode_status):
+    """
+    Inserts the resource (and its geocode job when pending) and returns it
+    as RESOURCE_COLUMNS.
+    """
+    CREATE_RESOURCE.execute(cursor, {"user_id": user_id, **resource_params(fields, lat, lng, geocode_status)})
+    return cursor.fetchone()
+
+
+def update_resource(cursor, resource_id, user_id, fields, lat=None, lng=None, geocode_status=None):
+    """
+    None when the resource does not exist, else (owner_id, same_location,
+    resource). resource is None when nothing was written: user_id is not the
+    owner, or the location changed and no geocode_status was given.
+    """
+    params = {"resource_id": resource_id, "user_id": user_id, **resource_params(fields, lat, lng, geocode_status)}
+    return _owned_write(UPDATE_RESOURCE, cursor, params, "id", "owner_id", "same_location")
+
+
+def delete_resource(cursor, resource_id, user_id):
+    """
+    None when the resource does not exist, else (owner_id, resource), the
+    deleted resource as RESOURCE_COLUMNS or None when user_id is not the owner.
+    """
+    params = {"resource_id": resource_id, "user_id": user_id}
+    return _owned_write(DELETE_RESOURCE, cursor, params, "id", "owner_id")
+
+
+def upsert_verification(cursor, resource_id, user_id, status, note):
+    UPSERT_VERIFICATION.execute(
+        cursor, {"resource_id": resource_id, "user_id": user_id, "status": status, "note": note}
+    )
+    return cursor.fetchone()
+
+
+def update_verification(cursor, resource_id, verification_id, user_id, status, note):
+    """
+    None when the verification does not exist on the resource, else
+    (owner_id, verification).
+    """
+    params = {"verification_id": verification_id, "resource_id": resource_id, "user_id": user_id,
+              "status": status, "note": note}
+    return _owned_write(UPDATE_VERIFICATION, cursor, params, "verification_id", "owner_id")
+
+
+def delete_verification(cursor, resource_id, verification_id, user_id):
+    """
+    None when the verification does not exist on the resource, else
+    (owner_id, {"id": ...} or None).
+    """
+    params = {"verification_id": verification_id, "resource_id": resource_id, "user_id": user_id}
+    return _owned_write(DELETE_VERIFICATION, cursor, params, "id", "owner_id")
@@ -1,63 +1,359 @@
 import os
+import threading
+import time
 import psycopg2
+import psycopg2.extensions
 
+from utils.metrics import record_query
 
-def get_db_connection():
+
+class PoolTimeout(Exception):
+    pass
+
+
+def db_dsn():
+    """
+    libpq connection string, shared by the pool and migrate.py.
+    """
     if 'ON_HEROKU' in os.environ:
-        connection = psycopg2.connect(
+        return psycopg2.extensions.make_dsn(
             os.getenv('DATABASE_URL'), 
             sslmode='require'
         )
-    else:
-        connection = psycopg2.connect(
-            host='localhost',
-            database=os.getenv('POSTGRES_DATABASE'),
-            user=os.getenv('POSTGRES_USERNAME'),
-            password=os.getenv('POSTGRES_PASSWORD')
-        )
-    return connection
+    return psycopg2.extensions.make_dsn(
+        host='localhost',
+        dbname=os.getenv('POSTGRES_DATABASE'),
+        user=os.getenv('POSTGRES_USERNAME'),
+        password=os.getenv('POSTGRES_PASSWORD')
+    )
+
+
+_timed_cursor_classes = {}
+
+
+def timed_cursor_class(cursor_class):
+    """
+    Subclass of cursor_class that reports every execute to utils.metrics.
+    """
+    timed = _timed_cursor_classes.get(cursor_class)
+    if timed is None:
+        class TimedCursor(cursor_class):
+            def execute(self, query, vars=None):
+                started = time.perf_counter()
+                try:
+                    return super().execute(query, vars)
+                finally:
+                    record_query(query, time.perf_counter() - started)
+
+            def executemany(self, query, vars_list):
+                started = time.perf_counter()
+                try:
+                    return super().executemany(query, vars_list)
+                finally:
+                    record_query(query, time.perf_counter() - started)
+
+        TimedCursor.__name__ = f"Timed{cursor_class.__name__}"
+        timed = _timed_cursor_classes.setdefault(cursor_class, TimedCursor)
+    return timed
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """
+    Times every query, whatever cursor_factory the caller asks for. Rows
+    fetched later from a named (server-side) cursor are not timed.
+    """
+
+    def cursor(self, *args, **kwargs):
+        cursor_class = kwargs.get("cursor_factory") or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs["cursor_factory"] = timed_cursor_class(cursor_class)
+        return super().cursor(*args, **kwargs)
+
+
+def _connect():
+    return psycopg2.connect(db_dsn(), connection_factory=InstrumentedConnection)
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections shared by every request in a process.
+
+    Connections are created lazily up to maxconn, checked before being handed
+    out again and rolled back when returned. If the process forks (gunicorn
+    workers) the child starts with an empty pool instead of sharing sockets
+    with the parent.
+    """
+
+    def __init__(self, connect, minconn=1, maxconn=10, timeout=5.0,
+                 health_check_after=30.0, max_idle=300.0):
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.max_idle = max_idle
+        self._cond = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = []  # (connection, returned_at), most recently used last
+        self._in_use = set()
+        self._size = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            # The parent's connections must not be used (or closed) from the
+            # child: keep references so they are never garbage collected here.
+            orphaned = getattr(self, "_orphaned", [])
+            orphaned += [c for c, _ in self._idle] + list(self._in_use)
+            self._reset()
+            self._orphaned = orphaned
+
+    def getconn(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._cond:
+            self._check_fork()
+            while True:
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                    break
+                if self._size < self.maxconn:
+                    self._size += 1
+                    connection, returned_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {self.timeout}s")
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - started
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        try:
+            if connection is not None and not self._is_healthy(connection, returned_at):
+                self._close_quietly(connection)
+                with self._cond:
+                    self._discarded += 1
+                connection = None
+            if connection is None:
+                connection = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._in_use.add(connection)
+        return connection
+
+    def putconn(self, connection):
+        with self._cond:
+            if connection not in self._in_use:
+                # Borrowed before a fork or already returned.
+                return
+
+        reusable = not connection.closed
+        if reusable:
+            try:
+                status = connection.get_transaction_status()
+                if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    reusable = False
+                elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except psycopg2.Error:
+                reusable = False
+
+        expired = []
+        with self._cond:
+            self._in_use.discard(connection)
+            if reusable:
+                now = time.monotonic()
+                self._idle.append((connection, now))
+                # Shrink back toward minconn, oldest idle connections first.
+                while (len(self._idle) > self.minconn
+                       and now - self._idle[0][1] > self.max_idle):
+                    expired.append(self._idle.pop(0)[0])
+            else:
+                expired.append(connection)
+            self._size -= len(expired)
+            self._discarded += len(expired)
+            self._cond.notify(len(expired) + 1)
+
+        for stale in expired:
+            self._close_quietly(stale)
+
+    def _is_healthy(self, connection, returned_at):
+        if connection.closed:
+            return False
+        if time.monotonic() - returned_at < self.health_check_after:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _close_quietly(self, connection):
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+    def closeall(self):
+        with self._cond:
+            self._check_fork()
+            idle = [c for c, _ in self._idle]
+            self._size -= len(idle)
+            self._idle = []
+        for connection in idle:
+            self._close_quietly(connection)
+
+    def stats(self):
+        with self._cond:
+            self._check_fork()
+            in_use = len(self._in_use)
+            return {
+                "size": self._size,
+                "in_use": in_use,
+                "idle": len(self._idle),
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+                "utilization": in_use / self.maxconn if self.maxconn else 0.0,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "discarded": self._discarded,
+                "wait_seconds_total": self._wait_total,
+                "wait_seconds_max": self._wait_max,
+                "wait_seconds_avg": self._wait_total / self._checkouts if self._checkouts else 0.0,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_db_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _connect,
+                    minconn=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+                    maxconn=int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                    timeout=float(os.getenv('DB_POOL_TIMEOUT', '5')),
+                    health_check_after=float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', '30')),
+                    max_idle=float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+                )
+    return _pool
+
+
+def get_db_connection():
+    return get_db_pool().getconn()
+
+
+def release_db_connection(connection):
+    get_db_pool().putconn(connection)
+
+
+def db_pool_stats():
+    return get_db_pool().stats()
+
+VERIFICATION_ROW_FIELDS = (
+    "verification_id",
+    "verification_status",
+    "verification_note",
+    "verificationCreatedAt",
+    "verification_author_username",
+    "verification_author_id",
+)
+
+
+def _verification_from_row(row):
+    return {
+        "verification_id": row["verification_id"],
+        "status": row["verification_status"],
+        "note": row["verification_note"],
+        "createdAt": row.get("verificationCreatedAt"),
+        "verification_author_username": row["verification_author_username"],
+        "verification_author_id": row["verification_author_id"],
+    }
+
+
+def _resource_from_row(row):
+    row["verifications"] = []
+    if row["verification_id"] is not None:
+        row["verifications"].append(_verification_from_row(row))
+
+    # clean fields "flat"
+    for field in VERIFICATION_ROW_FIELDS:
+        row.pop(field, None)
+    return row
+
+
+def resource_with_summary(row):
+    """
+    Folds the summary_* columns of SUMMARY_COLUMNS into a verification_summary object.
+    """
+    row["verification_summary"] = {
+        "latest_status": row.pop("summary_latest_status"),
+        "lastVerifiedAt": row.pop("summaryLastVerifiedAt"),
+        "total": row.pop("summary_total"),
+        "counts": {
+            "Active": row.pop("summary_active"),
+            "Temporarily Closed": row.pop("summary_temporarily_closed"),
+            "No Longer Available": row.pop("summary_no_longer_available"),
+            "Info Needs Update": row.pop("summary_info_needs_update"),
+        },
+    }
+    return row
+
+
+def iter_consolidated_resources(rows):
+    """
+    Streaming version of consolidate_verifications_in_resources: yields each
+    resource as soon as its last verification row has been read.
+    Rows of the same resource must be adjacent, so queries have to order by
+    the resource first (e.g. ORDER BY r.created_at DESC, r.id DESC, v.created_at DESC).
+    """
+    current = None
+    for row in rows:
+        if current is not None and row["id"] == current["id"]:
+            if row["verification_id"] is not None:
+                current["verifications"].append(_verification_from_row(row))
+            continue
+
+        if current is not None:
+            yield current
+        current = _resource_from_row(row)
+
+    if current is not None:
+        yield current
+
 
 def consolidate_verifications_in_resources(resources_with_verifications):
-    consolidated_resources = []
+    # Keyed by resource id, so rows may come in any order; dicts keep
+    # insertion order, which preserves the ORDER BY of the query.
+    consolidated_resources = {}
 
     for row in resources_with_verifications:
-        resource_exists = False
-
-        for consolidated in consolidated_resources:
-            if row["id"] == consolidated["id"]:
-                resource_exists = True
-
-                if row["verification_id"] is not None:
-                    consolidated["verifications"].append({
-                        "verification_id": row["verification_id"],
-                        "status": row["verification_status"],
-                        "note": row["verification_note"],
-                        "createdAt": row.get("verificationCreatedAt"),
-                        "verification_author_username": row["verification_author_username"],
-                        "verification_author_id": row["verification_author_id"],
-                    })
-                break
-
-        if not resource_exists:
-            row["verifications"] = []
-            if row["verification_id"] is not None:
-                row["verifications"].append({
-                    "verification_id": row["verification_id"],
-                    "status": row["verification_status"],
-                    "note": row["verification_note"],
-                    "createdAt": row.get("verificationCreatedAt"),
-                    "verification_author_username": row["verification_author_username"],
-                    "verification_author_id": row["verification_author_id"],
-                })
-
-            # clean fields "flat"
-            row.pop("verification_id", None)
-            row.pop("verification_status", None)
-            row.pop("verification_note", None)
-            row.pop("verification_author_username", None)
-            row.pop("verification_author_id", None)
-            row.pop("verificationCreatedAt", None)
-
-            consolidated_resources.append(row)
-
-    return consolidated_resources
\ No newline at end of file
+        consolidated = consolidated_resources.get(row["id"])
+        if consolidated is None:
+            consolidated_resources[row["id"]] = _resource_from_row(row)
+        elif row["verification_id"] is not None:
+            consolidated["verifications"].append(_verification_from_row(row))
+
+    return list(consolidated_resources.values())
@@ -0,0 +1,117 @@
+import hashlib
+import logging
+from functools import wraps
+from urllib.parse import urlencode
+
+import psycopg2
+from flask import Response, g, make_response, request
+from werkzeug.http import parse_etags, parse_date
+
+from utils.db_helpers import get_db_connection, release_db_connection, PoolTimeout
+from utils.json_helpers import wants_ndjson
+
+logger = logging.getLogger(__name__)
+
+
+def _fetch_version(query, params):
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchone()
+    except (psycopg2.Error, PoolTimeout) as error:
+        # Without a version the response is simply served unconditionally.
+        logger.warning("Version lookup failed: %s", error)
+        return None
+    finally:
+        if connection:
+            release_db_connection(connection)
+
+
+CATALOG_VERSION_SQL = "SELECT version, changed_at FROM data_versions WHERE name = 'resources'"
+RESOURCE_VERSION_SQL = "SELECT version, changed_at FROM resources WHERE id = %s"
+
+
+def catalog_seed(version, path, args, ndjson=False):
+    query = urlencode(sorted(args.items(multi=True)))
+    return f"{version}:{path}?{query}" + (":ndjson" if ndjson else "")
+
+
+def catalog_version(*args, **kwargs):
+    """
+    (etag seed, last modified) for listings. data_versions is bumped by
+    triggers on every resource or verification write, deletes included.
+    Saves do not bump it, so ?saved= listings get no validators.
+    """
+    if "saved" in request.args:
+        return None
+    row = _fetch_version(CATALOG_VERSION_SQL, ())
+    if row is None:
+        return None
+    ndjson = wants_ndjson(request.headers.get("Accept"))
+    return catalog_seed(row[0], request.path, request.args, ndjson), row[1]
+
+
+def resource_version(resource_id):
+    """
+    (etag seed, last modified) for one resource, from the version column the
+    triggers bump whenever the resource or one of its verifications changes.
+    """
+    row = _fetch_version(RESOURCE_VERSION_SQL, (resource_id,))
+    if row is None:
+        return None
+    return f"{row[0]}:{resource_id}", row[1]
+
+
+def validators(seed, last_modified):
+    """
+    (etag, last_modified) as sent to clients. HTTP dates have second precision.
+    """
+    return hashlib.sha1(seed.encode("utf-8")).hexdigest(), last_modified.replace(microsecond=0)
+
+
+def is_not_modified(etag, last_modified, if_none_match, if_modified_since):
+    """
+    Evaluates raw If-None-Match / If-Modified-Since header values. As in
+    RFC 9110, If-Modified-Since is ignored when If-None-Match is present.
+    """
+    if if_none_match:
+        return parse_etags(if_none_match).contains(etag)
+    if if_modified_since:
+        since = parse_date(if_modified_since)
+        return since is not None and last_modified <= since
+    return False
+
+
+def conditional_response(version_loader):
+    """
+    Adds ETag/Last-Modified to 200 responses and answers If-None-Match /
+    If-Modified-Since with 304 before the wrapped view (and its queries) runs.
+    version_loader gets the view arguments and returns (seed, last_modified) or None.
+    The ETag is left in g.response_etag for cached_response to key on.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            version = version_loader(*args, **kwargs)
+            if version is None:
+                return f(*args, **kwargs)
+
+            etag, last_modified = validators(*version)
+            g.response_etag = etag
+            if is_not_modified(etag, last_modified,
+                               request.headers.get("If-None-Match"),
+                               request.headers.get("If-Modified-Since")):
+                response = Response(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+        return decorated_function
+    return decorator
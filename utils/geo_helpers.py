@@ -0,0 +1,106 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    d_lat = math.radians(lat2 - lat1)
+    d_lng = math.radians(lng2 - lng1)
+    a = (math.sin(d_lat / 2) ** 2
+         + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lng / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    (min_lat, max_lat, min_lng, max_lng) containing every point within
+    radius_km of (lat, lng). Near the poles or across the antimeridian the
+    longitude range widens to the whole globe, which is still correct.
+    """
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    min_lat = max(lat - d_lat, -90.0)
+    max_lat = min(lat + d_lat, 90.0)
+
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return min_lat, max_lat, -180.0, 180.0
+
+    # Widest longitude span is at the latitude farthest from the equator.
+    widest_lat = max(abs(min_lat), abs(max_lat))
+    d_lng = radius_km / (KM_PER_DEGREE_LAT * math.cos(math.radians(widest_lat)))
+    min_lng = lng - d_lng
+    max_lng = lng + d_lng
+    if min_lng < -180.0 or max_lng > 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, min_lng, max_lng
+
+
+def haversine_sql(alias="r"):
+    """
+    Great-circle distance in km from a point to alias.lat/alias.lng, in plain
+    SQL (no PostGIS). Placeholders are (lat, lat, lng).
+    """
+    return (
+        f"2 * {EARTH_RADIUS_KM} * asin(least(1, sqrt("
+        f"power(sin(radians({alias}.lat::float8 - %s) / 2), 2)"
+        f" + cos(radians(%s)) * cos(radians({alias}.lat::float8))"
+        f" * power(sin(radians({alias}.lng::float8 - %s) / 2), 2))))"
+    )
+
+
+def parse_coordinate(value, name, limit):
+    if value is None or value == "":
+        raise ValueError(f"{name} is required")
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+    if not math.isfinite(number) or abs(number) > limit:
+        raise ValueError(f"{name} must be between -{limit} and {limit}")
+    return number
+
+
+def parse_bbox(value):
+    """
+    (min_lng, min_lat, max_lng, max_lat) from ?bbox=min_lng,min_lat,max_lng,max_lat
+    (the GeoJSON / Mapbox order). Raises ValueError on invalid values.
+    """
+    parts = (value or "").split(",")
+    if len(parts) != 4:
+        raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat")
+    min_lng = parse_coordinate(parts[0], "bbox min_lng", 180)
+    min_lat = parse_coordinate(parts[1], "bbox min_lat", 90)
+    max_lng = parse_coordinate(parts[2], "bbox max_lng", 180)
+    max_lat = parse_coordinate(parts[3], "bbox max_lat", 90)
+    if min_lng > max_lng or min_lat > max_lat:
+        raise ValueError("bbox minimums must not exceed its maximums")
+    return min_lng, min_lat, max_lng, max_lat
+
+
+MAX_MERCATOR_LAT = 85.0511287798
+
+
+def tile_x(lng, zoom):
+    """
+    Web-mercator tile column of lng at zoom (same as mercator_tile_x in SQL).
+    """
+    n = 2 ** zoom
+    return min(max(math.floor((lng + 180) / 360 * n), 0), n - 1)
+
+
+def tile_y(lat, zoom):
+    """
+    Web-mercator tile row of lat at zoom, 0 at the north edge (same as mercator_tile_y in SQL).
+    """
+    n = 2 ** zoom
+    lat = min(max(lat, -MAX_MERCATOR_LAT), MAX_MERCATOR_LAT)
+    y = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n
+    return min(max(math.floor(y), 0), n - 1)
+
+
+def tile_range(bbox, zoom):
+    """
+    (min_x, max_x, min_y, max_y) of the tiles at zoom covering a parse_bbox box.
+    """
+    min_lng, min_lat, max_lng, max_lat = bbox
+    return tile_x(min_lng, zoom), tile_x(max_lng, zoom), tile_y(max_lat, zoom), tile_y(min_lat, zoom)
@@ -0,0 +1,109 @@
+import logging
+import os
+import random
+import psycopg2.extras
+
+from utils.db_helpers import get_db_connection, release_db_connection
+from utils.mapbox_helpers import geocode_address
+from utils.resource_events import publish
+from utils.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+GEOCODE_MAX_ATTEMPTS = int(os.getenv("GEOCODE_MAX_ATTEMPTS", "6"))
+GEOCODE_BACKOFF_BASE = float(os.getenv("GEOCODE_BACKOFF_BASE", "5"))
+GEOCODE_BACKOFF_MAX = float(os.getenv("GEOCODE_BACKOFF_MAX", "600"))
+
+
+def geocode_async_requested(args):
+    """
+    ?geocode=async|sync on the request wins over the GEOCODE_MODE env var.
+    """
+    mode = args.get("geocode") or os.getenv("GEOCODE_MODE", "sync")
+    return mode == "async"
+
+
+def backoff_seconds(attempts):
+    delay = min(GEOCODE_BACKOFF_BASE * 2 ** (attempts - 1), GEOCODE_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _finish_job(cursor, job, lat, lng, status):
+    # The address guard skips results for an address the owner has since edited;
+    # that edit re-enqueued the resource anyway.
+    cursor.execute(
+        """
+        UPDATE resources
+        SET lat = %s, lng = %s, geocode_status = %s
+        WHERE id = %s AND address = %s AND city = %s
+        """,
+        (lat, lng, status, job["resource_id"], job["address"], job["city"]),
+    )
+    if cursor.rowcount:
+        publish(cursor, "resource.updated", [job["resource_id"]])
+    cursor.execute("DELETE FROM geocode_jobs WHERE id = %s", (job["id"],))
+
+
+def process_due_jobs(batch_size=5):
+    """
+    Claims up to batch_size due jobs (skipping ones other workers hold),
+    geocodes them and records the outcome. Returns the number of jobs handled.
+    """
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute(
+            """
+            SELECT j.id, j.resource_id, j.attempts, r.address, r.city
+            FROM geocode_jobs j
+            JOIN resources r ON r.id = j.resource_id
+            WHERE j.next_attempt_at <= NOW()
+            ORDER BY j.next_attempt_at
+            LIMIT %s
+            FOR UPDATE OF j SKIP LOCKED
+            """,
+            (batch_size,),
+        )
+        jobs = cursor.fetchall()
+
+        finished = []
+        for job in jobs:
+            try:
+                coords = geocode_address(job["address"], job["city"])
+            except Exception as error:
+                attempts = job["attempts"] + 1
+                if attempts >= GEOCODE_MAX_ATTEMPTS:
+                    logger.warning("Geocode job %s failed after %s attempts: %s", job["id"], attempts, error)
+                    _finish_job(cursor, job, None, None, "failed")
+                    finished.append(job["resource_id"])
+                else:
+                    cursor.execute(
+                        """
+                        UPDATE geocode_jobs
+                        SET attempts = %s,
+                            next_attempt_at = NOW() + make_interval(secs => %s),
+                            last_error = %s
+                        WHERE id = %s
+                        """,
+                        (attempts, backoff_seconds(attempts), str(error), job["id"]),
+                    )
+                continue
+
+            if coords is None:
+                _finish_job(cursor, job, None, None, "failed")
+            else:
+                _finish_job(cursor, job, coords[0], coords[1], "resolved")
+            finished.append(job["resource_id"])
+
+        connection.commit()
+        for resource_id in finished:
+            response_cache.invalidate_resource(resource_id)
+        return len(jobs)
+    except Exception:
+        if connection:
+            connection.rollback()
+        raise
+    finally:
+        if connection:
+            release_db_connection(connection)
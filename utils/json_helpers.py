@@ -0,0 +1,91 @@
+import os
+import uuid
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+
+import orjson
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import http_date, parse_accept_header
+
+JSON_MIMETYPE = "application/json"
+NDJSON_MIMETYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+
+def _default(value):
+    # Same conversions as Flask's default provider, so output does not change.
+    if isinstance(value, date):
+        return http_date(value)
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value):
+    return orjson.dumps(value, default=_default,
+                        option=orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    jsonify through orjson. Indented (debug) output still uses the json module.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.get("indent") is not None:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj).decode("utf-8")
+
+
+def wants_ndjson(accept_header):
+    accept = parse_accept_header(accept_header, MIMEAccept)
+    return accept.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def stream_start(ndjson):
+    return b"" if ndjson else b"["
+
+
+def stream_end(ndjson):
+    return b"" if ndjson else b"]\n"
+
+
+def encode_items(items, ndjson, first):
+    """
+    One chunk of a streamed listing. first tells whether anything was written
+    before, since JSON array items need a separator between chunks.
+    """
+    if ndjson:
+        return b"".join(dumps(item) + b"\n" for item in items)
+    chunk = b",".join(dumps(item) for item in items)
+    return chunk if first or not chunk else b"," + chunk
+
+
+def iter_json_chunks(items, ndjson=False, batch_size=STREAM_BATCH_SIZE):
+    """
+    Encodes items as a JSON array (or NDJSON) batch_size items at a time.
+    """
+    items = iter(items)
+    yield stream_start(ndjson)
+    first = True
+    while batch := list(islice(items, batch_size)):
+        yield encode_items(batch, ndjson, first)
+        first = False
+    yield stream_end(ndjson)
+
+
+def json_list_response(items, ndjson=False, headers=None):
+    return Response(b"".join(iter_json_chunks(items, ndjson)), status=200, headers=headers,
+                    mimetype=NDJSON_MIMETYPE if ndjson else JSON_MIMETYPE)
+
+
+def streamed_json_response(items, ndjson=False, headers=None):
+    """
+    Writes items as they are produced, so memory stays flat however many
+    there are. Errors after the first chunk can only cut the body short.
+    """
+    return Response(iter_json_chunks(items, ndjson), status=200, headers=headers,
+                    mimetype=NDJSON_MIMETYPE if ndjson else JSON_MIMETYPE)
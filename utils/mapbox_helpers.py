@@ -1,15 +1,36 @@
+import logging
 import os
+import time
 import requests
+import psycopg2
+import psycopg2.extras
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.cache_helpers import TTLCache, MISSING
+from utils.db_helpers import get_db_connection, release_db_connection, PoolTimeout
+from utils.metrics import observe_geocode
+
+logger = logging.getLogger(__name__)
 
 MAPBOX_FORWARD_URL = "https://api.mapbox.com/search/geocode/v6/forward"
+MAPBOX_BATCH_URL = "https://api.mapbox.com/search/geocode/v6/batch"
+MAPBOX_BATCH_LIMIT = 1000
 
-def geocode_address(address, city):
+GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", str(30 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL = float(os.getenv("GEOCODE_NEGATIVE_TTL", str(24 * 3600)))
+GEOCODE_BATCH_CONCURRENCY = int(os.getenv("GEOCODE_BATCH_CONCURRENCY", "4"))
+
+_memory_cache = TTLCache(
+    maxsize=int(os.getenv("GEOCODE_CACHE_SIZE", "1024")),
+    ttl=GEOCODE_CACHE_TTL,
+)
+
+
+def mapbox_forward_geocode(address, city):
     """
     return (lat, lng) o retorna None si no encuentra nada.
     """
-    token = os.getenv("MAPBOX_ACCESS_TOKEN")
-    if not token:
-        raise Exception("MAPBOX_ACCESS_TOKEN missing in .env")
+    token = _mapbox_token()
 
     query = f"{address}, {city}"
 
@@ -19,7 +40,13 @@ def geocode_address(address, city):
         "access_token": token
     }
 
-    res = requests.get(MAPBOX_FORWARD_URL, params=params, timeout=10)
+    started = time.perf_counter()
+    status = "error"
+    try:
+        res = requests.get(MAPBOX_FORWARD_URL, params=params, timeout=10)
+        status = res.status_code
+    finally:
+        observe_geocode("forward", started, status)
 
     if res.status_code != 200:
         raise Exception(f"Mapbox error {res.status_code}: {res.text}")
@@ -32,6 +59,242 @@ def geocode_address(address, city):
 
     # Mapbox RETURN [lng, lat]
     lng, lat = features[0]["geometry"]["coordinates"]
-    print("Mapbox coords:", lat, lng)
 
     return (lat, lng)
+
+
+def _mapbox_token():
+    token = os.getenv("MAPBOX_ACCESS_TOKEN")
+    if not token:
+        raise Exception("MAPBOX_ACCESS_TOKEN missing in .env")
+    return token
+
+
+def mapbox_batch_geocode(locations):
+    """
+    Geocodes up to MAPBOX_BATCH_LIMIT (address, city) pairs in one request.
+    Returns a list aligned with locations of (lat, lng) or None.
+    """
+    body = [{"q": f"{address}, {city}", "limit": 1} for address, city in locations]
+    params = {"access_token": _mapbox_token()}
+    started = time.perf_counter()
+    status = "error"
+    try:
+        res = requests.post(
+            MAPBOX_BATCH_URL,
+            params=params,
+            json=body,
+            timeout=60,
+        )
+        status = res.status_code
+    finally:
+        observe_geocode("batch", started, status)
+
+    if res.status_code != 200:
+        raise Exception(f"Mapbox error {res.status_code}: {res.text}")
+
+    results = []
+    for collection in res.json().get("batch", []):
+        features = collection.get("features", [])
+        if not features:
+            results.append(None)
+            continue
+        # Mapbox RETURN [lng, lat]
+        lng, lat = features[0]["geometry"]["coordinates"]
+        results.append((lat, lng))
+    return _aligned(results, locations)
+
+
+def _aligned(results, locations):
+    """
+    results padded with an Exception for every location a batch geocoder
+    returned nothing for, so callers never read past the end.
+    """
+    missing = len(locations) - len(results)
+    if missing <= 0:
+        return results[:len(locations)]
+    error = Exception(f"Geocoder returned {len(results)} results for {len(locations)} locations")
+    return results + [error] * missing
+
+
+# Swappable so tests and offline development never hit Mapbox:
+#   set_geocoder(lambda address, city: (40.7128, -74.006))
+_geocoder = mapbox_forward_geocode
+_batch_geocoder = mapbox_batch_geocode
+
+
+def _geocode_or_error(geocoder, address, city):
+    try:
+        return geocoder(address, city)
+    except Exception as error:
+        return error
+
+
+def set_geocoder(geocoder, batch_geocoder=None):
+    global _geocoder, _batch_geocoder
+    _geocoder = geocoder or mapbox_forward_geocode
+    if batch_geocoder is None:
+        if geocoder is None:
+            batch_geocoder = mapbox_batch_geocode
+        else:
+            def batch_geocoder(locations):
+                return [_geocode_or_error(geocoder, address, city) for address, city in locations]
+    _batch_geocoder = batch_geocoder
+    _memory_cache.clear()
+
+
+def normalize_location(address, city):
+    def normalize(value):
+        return " ".join((value or "").casefold().split()).strip(" ,.")
+    return normalize(address), normalize(city)
+
+
+def _read_persistent_cache(keys):
+    """
+    Returns {key: coords or None} for the keys with a fresh geocode_cache row.
+    """
+    if not keys:
+        return {}
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            SELECT c.address_key, c.city_key, c.lat, c.lng
+            FROM unnest(%s::text[], %s::text[]) AS k(address_key, city_key)
+            JOIN geocode_cache c USING (address_key, city_key)
+            WHERE c.resolved_at > NOW() - make_interval(secs => CASE WHEN c.lat IS NULL THEN %s ELSE %s END)
+            """,
+            ([key[0] for key in keys], [key[1] for key in keys], GEOCODE_NEGATIVE_TTL, GEOCODE_CACHE_TTL),
+        )
+        return {
+            (address_key, city_key): None if lat is None else (float(lat), float(lng))
+            for address_key, city_key, lat, lng in cursor.fetchall()
+        }
+    except (psycopg2.Error, PoolTimeout) as error:
+        logger.warning("Geocode cache read failed: %s", error)
+        return {}
+    finally:
+        if connection:
+            release_db_connection(connection)
+
+
+def _write_persistent_cache(results):
+    """
+    Stores {key: coords or None} in geocode_cache.
+    """
+    if not results:
+        return
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        psycopg2.extras.execute_values(
+            cursor,
+            """
+            INSERT INTO geocode_cache (address_key, city_key, lat, lng)
+            VALUES %s
+            ON CONFLICT (address_key, city_key)
+            DO UPDATE SET lat = EXCLUDED.lat, lng = EXCLUDED.lng, resolved_at = NOW()
+            """,
+            [
+                (key[0], key[1]) + (coords if coords is not None else (None, None))
+                for key, coords in results.items()
+            ],
+            page_size=1000,
+        )
+        connection.commit()
+    except (psycopg2.Error, PoolTimeout) as error:
+        logger.warning("Geocode cache write failed: %s", error)
+    finally:
+        if connection:
+            release_db_connection(connection)
+
+
+def _remember(key, coords):
+    ttl = GEOCODE_CACHE_TTL if coords is not None else GEOCODE_NEGATIVE_TTL
+    _memory_cache.set(key, coords, ttl=ttl)
+
+
+def geocode_address(address, city):
+    """
+    return (lat, lng) o retorna None si no encuentra nada.
+    Cached per normalized (address, city): in memory first, then the
+    geocode_cache table, then the geocoder. "Not found" is cached too, for
+    a shorter time.
+    """
+    key = normalize_location(address, city)
+
+    coords = _memory_cache.get(key)
+    if coords is not MISSING:
+        return coords
+
+    stored = _read_persistent_cache([key])
+    if key in stored:
+        _remember(key, stored[key])
+        return stored[key]
+
+    coords = _geocoder(address, city)
+    if coords is not None:
+        coords = (float(coords[0]), float(coords[1]))
+    _remember(key, coords)
+    _write_persistent_cache({key: coords})
+    return coords
+
+
+def geocode_addresses(locations):
+    """
+    Bulk version of geocode_address for a list of (address, city) pairs.
+    Identical locations are geocoded once; cache misses go to Mapbox in
+    batches of MAPBOX_BATCH_LIMIT through a bounded thread pool.
+    Returns a list aligned with locations of (lat, lng), None (not found),
+    or the Exception raised while geocoding that location.
+    """
+    keys = [normalize_location(address, city) for address, city in locations]
+    results = {}
+    pending = {}
+    for key, location in zip(keys, locations):
+        if key in results or key in pending:
+            continue
+        coords = _memory_cache.get(key)
+        if coords is MISSING:
+            pending[key] = location
+        else:
+            results[key] = coords
+
+    stored = _read_persistent_cache(list(pending))
+    for key, coords in stored.items():
+        _remember(key, coords)
+        results[key] = coords
+        del pending[key]
+
+    if pending:
+        items = list(pending.items())
+        chunks = [items[i:i + MAPBOX_BATCH_LIMIT] for i in range(0, len(items), MAPBOX_BATCH_LIMIT)]
+
+        def geocode_chunk(chunk):
+            locations = [location for _, location in chunk]
+            try:
+                return _aligned(_batch_geocoder(locations), locations)
+            except Exception as error:
+                return [error] * len(chunk)
+
+        resolved = {}
+        with ThreadPoolExecutor(max_workers=min(GEOCODE_BATCH_CONCURRENCY, len(chunks))) as executor:
+            for chunk, chunk_results in zip(chunks, executor.map(geocode_chunk, chunks)):
+                for (key, _), coords in zip(chunk, chunk_results):
+                    if isinstance(coords, Exception):
+                        results[key] = coords
+                        continue
+                    if coords is not None:
+                        coords = (float(coords[0]), float(coords[1]))
+                    _remember(key, coords)
+                    results[key] = resolved[key] = coords
+        _write_persistent_cache(resolved)
+
+    return [results[key] for key in keys]
+
+
+def geocode_cache_stats():
+    return _memory_cache.stats()
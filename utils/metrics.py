@@ -0,0 +1,211 @@
+"""
+In-process metrics, rendered in the Prometheus text format by /metrics.
+
+Every worker process keeps its own numbers (like the pool and cache stats in
+/health), so scrape each worker or label them through the scrape target.
+"""
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# 0 disables the slow request log; above 0 the SQL of every request is kept until it ends.
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+SLOW_REQUEST_SQL_CHARS = 500
+
+logger = logging.getLogger(__name__)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    def __init__(self, name, help, kind, labels=()):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Histogram(Metric):
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, "histogram", labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [count per bucket..., sum, count]
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def totals(self):
+        """
+        (count, sum) over every label set.
+        """
+        with self._lock:
+            return sum(values[-1] for values in self._series.values()), sum(values[-2] for values in self._series.values())
+
+    def render(self):
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        lines = self.header()
+        for key, values in series:
+            for bound, count in zip(self.buckets + (math.inf,), values[:-2] + [values[-1]]):
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, [('le', _format_value(bound))])} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {values[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {values[-1]}")
+        return lines
+
+
+class Collected(Metric):
+    """
+    Read from collect() at scrape time, for numbers kept elsewhere (pool,
+    caches). collect returns {label values tuple: value}.
+    """
+
+    def __init__(self, name, help, kind, labels, collect):
+        super().__init__(name, help, kind, labels)
+        self.collect = collect
+
+    def render(self):
+        try:
+            values = sorted(self.collect().items())
+        except Exception as error:
+            logger.error("Metric %s unavailable: %s", self.name, error)
+            return []
+        return self.header() + [
+            f"{self.name}{_labels(self.labels, key)} {_format_value(value)}" for key, value in values
+        ]
+
+
+_registry = []
+
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_SECONDS = register(Histogram(
+    "http_request_duration_seconds", "Time to handle a request, until the response is handed to the server.",
+    ("method", "blueprint", "route", "status"),
+))
+REQUEST_DB_QUERIES = register(Histogram(
+    "http_request_db_queries", "Database round trips made by one request.",
+    ("method", "blueprint", "route"), QUERY_COUNT_BUCKETS,
+))
+REQUEST_DB_SECONDS = register(Histogram(
+    "http_request_db_seconds", "Time one request spent waiting on the database.",
+    ("method", "blueprint", "route"),
+))
+DB_QUERY_SECONDS = register(Histogram(
+    "db_query_duration_seconds", "Duration of each database execute, in or out of a request.",
+))
+GEOCODE_SECONDS = register(Histogram(
+    "geocode_request_duration_seconds", "Duration of outbound Mapbox geocoding calls.",
+    ("call", "status"),
+))
+
+
+class RequestStats:
+    """
+    Database work done while handling one request.
+    """
+
+    def __init__(self, keep_sql):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = [] if keep_sql else None
+
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+
+def start_request():
+    """
+    Starts collecting query stats for the current request (thread or task).
+    Returns (stats, token); pass the token to finish_request.
+    """
+    stats = RequestStats(keep_sql=SLOW_REQUEST_MS > 0)
+    return stats, _current.set(stats)
+
+
+def _statement_text(query):
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    text = " ".join(str(query).split())
+    return text if len(text) <= SLOW_REQUEST_SQL_CHARS else text[:SLOW_REQUEST_SQL_CHARS] + "..."
+
+
+def record_query(query, seconds):
+    DB_QUERY_SECONDS.observe(seconds)
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_seconds += seconds
+    if stats.statements is not None:
+        # The query as passed to execute, before parameters are bound, so
+        # values such as password hashes never reach the log.
+        stats.statements.append((seconds, query))
+
+
+def finish_request(token, stats, method, blueprint, route, status, path):
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Set in another context (the server moved the request between threads).
+        _current.set(None)
+    seconds = time.perf_counter() - stats.started
+    REQUEST_SECONDS.observe(seconds, method, blueprint, route, str(status))
+    REQUEST_DB_QUERIES.observe(stats.queries, method, blueprint, route)
+    REQUEST_DB_SECONDS.observe(stats.db_seconds, method, blueprint, route)
+
+    if SLOW_REQUEST_MS > 0 and seconds * 1000 >= SLOW_REQUEST_MS:
+        lines = [
+            f"Slow request: {method} {path} -> {status} in {seconds * 1000:.0f}ms, "
+            f"{stats.queries} queries ({stats.db_seconds * 1000:.0f}ms in the database)"
+        ]
+        for query_seconds, query in stats.statements or ():
+            lines.append(f"  {query_seconds * 1000:8.1f}ms  {_statement_text(query)}")
+        logger.warning("%s", "\n".join(lines))
+
+
+def observe_geocode(call, started, status):
+    GEOCODE_SECONDS.observe(time.perf_counter() - started, call, str(status))
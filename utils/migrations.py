@@ -0,0 +1,169 @@
+"""
+Versioned schema migrations: numbered SQL files in migrations/ applied in
+order, each recorded in schema_migrations with a checksum of its contents.
+"""
+import hashlib
+import os
+import re
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+# First line of a migration that must run outside a transaction (CREATE INDEX CONCURRENTLY).
+NO_TRANSACTION = "-- migrate: no-transaction"
+# pg_advisory_lock key, so two deploys never migrate at the same time.
+MIGRATION_LOCK_ID = 4_815_162_342
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, encoding="utf-8") as file:
+            self.sql = file.read()
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+        self.in_transaction = not self.sql.startswith(NO_TRANSACTION)
+
+    def statements(self):
+        """
+        Statements of a no-transaction migration, one per execute: a
+        multi-statement query string would run as one implicit transaction.
+        Statements must end with ";" at the end of a line.
+        """
+        statements = []
+        current = []
+        for line in self.sql.splitlines():
+            if line.strip().startswith("--") and not current:
+                continue
+            current.append(line)
+            if line.rstrip().endswith(";"):
+                statement = "\n".join(current).strip()
+                if statement:
+                    statements.append(statement)
+                current = []
+        if "\n".join(current).strip():
+            raise MigrationError(f"{self.path}: last statement has no terminating ';'")
+        return statements
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+
+    for expected, migration in enumerate(migrations, start=1):
+        if migration.version != expected:
+            raise MigrationError(f"Expected migration {expected:04d}, found {os.path.basename(migration.path)}")
+    return migrations
+
+
+def _ensure_schema_table(connection):
+    cursor = connection.cursor()
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+          version    INTEGER PRIMARY KEY,
+          name       TEXT NOT NULL,
+          checksum   TEXT NOT NULL,
+          applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """
+    )
+    connection.commit()
+
+
+def applied_migrations(connection):
+    """
+    {version: (name, checksum, applied_at)} of the migrations already applied.
+    """
+    _ensure_schema_table(connection)
+    cursor = connection.cursor()
+    cursor.execute("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version")
+    applied = {version: (name, checksum, applied_at) for version, name, checksum, applied_at in cursor.fetchall()}
+    connection.commit()
+    return applied
+
+
+def _record(cursor, migration):
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+        (migration.version, migration.name, migration.checksum),
+    )
+
+
+def apply_migration(connection, migration):
+    if migration.in_transaction:
+        try:
+            cursor = connection.cursor()
+            cursor.execute(migration.sql)
+            _record(cursor, migration)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        return
+
+    # Each statement commits on its own. Should one fail, an index built
+    # CONCURRENTLY is left INVALID and must be dropped before retrying.
+    connection.autocommit = True
+    try:
+        cursor = connection.cursor()
+        for statement in migration.statements():
+            cursor.execute(statement)
+        _record(cursor, migration)
+    finally:
+        connection.autocommit = False
+
+
+def _check_applied(migrations, applied):
+    by_version = {migration.version: migration for migration in migrations}
+    for version, (name, checksum, _) in applied.items():
+        migration = by_version.get(version)
+        if migration is None:
+            raise MigrationError(f"Database has migration {version:04d}_{name}, which is not in {MIGRATIONS_DIR}")
+        if migration.checksum != checksum:
+            raise MigrationError(f"Migration {version:04d}_{name} was edited after being applied")
+
+
+def migrate(connection, target=None, migrations=None, log=print):
+    """
+    Applies pending migrations up to target (default: all) and returns them.
+    """
+    migrations = discover_migrations() if migrations is None else migrations
+    cursor = connection.cursor()
+    cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    connection.commit()
+    try:
+        applied = applied_migrations(connection)
+        _check_applied(migrations, applied)
+        pending = [
+            migration for migration in migrations
+            if migration.version not in applied and (target is None or migration.version <= target)
+        ]
+        for migration in pending:
+            log(f"Applying {migration.version:04d}_{migration.name}")
+            apply_migration(connection, migration)
+        return pending
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+        connection.commit()
+
+
+def baseline(connection, version, migrations=None):
+    """
+    Records migrations up to version as applied without running them, for
+    databases created from student_bridge.sql before migrations existed.
+    """
+    migrations = discover_migrations() if migrations is None else migrations
+    applied = applied_migrations(connection)
+    cursor = connection.cursor()
+    for migration in migrations:
+        if migration.version <= version and migration.version not in applied:
+            _record(cursor, migration)
+    connection.commit()
@@ -0,0 +1,78 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    if value is None or value == "":
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be greater than 0")
+    return min(limit, maximum)
+
+
+def encode_cursor(*values):
+    """
+    Opaque token for the keyset position after a row, e.g.
+    encode_cursor(row["createdAt"], row["id"]).
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_values(token, *types):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if len(values) != len(types):
+            raise ValueError
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def decode_cursor(token):
+    """
+    Returns (created_at, id) from a token built by encode_cursor.
+    """
+    return _decode_values(token, datetime.fromisoformat, int)
+
+
+def decode_rank_cursor(token):
+    """
+    Returns (rank, id) from a token built by encode_cursor(row["rank"], row["id"]).
+    """
+    return _decode_values(token, float, int)
+
+
+def decode_change_token(token):
+    """
+    Returns (txid, resource_id, verification_id) from a change feed sync token.
+    """
+    return _decode_values(token, int, int, int)
+
+
+def next_page_headers(base_url, args, next_cursor):
+    """
+    Headers pointing clients at the next page. The body keeps the plain list
+    shape, so the cursor travels in X-Next-Cursor and an RFC 8288 Link header.
+    """
+    if next_cursor is None:
+        return {}
+    query = {key: value for key, value in args.items() if key != "cursor"}
+    query["cursor"] = next_cursor
+    query_string = urlencode(query)
+    return {
+        "X-Next-Cursor": next_cursor,
+        "Link": f'<{base_url}?{query_string}>; rel="next"',
+    }
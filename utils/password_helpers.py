@@ -0,0 +1,97 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", str(max(PASSWORD_HASH_WORKERS, 1) * 4)))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a process pool so request threads do not burn CPU.
+    At most queue_limit hashes may be queued or running per process,
+    including ones whose caller timed out; beyond that PasswordHasherBusy
+    is raised so callers can answer 503.
+    With workers=0 hashing runs inline (handy for development).
+    """
+
+    def __init__(self, workers, queue_limit, timeout):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pid = None
+        self._executor = None
+        self._in_flight = 0
+
+    def _acquire(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Pools do not survive a fork: each gunicorn worker gets its own.
+                self._pid = os.getpid()
+                self._executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers else None
+                self._in_flight = 0
+            if self._in_flight >= self.queue_limit:
+                raise PasswordHasherBusy("Too many password operations in progress")
+            self._in_flight += 1
+            return self._executor
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def run(self, function, *args):
+        executor = self._acquire()
+        if executor is None:
+            try:
+                return function(*args)
+            finally:
+                self._release()
+        try:
+            future = executor.submit(function, *args)
+        except Exception:
+            self._release()
+            raise
+        # Released when the work ends, not when the caller stops waiting for it.
+        future.add_done_callback(lambda _: self._release())
+        return future.result(timeout=self.timeout)
+
+    def queue_depth(self):
+        with self._lock:
+            return self._in_flight if self._pid == os.getpid() else 0
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT, PASSWORD_HASH_TIMEOUT)
+
+
+def hash_password(password, rounds=None):
+    hashed = password_hasher.run(_hash, password.encode("utf-8"), rounds or BCRYPT_ROUNDS)
+    return hashed.decode("utf-8")
+
+
+def check_password(password, hashed):
+    return password_hasher.run(_check, password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def needs_rehash(hashed):
+    # "$2b$12$..." -> 12
+    try:
+        return int(hashed.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,151 @@
+"""
+EXPLAIN-based check that the hot queries of the blueprints use indexes.
+
+Seeds a realistic amount of data inside a transaction, ANALYZEs, EXPLAINs
+each query with the same SQL the endpoints run and reports any sequential
+scan on the tables it is expected to reach through an index. Everything is
+rolled back afterwards.
+"""
+from werkzeug.datastructures import MultiDict
+
+from utils.data_access import UPDATE_RESOURCE, UPDATE_VERIFICATION, resource_params
+from utils.resource_queries import index_query, nearby_query, search_query, SHOW_RESOURCE_SQL, MY_SAVES_SQL
+from utils.clusters import parse_clusters_args, clusters_query
+from utils.change_feed import CHANGES_SQL, CHANGED_RESOURCES_SQL, CHANGES_PAGE_SIZE, START
+
+SEED_USERS = 500
+SEED_RESOURCES = 20000
+# Rare enough in the seeded titles that the GIN index is the better plan.
+SEARCH_TERM = "orthodontics"
+
+
+def seed(cursor, resources=SEED_RESOURCES, users=SEED_USERS):
+    """
+    Inserts users, resources (two verifications each) and saves. Returns
+    (a seeded user id, a seeded resource id, one of its verification ids).
+    """
+    cursor.execute(
+        """
+        INSERT INTO users (username, password)
+        SELECT 'plan_check_' || md5(random()::text || g), 'x'
+        FROM generate_series(1, %s) g
+        RETURNING id
+        """,
+        (users,),
+    )
+    user_ids = [row[0] for row in cursor.fetchall()]
+
+    cursor.execute(
+        """
+        INSERT INTO resources (created_by, title, description, category, address, city, lat, lng, created_at)
+        SELECT u.ids[1 + g %% cardinality(u.ids)],
+               CASE WHEN g %% 500 = 0 THEN 'Orthodontics clinic ' ELSE 'Community resource ' END || g,
+               'Seeded by the plan check',
+               (ARRAY['Food', 'Housing', 'Health', 'Education'])[1 + g %% 4]::resource_category,
+               g || ' Main St',
+               (ARRAY['Austin', 'Houston', 'Dallas', 'Chicago', 'Boston', 'Seattle', 'Denver', 'Miami'])[1 + g %% 8],
+               round((25 + random() * 24)::numeric, 6),
+               round((-124 + random() * 57)::numeric, 6),
+               NOW() - g * INTERVAL '1 minute'
+        FROM generate_series(1, %s) g, (SELECT %s::int[] AS ids) u
+        RETURNING id
+        """,
+        (resources, user_ids),
+    )
+    resource_ids = [row[0] for row in cursor.fetchall()]
+
+    cursor.execute(
+        """
+        INSERT INTO verifications (resource_id, user_id, status, note)
+        SELECT r.id, u.ids[1 + (r.id + k) %% cardinality(u.ids)], 'Active', 'Seeded by the plan check'
+        FROM resources r, generate_series(0, 1) k, (SELECT %s::int[] AS ids) u
+        WHERE r.id = ANY(%s)
+        """,
+        (user_ids, resource_ids),
+    )
+    cursor.execute(
+        """
+        INSERT INTO saves (resource_id, user_id)
+        SELECT r.id, u.ids[1 + (r.id * 7) %% cardinality(u.ids)]
+        FROM resources r, (SELECT %s::int[] AS ids) u
+        WHERE r.id = ANY(%s)
+        ON CONFLICT DO NOTHING
+        """,
+        (user_ids, resource_ids),
+    )
+    for table in ("users", "resources", "verifications", "saves", "resource_verification_summary", "resource_changes",
+                  "resource_cluster_cells"):
+        cursor.execute(f"ANALYZE {table}")
+    resource_id = resource_ids[len(resource_ids) // 2]
+    cursor.execute("SELECT id FROM verifications WHERE resource_id = %s LIMIT 1", (resource_id,))
+    return user_ids[0], resource_id, cursor.fetchone()[0]
+
+
+def hot_queries(user_id, resource_id, verification_id):
+    """
+    (name, sql, params, tables that must not be scanned sequentially).
+    """
+    queries = []
+
+    def add(name, built, tables):
+        queries.append((name, built[0], built[1], tables))
+
+    add("GET /resources?limit=50", index_query(MultiDict({"limit": "50"})), ("resources", "verifications"))
+    add("GET /resources?limit=50&category=Food",
+        index_query(MultiDict({"limit": "50", "category": "Food"})), ("resources", "verifications"))
+    add("GET /resources?limit=50&verifications=summary",
+        index_query(MultiDict({"limit": "50", "verifications": "summary"})),
+        ("resources", "resource_verification_summary"))
+    add("GET /resources/nearby", nearby_query(MultiDict({"lat": "37.5", "lng": "-95.5", "radius": "5"})),
+        ("resources", "verifications"))
+    add("GET /resources/search", search_query(MultiDict({"q": SEARCH_TERM})), ("resources", "verifications"))
+    add("GET /resources/<id>", (SHOW_RESOURCE_SQL, (resource_id,)), ("resources", "verifications"))
+    add("GET /resources/clusters",
+        clusters_query(*parse_clusters_args(MultiDict({"bbox": "-100,35,-90,40", "zoom": "6"}))),
+        ("resource_cluster_cells",))
+    add("GET /resources/changes", (CHANGES_SQL, (*START, CHANGES_PAGE_SIZE + 1)), ("resource_changes",))
+    add("GET /resources/changes (changed resources)", (CHANGED_RESOURCES_SQL, ([resource_id],)),
+        ("resources", "verifications"))
+    fields = {"title": "Plan check", "category": "Food", "address": "1 Main St", "city": "Austin"}
+    add("PUT /resources/<id>",
+        (UPDATE_RESOURCE.sql, {"resource_id": resource_id, "user_id": user_id,
+                               **resource_params(fields, None, None, "pending")}),
+        ("resources",))
+    add("PUT /resources/<id>/verifications/<id>",
+        (UPDATE_VERIFICATION.sql, {"resource_id": resource_id, "verification_id": verification_id,
+                                   "user_id": user_id, "status": "Active", "note": "Plan check"}),
+        ("verifications",))
+    add("GET /saves", (MY_SAVES_SQL, (user_id,)), ("saves", "resources"))
+    add("resources by owner (ON DELETE CASCADE from users)",
+        ("SELECT id FROM resources WHERE created_by = %s", (user_id,)), ("resources",))
+    add("verifications by author (ON DELETE CASCADE from users)",
+        ("SELECT id FROM verifications WHERE user_id = %s", (user_id,)), ("verifications",))
+    return queries
+
+
+def sequential_scans(plan, tables):
+    """
+    Relations among tables read with a Seq Scan anywhere in an EXPLAIN (FORMAT JSON) plan.
+    """
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in tables:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(sequential_scans(child, tables))
+    return found
+
+
+def check_plans(connection, resources=SEED_RESOURCES):
+    """
+    Returns [(name, [tables scanned sequentially])] for every hot query.
+    """
+    try:
+        cursor = connection.cursor()
+        results = []
+        for name, sql, params, tables in hot_queries(*seed(cursor, resources)):
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0][0]["Plan"]
+            results.append((name, sequential_scans(plan, tables)))
+        return results
+    finally:
+        connection.rollback()
@@ -0,0 +1,235 @@
+"""
+Token bucket rate limits for the expensive write routes.
+
+Each limited route names one of DEFAULT_LIMITS ("10/minute": a bucket of 10
+tokens refilled at 10 per minute) and takes one token per request from the
+bucket of the signed-in user, or of the client IP. RATE_LIMIT_<NAME>
+overrides a limit ("20/minute", or "off").
+
+Every RATE_LIMIT_* setting is read once, when this module is imported, and
+an invalid or unknown one stops the app with a ValueError naming it.
+"""
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import psycopg2
+from flask import g, jsonify, request
+
+from utils.db_helpers import get_db_connection, release_db_connection, PoolTimeout
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+DEFAULT_LIMITS = {
+    "resource_writes": "30/minute",      # POST/PUT /resources, each may call Mapbox
+    "bulk_import": "5/minute",           # POST /resources/bulk
+    "verification_writes": "30/minute",  # POST/PUT verifications
+    "sign_in": "10/minute",              # bcrypt, per IP
+    "sign_up": "5/minute",               # bcrypt, per IP
+}
+BACKENDS = ("memory", "postgres")
+SETTINGS = ("RATE_LIMIT_BACKEND", "RATE_LIMIT_MEMORY_KEYS", "RATE_LIMIT_TRUSTED_PROXIES")
+
+
+def int_setting(variable, default, minimum):
+    value = os.getenv(variable, default)
+    try:
+        number = int(value)
+    except ValueError:
+        number = None
+    if number is None or number < minimum:
+        raise ValueError(f"Invalid {variable} {value!r}, expected an integer of at least {minimum}")
+    return number
+
+
+# X-Forwarded-For entries added by proxies we trust (Heroku's router adds one).
+TRUSTED_PROXIES = int_setting("RATE_LIMIT_TRUSTED_PROXIES", "1" if "ON_HEROKU" in os.environ else "0", 0)
+
+
+def parse_rate(value):
+    """
+    "10/minute" -> (capacity 10, refill rate in tokens per second), None for "off".
+    """
+    if value.strip().lower() == "off":
+        return None
+    try:
+        count, period = value.strip().split("/")
+        capacity = int(count)
+        seconds = PERIODS[period.strip().lower().rstrip("s")]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit {value!r}, expected e.g. 10/minute or off")
+    if capacity < 1:
+        raise ValueError(f"Invalid rate limit {value!r}, count must be at least 1")
+    return capacity, capacity / seconds
+
+
+def load_limits(environ=os.environ):
+    """
+    {name: (capacity, rate) or None} for every DEFAULT_LIMITS entry.
+    Raises ValueError naming the variable that is invalid, or unknown (a
+    misspelt RATE_LIMIT_SIGNIN would otherwise be ignored silently).
+    """
+    variables = {f"RATE_LIMIT_{name.upper()}": name for name in DEFAULT_LIMITS}
+    for variable in environ:
+        if variable.startswith("RATE_LIMIT_") and variable not in variables and variable not in SETTINGS:
+            raise ValueError(f"Unknown setting {variable}, expected one of {', '.join(sorted(variables))}")
+
+    limits = {}
+    for variable, name in variables.items():
+        try:
+            limits[name] = parse_rate(environ.get(variable, DEFAULT_LIMITS[name]))
+        except ValueError as error:
+            raise ValueError(f"{variable}: {error}") from None
+    return limits
+
+
+class MemoryBackend:
+    """
+    Buckets of this process only: with N workers a client effectively gets
+    N times the limit. Least recently used buckets beyond maxsize are
+    dropped, which hands them a full bucket again.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+class PostgresBackend:
+    """
+    Shared by every gunicorn worker through the UNLOGGED rate_limit_buckets
+    table: one call to rate_limit_take() per request. If Postgres is
+    unavailable requests are let through rather than failed.
+    """
+
+    def take(self, key, capacity, rate):
+        connection = None
+        try:
+            connection = get_db_connection()
+            cursor = connection.cursor()
+            cursor.execute("SELECT allowed, retry_after FROM rate_limit_take(%s, %s, %s)", (key, capacity, rate))
+            allowed, retry_after = cursor.fetchone()
+            if random.random() < 0.01:
+                # Idle this long, any bucket is full again: same as no row.
+                cursor.execute("DELETE FROM rate_limit_buckets WHERE updated_at < NOW() - INTERVAL '1 hour'")
+            connection.commit()
+            return allowed, retry_after
+        except (psycopg2.Error, PoolTimeout) as error:
+            logger.warning("Rate limit backend error: %s", error)
+            return True, 0.0
+        finally:
+            if connection:
+                release_db_connection(connection)
+
+
+class RateLimiter:
+    def __init__(self, backend, limits=None):
+        self.backend = backend
+        self._limits = load_limits() if limits is None else limits
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    def limit(self, name):
+        """
+        (capacity, rate) of a named limit, or None when it is off.
+        """
+        return self._limits[name]
+
+    def take(self, name, key):
+        """
+        Takes a token for key. Returns seconds to wait, 0 when allowed.
+        """
+        limit = self.limit(name)
+        if limit is None:
+            return 0
+        allowed, retry_after = self.backend.take(f"{name}:{key}", *limit)
+        with self._lock:
+            if allowed:
+                self.allowed += 1
+            else:
+                self.limited += 1
+        return 0 if allowed else retry_after
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": type(self.backend).__name__,
+                "allowed": self.allowed,
+                "limited": self.limited,
+            }
+
+
+def _build_backend():
+    backend = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    if backend not in BACKENDS:
+        raise ValueError(f"Invalid RATE_LIMIT_BACKEND {backend!r}, expected one of {', '.join(BACKENDS)}")
+    if backend == "postgres":
+        return PostgresBackend()
+    return MemoryBackend(maxsize=int_setting("RATE_LIMIT_MEMORY_KEYS", "10000", 1))
+
+
+rate_limiter = RateLimiter(_build_backend())
+
+
+def client_ip(remote_addr, forwarded_for):
+    """
+    The client address: remote_addr, or the X-Forwarded-For entry added by
+    the outermost trusted proxy (entries before it can be forged).
+    """
+    if TRUSTED_PROXIES and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        if hops:
+            return hops[-min(TRUSTED_PROXIES, len(hops))]
+    return remote_addr or "unknown"
+
+
+def rate_limit_key(user, remote_addr, forwarded_for, by="user"):
+    if by == "user" and user is not None:
+        return f"user:{user['id']}"
+    return f"ip:{client_ip(remote_addr, forwarded_for)}"
+
+
+def retry_after_header(retry_after):
+    return {"Retry-After": str(max(1, math.ceil(retry_after)))}
+
+
+def rate_limited(name, by="user"):
+    """
+    Limits the route to the named rate per user (by="user", for routes
+    behind token_required; anonymous requests fall back to their IP) or per
+    client IP (by="ip"). Over the limit it answers 429 with Retry-After.
+    """
+    if name not in DEFAULT_LIMITS:
+        raise KeyError(f"Unknown rate limit {name!r}")
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = rate_limit_key(g.get("user"), request.remote_addr, request.headers.get("X-Forwarded-For"), by)
+            retry_after = rate_limiter.take(name, key)
+            if retry_after:
+                return jsonify({"error": "Too many requests"}), 429, retry_after_header(retry_after)
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
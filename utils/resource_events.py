@@ -0,0 +1,269 @@
+"""
+Server-sent events for GET /resources/stream.
+
+Write handlers publish an event with pg_notify in the transaction of the
+write, so it is delivered only once the write commits. Every process keeps
+one LISTEN connection (EventHub, on its own thread) and fans each event out
+to the streams it serves, filtered by category, city or bounding box.
+Events are small (ids, status, category, city, coordinates); clients fetch
+the resource, or sync through GET /resources/changes, for the rest.
+"""
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+
+import psycopg2
+
+from utils.db_helpers import db_dsn
+from utils.geo_helpers import parse_bbox
+from utils.resource_helpers import ALLOWED_CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "resource_events"
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "100"))
+STREAM_MAX_SUBSCRIBERS = int(os.getenv("STREAM_MAX_SUBSCRIBERS", "1000"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+LISTEN_RECONNECT_SECONDS = 5
+STREAM_HEADERS = {
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+# One notification per resource, built from the committed row so every
+# publisher sends the same shape.
+PUBLISH_SQL = f"""
+            SELECT pg_notify('{CHANNEL}', json_strip_nulls(json_build_object(
+                'event', %(event)s::text,
+                'resource_id', r.id,
+                'category', r.category,
+                'city', r.city,
+                'lat', r.lat::float8,
+                'lng', r.lng::float8,
+                'verification_id', %(verification_id)s::integer,
+                'status', %(status)s::text
+            ))::text)
+            FROM resources r
+            WHERE r.id = ANY(%(resource_ids)s)
+            """
+
+# The row is gone by then, so its values are passed in.
+PUBLISH_DELETED_SQL = f"""
+            SELECT pg_notify('{CHANNEL}', json_strip_nulls(json_build_object(
+                'event', 'resource.deleted',
+                'resource_id', %(id)s::integer,
+                'category', %(category)s::text,
+                'city', %(city)s::text,
+                'lat', %(lat)s::float8,
+                'lng', %(lng)s::float8
+            ))::text)
+            """
+
+
+def publish_params(event, resource_ids, verification_id=None, status=None):
+    return {"event": event, "resource_ids": list(resource_ids), "verification_id": verification_id, "status": status}
+
+
+def publish(cursor, event, resource_ids, verification_id=None, status=None):
+    """
+    Queues event for each of resource_ids; sent when the transaction commits.
+    """
+    cursor.execute(PUBLISH_SQL, publish_params(event, resource_ids, verification_id, status))
+
+
+def publish_deleted(cursor, resource):
+    cursor.execute(PUBLISH_DELETED_SQL, {name: resource[name] for name in ("id", "category", "city", "lat", "lng")})
+
+
+def format_event(name, data):
+    return f"event: {name}\ndata: {data}\n\n".encode("utf-8")
+
+
+# Sent first: how long EventSource waits before reconnecting, in ms.
+STREAM_START = f"retry: {LISTEN_RECONNECT_SECONDS * 1000}\n\n".encode("utf-8")
+KEEPALIVE = b": keepalive\n\n"
+# Events may have been missed (the listener reconnected, or the client fell
+# behind): clients should catch up through GET /resources/changes.
+RESET = format_event("reset", '{"reason": "events may have been missed"}')
+
+
+class StreamFilter:
+    def __init__(self, category=None, city=None, bbox=None):
+        self.category = category
+        self.city = city.lower() if city else None
+        self.bbox = bbox
+
+    def matches(self, event):
+        if self.category and event.get("category") != self.category:
+            return False
+        if self.city and (event.get("city") or "").lower() != self.city:
+            return False
+        if self.bbox:
+            lat, lng = event.get("lat"), event.get("lng")
+            if lat is None or lng is None:
+                return False
+            min_lng, min_lat, max_lng, max_lat = self.bbox
+            return min_lat <= lat <= max_lat and min_lng <= lng <= max_lng
+        return True
+
+
+def parse_stream_filter(args):
+    """
+    StreamFilter for ?category=&city=&bbox=. Raises ValueError on invalid values.
+    """
+    category = args.get("category")
+    if category and category not in ALLOWED_CATEGORIES:
+        raise ValueError("Invalid category")
+    bbox = parse_bbox(args["bbox"]) if args.get("bbox") else None
+    return StreamFilter(category, args.get("city"), bbox)
+
+
+class StreamFull(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(self, hub, event_filter, deliver):
+        self.hub = hub
+        self.filter = event_filter
+        self.deliver = deliver
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class EventHub:
+    """
+    One LISTEN connection per process, started with the first subscriber.
+    deliver(chunk) is called on the listener thread with each matching
+    event, already formatted as SSE bytes, so it must not block. If the
+    connection drops every subscriber gets RESET and the hub reconnects.
+    """
+
+    def __init__(self, channel=CHANNEL, max_subscribers=STREAM_MAX_SUBSCRIBERS):
+        self.channel = channel
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._subscriptions = set()
+        self._thread = None
+        self.connected = False
+        self.events = 0
+        self.deliveries = 0
+        self.rejected = 0
+
+    def subscribe(self, event_filter, deliver):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked (gunicorn workers): the parent's thread did not come along.
+                self._reset()
+            if len(self._subscriptions) >= self.max_subscribers:
+                self.rejected += 1
+                raise StreamFull(f"This server already streams to {self.max_subscribers} clients")
+            subscription = Subscription(self, event_filter, deliver)
+            self._subscriptions.add(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name="resource-events", daemon=True)
+                self._thread.start()
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def _deliver(self, subscriptions, chunk):
+        for subscription in subscriptions:
+            try:
+                subscription.deliver(chunk)
+            except Exception as error:
+                logger.error("Resource event delivery failed: %s", error)
+
+    def dispatch(self, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed resource event: %s", payload)
+            return
+        chunk = format_event(event.get("event", "message"), payload)
+        with self._lock:
+            matching = [s for s in self._subscriptions if s.filter.matches(event)]
+            self.events += 1
+            self.deliveries += len(matching)
+        self._deliver(matching, chunk)
+
+    def _listen(self):
+        while True:
+            connection = None
+            try:
+                connection = psycopg2.connect(db_dsn())
+                connection.autocommit = True
+                connection.cursor().execute(f"LISTEN {self.channel}")
+                self.connected = True
+                while True:
+                    # The timeout only lets poll() notice a dead connection.
+                    select.select([connection], [], [], 60)
+                    connection.poll()
+                    while connection.notifies:
+                        self.dispatch(connection.notifies.pop(0).payload)
+            except Exception as error:
+                logger.error("Resource event listener failed: %s", error)
+            finally:
+                if connection is not None:
+                    connection.close()
+            if self.connected:
+                self.connected = False
+                with self._lock:
+                    subscriptions = list(self._subscriptions)
+                self._deliver(subscriptions, RESET)
+            time.sleep(LISTEN_RECONNECT_SECONDS)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "connected": self.connected,
+                "subscribers": len(self._subscriptions),
+                "events": self.events,
+                "deliveries": self.deliveries,
+                "rejected": self.rejected,
+            }
+
+
+event_hub = EventHub()
+
+
+def open_stream(event_filter, hub=event_hub):
+    """
+    (subscription, chunks) for a threaded (WSGI) stream: chunks yields the
+    SSE bytes, with a keepalive comment when idle. A client that falls
+    STREAM_QUEUE_SIZE events behind gets RESET and the stream ends. Close
+    the subscription once the response is done. Raises StreamFull.
+    """
+    events = queue.Queue(STREAM_QUEUE_SIZE)
+    overflowed = threading.Event()
+
+    def deliver(chunk):
+        try:
+            events.put_nowait(chunk)
+        except queue.Full:
+            overflowed.set()
+
+    subscription = hub.subscribe(event_filter, deliver)
+
+    def chunks():
+        yield STREAM_START
+        while not overflowed.is_set():
+            try:
+                yield events.get(timeout=STREAM_HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield KEEPALIVE
+        yield RESET
+
+    return subscription, chunks()
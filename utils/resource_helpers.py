@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+
+ALLOWED_CATEGORIES = ["Food", "Housing", "Health", "Education"]
+REQUIRED_RESOURCE_FIELDS = ["title", "category", "address", "city"]
+OPTIONAL_RESOURCE_FIELDS = ["description", "requirements"]
+
+
+def validate_resource_fields(data):
+    """
+    Returns an error message for an invalid resource payload, or None.
+    """
+    if not isinstance(data, dict):
+        return "Each resource must be an object"
+    missing = [field for field in REQUIRED_RESOURCE_FIELDS if not data.get(field)]
+    if missing:
+        return f"Missing required fields: {', '.join(missing)}"
+    if data["category"] not in ALLOWED_CATEGORIES:
+        return "Invalid category"
+    return None
+
+
+def _iter_json_array(stream):
+    records = json.load(stream)
+    if not isinstance(records, list):
+        raise ValueError("Expected a JSON array of resources")
+    for record in records:
+        yield record, None
+
+
+def _iter_ndjson(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError as error:
+            yield None, f"Invalid JSON: {error}"
+
+
+def _iter_csv(stream):
+    try:
+        for record in csv.DictReader(stream):
+            # Empty CSV cells mean "not provided".
+            yield {key: (value or None) for key, value in record.items() if key}, None
+    except csv.Error as error:
+        raise ValueError(f"Invalid CSV: {error}")
+
+
+def iter_import_records(stream, content_type):
+    """
+    Yields (row_number, record, error) for each row of a bulk import body,
+    reading the stream incrementally for CSV and NDJSON.
+    """
+    mimetype = (content_type or "").split(";")[0].strip().lower()
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if mimetype == "text/csv":
+        records = _iter_csv(text)
+    elif mimetype in ("application/x-ndjson", "application/ndjson", "application/jsonlines"):
+        records = _iter_ndjson(text)
+    elif mimetype == "application/json":
+        records = _iter_json_array(text)
+    else:
+        raise ValueError("Content-Type must be application/json, application/x-ndjson or text/csv")
+
+    for row_number, (record, error) in enumerate(records, start=1):
+        if error is None:
+            error = validate_resource_fields(record)
+        yield row_number, record, error
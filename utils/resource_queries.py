@@ -0,0 +1,278 @@
+"""
+SQL and query building for the resource endpoints, kept out of the views
+so it can be unit tested without a request or a database.
+"""
+from utils.geo_helpers import bounding_box, haversine_sql, parse_coordinate
+from utils.pagination_helpers import parse_limit, encode_cursor, decode_cursor, decode_rank_cursor
+from utils.resource_helpers import ALLOWED_CATEGORIES
+
+DEFAULT_NEARBY_RADIUS_KM = 5
+MAX_NEARBY_RADIUS_KM = 50
+MAX_SEARCH_QUERY_LENGTH = 200
+
+RESOURCE_COLUMNS = """
+                   r.id,
+                   r.created_by AS resource_author_id,
+                   r.title,
+                   r.description,
+                   r.category,
+                   r.address,
+                   r.city,
+                   r.lat::float8 AS lat,
+                   r.lng::float8 AS lng,
+                   r.requirements,
+                   r.hidden_reason,
+                   r.hidden_at,
+                   r.geocode_status,
+                   r.created_at AS "createdAt",
+                   r.updated_at AS "updatedAt",
+                   u.username AS author_username"""
+
+VERIFICATION_COLUMNS = """
+                   v.id AS verification_id,
+                   v.status AS verification_status,
+                   v.note AS verification_note,
+                   v.created_at AS "verificationCreatedAt",
+                   u_v.username AS verification_author_username,
+                   v.user_id AS verification_author_id"""
+
+VERIFICATION_JOINS = """
+            INNER JOIN users u ON r.created_by = u.id
+            LEFT JOIN verifications v ON r.id = v.resource_id
+            LEFT JOIN users u_v ON v.user_id = u_v.id"""
+
+SUMMARY_COLUMNS = """
+                   s.latest_status AS summary_latest_status,
+                   s.last_verified_at AS "summaryLastVerifiedAt",
+                   coalesce(s.verification_count, 0) AS summary_total,
+                   coalesce(s.active_count, 0) AS summary_active,
+                   coalesce(s.temporarily_closed_count, 0) AS summary_temporarily_closed,
+                   coalesce(s.no_longer_available_count, 0) AS summary_no_longer_available,
+                   coalesce(s.info_needs_update_count, 0) AS summary_info_needs_update"""
+
+SUMMARY_JOINS = """
+            INNER JOIN users u ON r.created_by = u.id
+            LEFT JOIN resource_verification_summary s ON s.resource_id = r.id"""
+
+MY_SAVES_SQL = f"""
+            SELECT {RESOURCE_COLUMNS},
+                   s.created_at AS "savedAt"
+            FROM saves s
+            JOIN resources r ON s.resource_id = r.id
+            JOIN users u ON r.created_by = u.id
+            WHERE s.user_id = %s
+            ORDER BY s.created_at DESC
+            """
+
+SHOW_RESOURCE_SQL = f"""
+            SELECT {RESOURCE_COLUMNS},
+{VERIFICATION_COLUMNS}
+            FROM resources r
+            {VERIFICATION_JOINS}
+            WHERE r.id = %s
+            ORDER BY v.created_at DESC
+            """
+
+
+def resource_filters(args):
+    """
+    SQL conditions (on alias r) and params for the ?category=, ?city= and
+    ?hidden= query string filters. Raises ValueError on invalid values.
+    """
+    filters = []
+    params = []
+
+    category = args.get("category")
+    if category:
+        if category not in ALLOWED_CATEGORIES:
+            raise ValueError("Invalid category")
+        filters.append("r.category = %s")
+        params.append(category)
+
+    city = args.get("city")
+    if city:
+        filters.append("lower(r.city) = lower(%s)")
+        params.append(city)
+
+    hidden = args.get("hidden")
+    if hidden is not None:
+        if hidden.lower() in ("true", "1"):
+            filters.append("r.hidden_at IS NOT NULL")
+        elif hidden.lower() in ("false", "0"):
+            filters.append("r.hidden_at IS NULL")
+        else:
+            raise ValueError("hidden must be true or false")
+
+    return filters, params
+
+
+def summary_requested(args):
+    """
+    ?verifications=summary lists resources with their verification summary
+    instead of the full verification history.
+    """
+    mode = args.get("verifications", "full")
+    if mode not in ("full", "summary"):
+        raise ValueError("verifications must be full or summary")
+    return mode == "summary"
+
+
+def saved_requested(args):
+    """
+    ?saved=true adds "saved": true/false for the signed-in user to every
+    listed resource.
+    """
+    saved = args.get("saved", "false").lower()
+    if saved not in ("true", "1", "false", "0"):
+        raise ValueError("saved must be true or false")
+    return saved in ("true", "1")
+
+
+def index_query(args):
+    """
+    (sql, params, limit) for GET /resources. limit is None when the request
+    is not paginated. Raises ValueError on invalid query string values.
+    """
+    summary = summary_requested(args)
+    filters, params = resource_filters(args)
+    paginated = "limit" in args or "cursor" in args
+    limit = parse_limit(args.get("limit")) if paginated else None
+    if args.get("cursor"):
+        filters.append("(r.created_at, r.id) < (%s, %s)")
+        params.extend(decode_cursor(args["cursor"]))
+
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+    # One extra resource tells us whether there is a next page.
+    page_limit = "LIMIT %s" if paginated else ""
+    if paginated:
+        params.append(limit + 1)
+
+    if summary:
+        # One row per resource, straight off the (created_at, id) index.
+        sql = f"""
+            SELECT {RESOURCE_COLUMNS},
+{SUMMARY_COLUMNS}
+            FROM resources r
+            {SUMMARY_JOINS}
+            {where}
+            ORDER BY r.created_at DESC, r.id DESC
+            {page_limit}
+            """
+        return sql, params, limit
+
+    sql = f"""
+            WITH page AS (
+                SELECT r.*
+                FROM resources r
+                {where}
+                ORDER BY r.created_at DESC, r.id DESC
+                {page_limit}
+            )
+            SELECT {RESOURCE_COLUMNS},
+{VERIFICATION_COLUMNS}
+            FROM page r
+            {VERIFICATION_JOINS}
+            ORDER BY r.created_at DESC, r.id DESC, v.created_at DESC
+            """
+    return sql, params, limit
+
+
+def paginate(resources, limit, cursor_fields=("createdAt", "id")):
+    """
+    Trims the extra resource record fetched by index_query (or search_query,
+    with cursor_fields=("rank", "id")). Returns (page, next_cursor).
+    """
+    if limit is None or len(resources) <= limit:
+        return resources, None
+    page = resources[:limit]
+    last = page[-1]
+    return page, encode_cursor(*(getattr(last, field) for field in cursor_fields))
+
+
+def search_query(args):
+    """
+    (sql, params, limit) for GET /resources/search?q=. Matches use the GIN
+    index on resources.search_vector; results are ranked best first and
+    paginated on (rank, id). Raises ValueError on invalid query string values.
+    """
+    text = (args.get("q") or "").strip()
+    if not text:
+        raise ValueError("q is required")
+    if len(text) > MAX_SEARCH_QUERY_LENGTH:
+        raise ValueError(f"q must be at most {MAX_SEARCH_QUERY_LENGTH} characters")
+    summary = summary_requested(args)
+    limit = parse_limit(args.get("limit"))
+    filters, filter_params = resource_filters(args)
+    params = [text] + filter_params
+
+    page_filter = ""
+    if args.get("cursor"):
+        page_filter = "WHERE (rank, id) < (%s, %s)"
+        params.extend(decode_rank_cursor(args["cursor"]))
+    params.append(limit + 1)
+
+    filters = ["r.search_vector @@ query"] + filters
+    sql = f"""
+            WITH matches AS (
+                SELECT r.id, ts_rank_cd(r.search_vector, query)::float8 AS rank
+                FROM resources r, websearch_to_tsquery('english', %s) query
+                WHERE {' AND '.join(filters)}
+            ),
+            page AS (
+                SELECT id, rank
+                FROM matches
+                {page_filter}
+                ORDER BY rank DESC, id DESC
+                LIMIT %s
+            )
+            SELECT {RESOURCE_COLUMNS},
+                   p.rank,
+{SUMMARY_COLUMNS if summary else VERIFICATION_COLUMNS}
+            FROM page p
+            JOIN resources r ON r.id = p.id
+            {SUMMARY_JOINS if summary else VERIFICATION_JOINS}
+            ORDER BY p.rank DESC, r.id DESC{'' if summary else ', v.created_at DESC'}
+            """
+    return sql, params, limit
+
+
+def nearby_query(args):
+    """
+    (sql, params) for GET /resources/nearby. Raises ValueError on invalid
+    query string values.
+    """
+    lat = parse_coordinate(args.get("lat"), "lat", 90)
+    lng = parse_coordinate(args.get("lng"), "lng", 180)
+    radius_km = float(args.get("radius", DEFAULT_NEARBY_RADIUS_KM))
+    if not 0 < radius_km <= MAX_NEARBY_RADIUS_KM:
+        raise ValueError(f"radius must be between 0 and {MAX_NEARBY_RADIUS_KM} km")
+    limit = parse_limit(args.get("limit"))
+    filters, filter_params = resource_filters(args)
+
+    # B-tree range on (lat, lng) first, exact haversine distance second.
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    filters = ["r.lat BETWEEN %s AND %s", "r.lng BETWEEN %s AND %s"] + filters
+    params = [lat, lat, lng, min_lat, max_lat, min_lng, max_lng] + filter_params
+    params += [radius_km, limit]
+
+    sql = f"""
+            WITH candidates AS (
+                SELECT r.*, {haversine_sql("r")} AS distance_km
+                FROM resources r
+                WHERE {' AND '.join(filters)}
+            ),
+            nearby AS (
+                SELECT *
+                FROM candidates
+                WHERE distance_km <= %s
+                ORDER BY distance_km, id
+                LIMIT %s
+            )
+            SELECT {RESOURCE_COLUMNS},
+                   round(r.distance_km::numeric, 3)::float8 AS distance_km,
+{VERIFICATION_COLUMNS}
+            FROM nearby r
+            {VERIFICATION_JOINS}
+            ORDER BY r.distance_km, r.id, v.created_at DESC
+            """
+    return sql, params
@@ -0,0 +1,149 @@
+"""
+Compact rows for the resource listings.
+
+The listing queries are read with plain tuple cursors and folded into
+__slots__ dataclasses, so a resource costs one small object instead of a
+dict per joined row, and orjson encodes the records natively. Field names
+are those of the dict rows and fields are declared in sorted order (orjson
+keeps the declaration order of dataclasses), so the JSON is unchanged.
+"""
+import dataclasses
+from functools import lru_cache
+from operator import itemgetter
+
+# Joined verification column -> field of the nested verification.
+VERIFICATION_COLUMNS = {
+    "verificationCreatedAt": "createdAt",
+    "verification_note": "note",
+    "verification_status": "status",
+    "verification_author_id": "verification_author_id",
+    "verification_author_username": "verification_author_username",
+    "verification_id": "verification_id",
+}
+SUMMARY_COUNT_COLUMNS = {
+    "Active": "summary_active",
+    "Temporarily Closed": "summary_temporarily_closed",
+    "No Longer Available": "summary_no_longer_available",
+    "Info Needs Update": "summary_info_needs_update",
+}
+
+
+@dataclasses.dataclass(slots=True)
+class Verification:
+    createdAt: object
+    note: object
+    status: object
+    verification_author_id: object
+    verification_author_username: object
+    verification_id: object
+
+
+@lru_cache(maxsize=None)
+def resource_type(fields):
+    """
+    The Resource record class for one set of fields (a sorted tuple).
+    Listings differ in their extra fields (rank, distance_km, saved...).
+    """
+    return dataclasses.make_dataclass("Resource", [(name, object) for name in fields], slots=True)
+
+
+class ResourceReader:
+    """
+    Folds the tuple rows of one listing query into Resource records, like
+    db_helpers.ResourceConsolidator does for dict rows: rows of the same
+    resource must be adjacent. columns is the cursor description (or the
+    column names). With saved_ids, each record gets saved: id in saved_ids.
+    """
+
+    def __init__(self, columns, saved_ids=None):
+        names = [getattr(column, "name", column) for column in columns]
+        position = {name: index for index, name in enumerate(names)}
+        self.id_index = position["id"]
+        self.summary = "summary_total" in position
+        self.saved_ids = saved_ids
+
+        if self.summary:
+            computed = ["verification_summary"]
+            self.summary_total = position["summary_total"]
+            self.summary_latest_status = position["summary_latest_status"]
+            self.summary_last_verified_at = position["summaryLastVerifiedAt"]
+            self.summary_counts = [(status, position[column]) for status, column in SUMMARY_COUNT_COLUMNS.items()]
+        else:
+            computed = ["verifications"]
+            self.verification_index = position["verification_id"]
+            by_field = {field: position[column] for column, field in VERIFICATION_COLUMNS.items()}
+            self.verification_getter = itemgetter(*(by_field[field.name] for field in dataclasses.fields(Verification)))
+        if saved_ids is not None:
+            computed.append("saved")
+
+        # Computed values are appended to the row, after its columns.
+        for offset, name in enumerate(computed):
+            position[name] = len(names) + offset
+        plain = [name for name in names if not name.startswith(("verification", "summary"))]
+        fields = tuple(sorted(plain + computed))
+        self.type = resource_type(fields)
+        self.getter = itemgetter(*(position[name] for name in fields))
+        self.current = None
+
+    def _verification(self, row):
+        return Verification(*self.verification_getter(row))
+
+    def _resource(self, row):
+        if self.summary:
+            computed = ({
+                "latest_status": row[self.summary_latest_status],
+                "lastVerifiedAt": row[self.summary_last_verified_at],
+                "total": row[self.summary_total],
+                "counts": {status: row[index] for status, index in self.summary_counts},
+            },)
+        else:
+            computed = ([self._verification(row)] if row[self.verification_index] is not None else [],)
+        if self.saved_ids is not None:
+            computed += (row[self.id_index] in self.saved_ids,)
+        return self.type(*self.getter(tuple(row) + computed))
+
+    def add(self, row):
+        """
+        Returns the previous resource once row starts a new one, else None.
+        """
+        if self.current is not None and row[self.id_index] == self.current.id:
+            if not self.summary and row[self.verification_index] is not None:
+                self.current.verifications.append(self._verification(row))
+            return None
+
+        finished, self.current = self.current, self._resource(row)
+        return finished
+
+    def finish(self):
+        finished, self.current = self.current, None
+        return finished
+
+    def read(self, rows):
+        for row in rows:
+            finished = self.add(row)
+            if finished is not None:
+                yield finished
+
+        last = self.finish()
+        if last is not None:
+            yield last
+
+
+def iter_resources(cursor, saved_ids=None):
+    """
+    Resource records of an executed psycopg2 tuple cursor, yielded as they
+    are read. Named cursors only have a description once the first rows
+    are fetched, so the reader is built on the first row.
+    """
+    reader = None
+    for row in cursor:
+        if reader is None:
+            reader = ResourceReader(cursor.description, saved_ids)
+        finished = reader.add(row)
+        if finished is not None:
+            yield finished
+
+    if reader is not None:
+        last = reader.finish()
+        if last is not None:
+            yield last
@@ -0,0 +1,250 @@
+import logging
+import os
+import random
+import threading
+from functools import wraps
+from urllib.parse import urlencode
+
+import psycopg2
+import psycopg2.extras
+from flask import Response, g, make_response, request
+
+from utils.cache_helpers import TTLCache, MISSING
+from utils.clusters import parse_clusters_args, tile_key
+from utils.db_helpers import get_db_connection, release_db_connection, PoolTimeout
+from utils.json_helpers import wants_ndjson
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+CACHED_HEADERS = ("Content-Type", "Vary", "X-Next-Cursor", "Link")
+
+
+class MemoryBackend:
+    """
+    Per-process TTL LRU. It is the default, and the local stand-in for a
+    shared backend: same interface, nothing shared between workers.
+    """
+
+    def __init__(self, maxsize=256):
+        self._entries = TTLCache(maxsize=maxsize, ttl=RESPONSE_CACHE_TTL)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        return None if entry is MISSING else entry
+
+    def set(self, key, body, headers, ttl):
+        self._entries.set(key, (body, headers), ttl=ttl)
+
+    def generation(self, name):
+        with self._lock:
+            return self._generations.get(name, 0)
+
+    def bump(self, name):
+        with self._lock:
+            self._generations[name] = self._generations.get(name, 0) + 1
+
+
+class PostgresBackend:
+    """
+    Shared by every gunicorn worker through UNLOGGED tables. Still one
+    primary key lookup instead of the resource joins.
+    """
+
+    def _run(self, query, params, fetch=False):
+        connection = None
+        try:
+            connection = get_db_connection()
+            cursor = connection.cursor()
+            cursor.execute(query, params)
+            row = cursor.fetchone() if fetch else None
+            connection.commit()
+            return row
+        except (psycopg2.Error, PoolTimeout) as error:
+            logger.warning("Response cache backend error: %s", error)
+            return None
+        finally:
+            if connection:
+                release_db_connection(connection)
+
+    def get(self, key):
+        row = self._run(
+            "SELECT body, headers FROM response_cache WHERE key = %s AND expires_at > NOW()",
+            (key,),
+            fetch=True,
+        )
+        return None if row is None else (bytes(row[0]), row[1])
+
+    def set(self, key, body, headers, ttl):
+        self._run(
+            """
+            INSERT INTO response_cache (key, body, headers, expires_at)
+            VALUES (%s, %s, %s, NOW() + make_interval(secs => %s))
+            ON CONFLICT (key)
+            DO UPDATE SET body = EXCLUDED.body, headers = EXCLUDED.headers, expires_at = EXCLUDED.expires_at
+            """,
+            (key, psycopg2.Binary(body), psycopg2.extras.Json(headers), ttl),
+        )
+        if random.random() < 0.01:
+            self._run("DELETE FROM response_cache WHERE expires_at < NOW()", ())
+
+    def generation(self, name):
+        row = self._run(
+            "SELECT generation FROM response_cache_generations WHERE name = %s",
+            (name,),
+            fetch=True,
+        )
+        return row[0] if row else 0
+
+    def bump(self, name):
+        self._run(
+            """
+            INSERT INTO response_cache_generations (name, generation)
+            VALUES (%s, 1)
+            ON CONFLICT (name)
+            DO UPDATE SET generation = response_cache_generations.generation + 1
+            """,
+            (name,),
+        )
+
+
+class ResponseCache:
+    """
+    Caches serialized JSON responses. Keys embed a generation counter, so
+    invalidating bumps the counter instead of hunting for keys: entries
+    stored under an old generation are never read again and age out.
+    """
+
+    def __init__(self, backend, ttl=RESPONSE_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def index_key(self, args, ndjson=False):
+        generation = self.backend.generation("resources")
+        query = urlencode(sorted(args.items(multi=True)))
+        return f"resources:{generation}:{'ndjson:' if ndjson else ''}{query}"
+
+    def clusters_key(self, tile_key):
+        # Cluster counts change with the catalogue, so they share its generation.
+        generation = self.backend.generation("resources")
+        return f"clusters:{generation}:{tile_key}"
+
+    def resource_key(self, resource_id):
+        generation = self.backend.generation(f"resource:{resource_id}")
+        return f"resource:{resource_id}:{generation}"
+
+    def get(self, key):
+        cached = self.backend.get(key)
+        with self._lock:
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return cached
+
+    def set(self, key, body, headers):
+        self.backend.set(key, body, headers, self.ttl)
+
+    def invalidate_index(self):
+        self.backend.bump("resources")
+        with self._lock:
+            self.invalidations += 1
+
+    def invalidate_resource(self, resource_id):
+        # A resource is embedded in the listings too.
+        self.backend.bump(f"resource:{resource_id}")
+        self.invalidate_index()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+def _build_backend():
+    if os.getenv("RESPONSE_CACHE_BACKEND", "memory") == "postgres":
+        return PostgresBackend()
+    return MemoryBackend(maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "256")))
+
+
+response_cache = ResponseCache(_build_backend())
+
+
+def versioned_key(key, etag):
+    """
+    key for a response sent with etag. Generations are only bumped by the
+    process that wrote, after it committed, so a body cached under the same
+    generation can predate the version the ETag was computed from.
+    """
+    return f"{key}:{etag}" if etag else key
+
+
+def cached_response(key_builder):
+    """
+    Serves 200 responses of the wrapped view from response_cache.
+    key_builder gets the view arguments and returns the cache key, or None
+    to bypass the cache. Under conditional_response the key also takes the
+    ETag, so a cached body is only ever sent with the ETag it was built for.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = key_builder(*args, **kwargs)
+            if key is None:
+                return f(*args, **kwargs)
+            key = versioned_key(key, g.get("response_etag"))
+            cached = response_cache.get(key)
+            if cached is not None:
+                body, headers = cached
+                mimetype = None if "Content-Type" in headers else "application/json"
+                return Response(body, status=200, headers=headers, mimetype=mimetype)
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+                response_cache.set(key, response.get_data(), headers)
+            return response
+        return decorated_function
+    return decorator
+
+
+def _index_key():
+    # Unpaginated listings are streamed, and streamed responses are not cached.
+    if "limit" not in request.args and "cursor" not in request.args:
+        return None
+    # ?saved= differs per user.
+    if "saved" in request.args:
+        return None
+    return response_cache.index_key(request.args, wants_ndjson(request.headers.get("Accept")))
+
+
+def cached_index_response(f):
+    return cached_response(lambda *args, **kwargs: _index_key())(f)
+
+
+def _clusters_key():
+    try:
+        zoom, tiles, category = parse_clusters_args(request.args)
+    except ValueError:
+        return None
+    return response_cache.clusters_key(tile_key(zoom, tiles, category))
+
+
+def cached_clusters_response(f):
+    return cached_response(lambda *args, **kwargs: _clusters_key())(f)
+
+
+def cached_resource_response(f):
+    return cached_response(lambda resource_id: response_cache.resource_key(resource_id))(f)
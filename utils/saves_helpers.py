@@ -0,0 +1,135 @@
+import base64
+import os
+
+import psycopg2.extras
+import psycopg2.sql
+
+SAVES_BATCH_MAX_IDS = int(os.getenv("SAVES_BATCH_MAX_IDS", "1000"))
+# resources.id is a SERIAL (INTEGER): larger ids would fail the whole VALUES list.
+MAX_RESOURCE_ID = 2_147_483_647
+
+SAVED_IDS_SQL = "SELECT resource_id FROM saves WHERE user_id = %s ORDER BY resource_id"
+
+# Adds and removes in one statement. Ids of missing resources are skipped
+# by the join instead of failing the whole batch on the foreign key.
+SAVES_BATCH_SQL = """
+            WITH input (resource_id, saved) AS (VALUES %s),
+            added AS (
+                INSERT INTO saves (resource_id, user_id)
+                SELECT i.resource_id, {user_id}
+                FROM input i
+                JOIN resources r ON r.id = i.resource_id
+                WHERE i.saved
+                ON CONFLICT (resource_id, user_id) DO NOTHING
+                RETURNING resource_id
+            ),
+            removed AS (
+                DELETE FROM saves s
+                USING input i
+                WHERE s.user_id = {user_id} AND s.resource_id = i.resource_id AND NOT i.saved
+                RETURNING s.resource_id
+            )
+            SELECT 'added' AS change, resource_id FROM added
+            UNION ALL
+            SELECT 'removed', resource_id FROM removed
+            """
+
+# Saves one resource, or reports that it does not exist, in one round trip.
+CREATE_SAVE_SQL = """
+            WITH target AS (
+                SELECT id FROM resources WHERE id = %(resource_id)s
+            ),
+            inserted AS (
+                INSERT INTO saves (resource_id, user_id)
+                SELECT id, %(user_id)s FROM target
+                ON CONFLICT (resource_id, user_id) DO NOTHING
+                RETURNING id
+            )
+            SELECT t.id AS resource_id, i.id AS save_id
+            FROM target t
+            LEFT JOIN inserted i ON true
+            """
+
+
+def fetch_saved_ids(connection, user_id):
+    cursor = connection.cursor()
+    cursor.execute(SAVED_IDS_SQL, (user_id,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def encode_id_bitmap(ids):
+    """
+    {"offset", "length", "bitmap"} for sorted ids: bit k of the base64
+    bitmap (byte k // 8, least significant bit first) is set when
+    offset + k is in ids.
+    """
+    if not ids:
+        return {"offset": 0, "length": 0, "bitmap": ""}
+    offset = ids[0]
+    length = ids[-1] - offset + 1
+    bits = bytearray((length + 7) // 8)
+    for resource_id in ids:
+        position = resource_id - offset
+        bits[position // 8] |= 1 << (position % 8)
+    return {"offset": offset, "length": length, "bitmap": base64.b64encode(bits).decode("ascii")}
+
+
+def _bitmap_size(ids):
+    # Base64 characters of the bitmap of sorted ids.
+    length = ids[-1] - ids[0] + 1
+    return 4 * -(-((length + 7) // 8) // 3)
+
+
+def encode_saved_ids(ids, output="list"):
+    """
+    The GET /saves/ids body for sorted ids. A bitmap is only sent when it is
+    shorter than the id list (sparse ids make it long), so output="bitmap"
+    can still answer with format "list".
+    """
+    if output == "bitmap" and ids and _bitmap_size(ids) < len(",".join(map(str, ids))):
+        return {"format": "bitmap", "count": len(ids), **encode_id_bitmap(ids)}
+    return {"format": "list", "count": len(ids), "ids": ids}
+
+
+def _id_list(data, field):
+    ids = data.get(field) or []
+    if not isinstance(ids, list) or not all(
+        isinstance(value, int) and not isinstance(value, bool) and 1 <= value <= MAX_RESOURCE_ID for value in ids
+    ):
+        raise ValueError(f"{field} must be a list of resource ids")
+    return list(dict.fromkeys(ids))
+
+
+def parse_saves_batch(data):
+    """
+    (ids to save, ids to unsave) from {"save": [...], "unsave": [...]}.
+    Raises ValueError on an invalid payload.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Expected an object with save and/or unsave lists")
+    save = _id_list(data, "save")
+    unsave = _id_list(data, "unsave")
+    if not save and not unsave:
+        raise ValueError("Nothing to save or unsave")
+    if len(save) + len(unsave) > SAVES_BATCH_MAX_IDS:
+        raise ValueError(f"Batches are limited to {SAVES_BATCH_MAX_IDS} ids")
+    both = set(save) & set(unsave)
+    if both:
+        raise ValueError(f"Ids both saved and unsaved: {', '.join(map(str, sorted(both)))}")
+    return save, unsave
+
+
+def apply_saves_batch(cursor, user_id, save, unsave):
+    """
+    Runs the whole batch as one execute_values statement. Returns
+    (added ids, removed ids); ids already in the wanted state, or of
+    resources that do not exist, are in neither.
+    """
+    rows = [(resource_id, True) for resource_id in save] + [(resource_id, False) for resource_id in unsave]
+    query = psycopg2.sql.SQL(SAVES_BATCH_SQL).format(user_id=psycopg2.sql.Literal(user_id)).as_string(cursor)
+    changes = psycopg2.extras.execute_values(
+        cursor, query, rows, template="(%s::integer, %s::boolean)", page_size=len(rows), fetch=True
+    )
+    added = sorted(resource_id for change, resource_id in changes if change == "added")
+    removed = sorted(resource_id for change, resource_id in changes if change == "removed")
+    return added, removed